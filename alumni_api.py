@@ -0,0 +1,257 @@
+"""Read-only HTTP API over the alumni data, without the Streamlit UI
+
+    python alumni_api.py --port 8000 --workers 4
+    uvicorn alumni_api:app
+
+A plain ASGI application, so any ASGI server runs it and no web framework
+is needed. Every endpoint answers GET (and HEAD) with JSON:
+
+    /alumni             search results, one page at a time. Query
+                        parameters: the filters of ``alumni_search.FILTER_KEYS``,
+                        ``sort`` (``alumni_query.SORT_COLUMNS``), ``order``
+                        (asc|desc), ``limit`` and ``after`` (the ``next``
+                        cursor of the previous page)
+    /alumni/<npm>       every column of one alumnus
+    /statistik          headline figures and the top employers
+    /statistik/jumlah   alumni per value of ``kolom`` (``alumni_stats.GROUP_COLUMNS``)
+    /statistik/gaji     salary mean/min/max per value of ``kolom``
+    /versi              the current data version
+
+Responses are cached per (data version, request): the ETag names both, a
+client repeating it in If-None-Match gets 304 Not Modified without any
+work, and other clients asking the same thing get the cached body. Both
+stay valid until the data changes. The snapshot is refreshed in the
+background, and queries run on worker threads, so a slow query or a
+reload never stalls the event loop. Several workers share one dataset
+version through ``alumni_shared``.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from urllib.parse import parse_qsl
+
+import alumni_db
+import alumni_query
+import alumni_store
+
+# Rendered responses kept per process
+CACHE_SIZE = 1024
+JSON_TYPE = b'application/json; charset=utf-8'
+
+
+class NotFound(LookupError):
+    pass
+
+
+def _int_param(params, key, default):
+    value = params.get(key)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise alumni_query.QueryError(f"{key} harus berupa bilangan bulat") from None
+
+
+def _group_column(params):
+    column = params.get('kolom')
+    if not column:
+        raise alumni_query.QueryError("Parameter kolom wajib diisi")
+    return column
+
+
+def list_alumni(snapshot, params):
+    order = params.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        raise alumni_query.QueryError("order harus asc atau desc")
+    return alumni_query.page(
+        snapshot,
+        alumni_query.parse_filters(params),
+        sort=params.get('sort', 'No'),
+        ascending=order == 'asc',
+        after=params.get('after'),
+        limit=_int_param(params, 'limit', alumni_query.DEFAULT_LIMIT),
+    )
+
+
+def get_alumni(snapshot, params, npm):
+    record = alumni_query.detail(snapshot, npm)
+    if record is None:
+        raise NotFound(f"Alumni dengan NPM {npm} tidak ditemukan")
+    return record
+
+
+def statistics(snapshot, params):
+    return {'ringkasan': alumni_query.overview(snapshot), 'top_perusahaan': alumni_query.top_companies(snapshot)}
+
+
+def group_counts(snapshot, params):
+    return alumni_query.counts(snapshot, _group_column(params))
+
+
+def group_salaries(snapshot, params):
+    return alumni_query.salary_by(snapshot, _group_column(params))
+
+
+def data_version(snapshot, params):
+    return {'versi': snapshot.key}
+
+
+ROUTES = {
+    '/alumni': list_alumni,
+    '/statistik': statistics,
+    '/statistik/jumlah': group_counts,
+    '/statistik/gaji': group_salaries,
+    '/versi': data_version,
+}
+DETAIL_PREFIX = '/alumni/'
+
+
+class AlumniAPI:
+    """ASGI application answering the endpoints above from an ``AlumniStore``
+
+    The store is opened on startup (or on the first request, for servers
+    without lifespan events) unless one is passed in.
+    """
+
+    def __init__(self, db_path=alumni_db.DB_PATH, store=None, refresh_interval=alumni_store.REFRESH_INTERVAL):
+        self.db_path = db_path
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self.cache = alumni_query.RecentCache(CACHE_SIZE)
+        self._snapshot = store.snapshot() if store is not None else None
+        self._refreshed = time.monotonic()
+        self._refreshing = None
+        self._started = None
+
+    async def _start(self):
+        if self._started is None:
+            self._started = asyncio.ensure_future(self._open())
+        await asyncio.shield(self._started)
+
+    async def _open(self):
+        if self.store is None:
+            self.store = await asyncio.to_thread(
+                lambda: alumni_store.AlumniStore(alumni_db.init_database(self.db_path)))
+        if self._snapshot is None:
+            self._snapshot = await asyncio.to_thread(self.store.snapshot)
+
+    def snapshot(self):
+        """The current snapshot, never blocking: a due refresh runs on a thread for later requests"""
+        now = time.monotonic()
+        if now - self._refreshed >= self.refresh_interval and self._refreshing is None:
+            self._refreshed = now
+            self._refreshing = asyncio.ensure_future(asyncio.to_thread(self.store.snapshot))
+            self._refreshing.add_done_callback(self._refresh_done)
+        return self._snapshot
+
+    def _refresh_done(self, future):
+        self._refreshing = None
+        if not future.cancelled() and future.exception() is None:
+            self._snapshot = future.result()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self._start()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                else:
+                    await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, send):
+        if scope['method'] not in ('GET', 'HEAD'):
+            await _respond(send, scope, 405, {'error': "Metode tidak didukung"}, [(b'allow', b'GET, HEAD')])
+            return
+        path = scope['path'].rstrip('/') or '/'
+        handler, args = ROUTES.get(path), ()
+        if handler is None and path.startswith(DETAIL_PREFIX):
+            handler, args = get_alumni, (path[len(DETAIL_PREFIX):],)
+        if handler is None:
+            await _respond(send, scope, 404, {'error': "Alamat tidak ditemukan"})
+            return
+
+        await self._start()
+        snapshot = self.snapshot()
+        params = dict(parse_qsl(scope['query_string'].decode('latin-1')))
+        etag = _etag(snapshot, path, params)
+        if etag in _header_values(scope, b'if-none-match'):
+            await _respond(send, scope, 304, None, [(b'etag', etag)])
+            return
+        body = self.cache.get(etag)
+        if body is None:
+            try:
+                result = await asyncio.to_thread(handler, snapshot, params, *args)
+            except alumni_query.QueryError as e:
+                await _respond(send, scope, 400, {'error': str(e)})
+                return
+            except NotFound as e:
+                await _respond(send, scope, 404, {'error': str(e)})
+                return
+            body = json.dumps(result, ensure_ascii=False).encode('utf-8')
+            self.cache.put(etag, body)
+        await _respond(send, scope, 200, body, [(b'etag', etag)])
+
+
+def _etag(snapshot, path, params):
+    """Entity tag naming the data version and the request
+
+    Built from the parsed parameters the handler receives rather than the
+    raw query string, so parameter order does not matter and a repeated
+    parameter counts with the value the handler uses (the last one).
+    """
+    version = snapshot.key or f'lokal-{snapshot.version}'
+    request = json.dumps([path, sorted(params.items())]).encode('utf-8')
+    return f'"{version}-{hashlib.blake2b(request, digest_size=8).hexdigest()}"'.encode('ascii')
+
+
+def _header_values(scope, name):
+    values = []
+    for key, value in scope['headers']:
+        if key == name:
+            values.extend(v.strip() for v in value.split(b','))
+    return values
+
+
+async def _respond(send, scope, status, body, headers=()):
+    """Send one response; ``body`` is encoded bytes, an object to encode as JSON, or None"""
+    if body is not None and not isinstance(body, bytes):
+        body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+    headers = [(b'cache-control', b'no-cache'), *headers]
+    if body is not None:
+        headers += [(b'content-type', JSON_TYPE), (b'content-length', str(len(body)).encode('ascii'))]
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body if body is not None and scope['method'] != 'HEAD' else b''})
+
+
+app = AlumniAPI()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Jalankan dengan server ASGI apa pun, misalnya: pip install uvicorn") from None
+    uvicorn.run('alumni_api:app', host=args.host, port=args.port, workers=args.workers, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
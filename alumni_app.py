@@ -1,9 +1,38 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from collections import Counter
 import os
+import sqlite3
+
+# alumni_charts (plotly), alumni_export and alumni_import (openpyxl) are
+# imported inside the functions that use them, so a cold start only pays
+# for the pages it shows
+import alumni_db
+import alumni_fts
+import alumni_profiler
+import alumni_quality
+import alumni_query
+import alumni_salary
+import alumni_schema
+import alumni_stats
+import alumni_store
+import alumni_warmup
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+CSS_PATH = os.path.join(STATIC_DIR, 'alumni.css')
+LOGO_PATH = os.path.join(STATIC_DIR, 'logo_fmipa_ui.svg')
+
+# Search results table
+PAGE_SIZES = [10, 25, 50, 100]
+DEFAULT_PAGE_SIZE = 25
+SORT_OPTIONS = {
+    'No': 'Urutan data',
+    'Nama': 'Nama',
+    'NPM': 'NPM',
+    'Program Studi': 'Program Studi',
+    'Angkatan': 'Angkatan',
+    'Nama Perusahaan': 'Perusahaan',
+    'Rata-rata Gaji': 'Gaji',
+}
 
 # Configure page
 st.set_page_config(
@@ -13,80 +42,122 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        font-weight: bold;
-        color: #2563eb;
-        text-align: center;
-        margin-bottom: 1rem;
-    }
-    .sub-header {
-        font-size: 1.5rem;
-        color: #1f2937;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .metric-card {
-        background-color: white;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border: 1px solid #e5e7eb;
-        text-align: center;
-    }
-    .feature-card {
-        background-color: #f8fafc;
-        padding: 1.5rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #2563eb;
-        margin: 1rem 0;
-    }
-    .stButton>button {
-        width: 100%;
-        border-radius: 0.5rem;
-        border: none;
-        padding: 0.5rem 1rem;
-        font-weight: bold;
-    }
-    .alumni-card {
-        background-color: #f8fafc;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border: 1px solid #e5e7eb;
-        margin-bottom: 1rem;
-    }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def load_css():
+    """Contents of the bundled stylesheet"""
+    with open(CSS_PATH, encoding='utf-8') as f:
+        return f.read()
+
+# Custom CSS (bundled with the app, read once per process)
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
 
 # Initialize session state
 def init_session_state():
-    if 'alumni_data' not in st.session_state:
-        st.session_state.alumni_data = load_excel_data()
     if 'current_page' not in st.session_state:
         st.session_state.current_page = 'welcome'
+    if 'data_version' not in st.session_state:
+        st.session_state.data_version = 0
+
+@st.cache_resource
+def get_warmer():
+    """Background builder of the page artifacts, shared by all sessions"""
+    return alumni_warmup.Warmer()
+
+@st.cache_resource
+def get_store():
+    """Shared alumni dataset, created once per process; every version it publishes is warmed"""
+    store = alumni_store.AlumniStore(alumni_db.init_database())
+    store.subscribe(get_warmer().publish)
+    return store
 
-@st.cache_data
-def load_excel_data():
-    """Load alumni data from uploaded Excel file"""
+def load_alumni_data():
+    """Return the current dataset snapshot and remember its version for this session"""
     try:
-        # Try to read the uploaded Excel file
-        df = pd.read_excel('C:/Users/Aliya Dwi Karina/Pictures/gui/Database_Alumni S1 Departemen Matematika FMIPA UI.xlsx', sheet_name='Data ')
-        
-        # Data cleaning and formatting
-        df['NPM'] = df['NPM'].astype(str)
-        df['Angkatan'] = df['Angkatan'].astype(str)
-        df['Tahun Lulus'] = df['Tahun Lulus'].astype(str)
-        
-        # Remove any rows with missing critical data
-        df = df.dropna(subset=['Nama', 'NPM'])
-        
-        return df
-        
+        snapshot = get_store().snapshot()
+    except Exception as e:
+        st.error(f"Error loading database: {str(e)}")
+        return alumni_store.Snapshot(0, alumni_schema.apply_schema(create_fallback_data()))
+    
+    if 0 < st.session_state.data_version < snapshot.version:
+        st.toast("🔄 Data alumni telah diperbarui")
+    st.session_state.data_version = snapshot.version
+    return snapshot
+
+@st.cache_resource
+def get_export_cache():
+    """Export files shared by all sessions"""
+    import alumni_export
+
+    return alumni_export.ExportCache()
+
+def show_chart(figure):
+    """Render a prebuilt Plotly figure"""
+    with alumni_profiler.timed('render.chart'):
+        st.plotly_chart(figure, use_container_width=True)
+
+def is_admin():
+    """True when the URL carries the admin token set in ALUMNI_ADMIN_TOKEN"""
+    token = os.environ.get('ALUMNI_ADMIN_TOKEN')
+    return bool(token) and st.query_params.get('admin') == token
+
+def show_profiling_panel():
+    """Admin-only sidebar panel with stage latencies and cache hit rates"""
+    with st.expander("⏱️ Profiling", expanded=False):
+        st.markdown("**Latensi per tahap**")
+        st.dataframe(alumni_profiler.stage_summary(), use_container_width=True, hide_index=True)
+        st.markdown("**Cache**")
+        st.dataframe(alumni_profiler.cache_summary(), use_container_width=True, hide_index=True)
+        for name, value in sorted(alumni_profiler.counters().items()):
+            st.write(f"• {name}: {value}")
+        st.download_button(
+            label="💾 Ekspor JSONL",
+            data=alumni_profiler.export_jsonl(),
+            file_name="profiling_alumni.jsonl",
+            mime="application/x-ndjson",
+            use_container_width=True
+        )
+        if st.button("🔄 Reset Profiling", use_container_width=True):
+            alumni_profiler.reset()
+            st.rerun()
+
+def show_quality_report(report):
+    """Sidebar summary of the rows the last upload quarantined"""
+    quarantined = report['rows']
+    with st.expander("🧪 Laporan Kualitas Data", expanded=not quarantined.empty):
+        st.write(f"**{report['file']}**: {report['accepted']} baris diterima, {len(quarantined)} dikarantina")
+        for code, count in report['counts'].most_common():
+            st.write(f"• {alumni_quality.REASONS[code]}: {count}")
+        if not quarantined.empty:
+            st.dataframe(quarantined.drop(columns='data'), use_container_width=True, hide_index=True)
+            st.download_button(
+                label="💾 Download Karantina CSV",
+                data=quarantined.to_csv(index=False).encode('utf-8'),
+                file_name="karantina_alumni.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
+
+def show_download_button(snapshot, fmt, label, file_name, rows=None):
+    """Offer an export of the snapshot (or of the given rows), written only when the download is clicked"""
+    import alumni_export
+
+    cache = get_export_cache()
+
+    def export():
+        # Runs on Streamlit's download thread, outside the rerun
+        with open(cache.export(snapshot, fmt, rows), 'rb') as f:
+            return f.read()
+
+    try:
+        st.download_button(
+            label=label,
+            data=export,
+            file_name=file_name,
+            mime=alumni_export.MIME_TYPES[fmt],
+            use_container_width=True
+        )
     except Exception as e:
-        st.error(f"Error loading Excel file: {str(e)}")
-        return create_fallback_data()
+        st.error(f"❌ Error: {str(e)}")
 
 def create_fallback_data():
     """Create fallback sample data if Excel file can't be loaded"""
@@ -119,6 +190,16 @@ def create_fallback_data():
     }
     return pd.DataFrame(sample_data)
 
+@alumni_profiler.profiled('format.currency')
+def format_currency_series(amounts):
+    """Vectorized format_currency for a column of amounts"""
+    numbers = pd.to_numeric(amounts, errors='coerce')
+    digits = numbers.dropna().astype('int64').astype(str)
+    digits = digits.str.replace(r'\B(?=(\d{3})+$)', '.', regex=True)
+    formatted = pd.Series('Tidak tersedia', index=amounts.index, dtype=object)
+    formatted[digits.index] = 'Rp' + digits + ',00'
+    return formatted
+
 def format_currency(amount):
     """Format currency to Rupiah"""
     if pd.isna(amount) or amount == '':
@@ -131,7 +212,8 @@ def format_currency(amount):
     except:
         return str(amount)
 
-def show_welcome_page():
+@alumni_profiler.profiled('page.welcome')
+def show_welcome_page(snapshot):
     """Display welcome page"""
     st.markdown('<h1 class="main-header">🎓 Database Alumni</h1>', unsafe_allow_html=True)
     st.markdown('<h2 class="sub-header">Departemen Matematika FMIPA UI</h2>', unsafe_allow_html=True)
@@ -146,18 +228,17 @@ def show_welcome_page():
     """, unsafe_allow_html=True)
     
     # Quick stats
-    data = st.session_state.alumni_data
+    stats = alumni_query.statistics(snapshot)
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("🎓 Total Alumni", len(data))
+        st.metric("🎓 Total Alumni", stats.total)
     with col2:
-        st.metric("📚 Program Studi", data['Program Studi'].nunique())
+        st.metric("📚 Program Studi", stats.nunique('Program Studi'))
     with col3:
-        st.metric("🏢 Perusahaan", data['Nama Perusahaan'].nunique())
+        st.metric("🏢 Perusahaan", len(alumni_query.company_counts(snapshot)))
     with col4:
-        avg_salary = data['Rata-rata Gaji'].mean() if 'Rata-rata Gaji' in data.columns else 0
-        st.metric("💰 Rata-rata Gaji", format_currency(avg_salary))
+        st.metric("💰 Rata-rata Gaji", format_currency(stats.gaji_mean))
     
     # Feature cards
     col1, col2, col3 = st.columns(3)
@@ -194,83 +275,130 @@ def show_welcome_page():
             st.session_state.current_page = 'search'
             st.rerun()
 
-def show_search_page():
+@alumni_profiler.profiled('page.search')
+def show_search_page(snapshot):
     """Display search and data page"""
     st.markdown('<h1 class="main-header">🔍 Pencarian Alumni</h1>', unsafe_allow_html=True)
     
-    data = st.session_state.alumni_data
+    mode = st.radio("Mode pencarian", ["🔎 Filter data", "📖 Teks lengkap"], horizontal=True)
+    if mode == "📖 Teks lengkap":
+        show_fulltext_search(snapshot)
+        return
+    
+    data = snapshot.data
+    index = alumni_query.search_index(snapshot)
     
-    # Search filters
+    # Search filters, applied together when the form is submitted
     with st.expander("🔍 Filter Pencarian", expanded=True):
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            nama_filter = st.text_input("Nama Alumni")
-            pekerjaan_filter = st.text_input("Pekerjaan")
-        
-        with col2:
-            program_options = ["Semua"] + sorted(data['Program Studi'].dropna().unique().tolist())
-            program_filter = st.selectbox("Program Studi", program_options)
+        with st.form("search_filters"):
+            col1, col2, col3 = st.columns(3)
             
-            perusahaan_filter = st.text_input("Nama Perusahaan")
-        
-        with col3:
-            npm_filter = st.text_input("NPM")
+            with col1:
+                nama_filter = st.text_input("Nama Alumni")
+                pekerjaan_filter = st.text_input("Pekerjaan")
             
-            col3a, col3b = st.columns(2)
-            with col3a:
-                gaji_min = st.number_input("Gaji Min (Rp)", min_value=0, step=1000000, format="%d")
-            with col3b:
-                gaji_max = st.number_input("Gaji Max (Rp)", min_value=0, step=1000000, format="%d")
-    
-    # Apply filters
-    filtered_data = data.copy()
-    
-    if nama_filter:
-        filtered_data = filtered_data[filtered_data['Nama'].str.contains(nama_filter, case=False, na=False)]
-    
-    if program_filter != "Semua":
-        filtered_data = filtered_data[filtered_data['Program Studi'] == program_filter]
-    
-    if npm_filter:
-        filtered_data = filtered_data[filtered_data['NPM'].str.contains(npm_filter, na=False)]
-    
-    if pekerjaan_filter:
-        filtered_data = filtered_data[filtered_data['Pekerjaan'].str.contains(pekerjaan_filter, case=False, na=False)]
-    
-    if perusahaan_filter:
-        filtered_data = filtered_data[filtered_data['Nama Perusahaan'].str.contains(perusahaan_filter, case=False, na=False)]
-    
-    if gaji_min > 0:
-        filtered_data = filtered_data[filtered_data['Rata-rata Gaji'] >= gaji_min]
-    
-    if gaji_max > 0:
-        filtered_data = filtered_data[filtered_data['Rata-rata Gaji'] <= gaji_max]
+            with col2:
+                program_options = ["Semua"] + index.program_studi.values
+                program_filter = st.selectbox("Program Studi", program_options)
+                
+                perusahaan_filter = st.text_input("Nama Perusahaan")
+            
+            with col3:
+                npm_filter = st.text_input("NPM")
+                
+                col3a, col3b = st.columns(2)
+                with col3a:
+                    gaji_min = st.number_input("Gaji Min (Rp)", min_value=0, step=1000000, format="%d")
+                with col3b:
+                    gaji_max = st.number_input("Gaji Max (Rp)", min_value=0, step=1000000, format="%d")
+            
+            st.form_submit_button("🔍 Cari", type="primary")
+    
+    filters = {
+        'nama': nama_filter,
+        'program_studi': program_filter if program_filter != "Semua" else None,
+        'npm': npm_filter,
+        'pekerjaan': pekerjaan_filter,
+        'perusahaan': perusahaan_filter,
+        'gaji_min': gaji_min,
+        'gaji_max': gaji_max,
+    }
+    rows, summary = get_search_result(snapshot, filters)
     
     # Results
-    st.markdown(f"### 📋 Hasil Pencarian ({len(filtered_data)} dari {len(data)} alumni)")
+    st.markdown(f"### 📋 Hasil Pencarian ({len(rows)} dari {len(data)} alumni)")
     
-    if len(filtered_data) > 0:
+    if len(rows) > 0:
         # Show summary stats for filtered data
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("🎯 Alumni Ditemukan", len(filtered_data))
+            st.metric("🎯 Alumni Ditemukan", len(rows))
         with col2:
-            if len(filtered_data) > 0:
-                avg_gaji_filtered = filtered_data['Rata-rata Gaji'].mean()
-                st.metric("💰 Rata-rata Gaji", format_currency(avg_gaji_filtered))
+            st.metric("💰 Rata-rata Gaji", format_currency(summary['gaji_mean']))
         with col3:
-            if len(filtered_data) > 0:
-                top_program = filtered_data['Program Studi'].mode().iloc[0] if not filtered_data['Program Studi'].mode().empty else "N/A"
-                st.metric("📚 Program Terpopuler", top_program)
+            st.metric("📚 Program Terpopuler", summary['top_program'] or "N/A")
         
-        # Format display data
-        display_data = filtered_data.copy()
-        display_data['Rata-rata Gaji Formatted'] = display_data['Rata-rata Gaji'].apply(format_currency)
-        
-        # Show data table
+        show_search_results(snapshot, index, rows)
+    else:
+        st.warning("Tidak ada data alumni yang sesuai dengan filter pencarian.")
+        st.info("💡 Tip: Coba kurangi atau hapus beberapa filter untuk memperluas hasil pencarian.")
+
+def get_search_result(snapshot, filters):
+    """Matching rows and their summary metrics, reusing this session's previous search
+
+    Resubmitting the same filters costs nothing; filters that only narrow
+    the previous ones recheck the previous hits instead of the whole index.
+    Searches other sessions ran (or the warmer ran, see ``alumni_warmup``)
+    on this version are a lookup.
+    """
+    previous = st.session_state.get('search_result')
+    narrowed = None
+    if previous is not None and previous['version'] == snapshot.version:
+        if previous['filters'] == filters:
+            return previous['rows'], previous['summary']
+        narrowed = (previous['filters'], previous['matched'])
+    matched, rows, summary = alumni_query.search_result(snapshot, filters, narrowed)
+    get_warmer().record_search(filters)
+    st.session_state.search_result = {
+        'version': snapshot.version, 'filters': filters, 'matched': matched, 'rows': rows, 'summary': summary,
+    }
+    return rows, summary
+
+@st.fragment
+def show_search_results(snapshot, index, rows):
+    """Sorted, paginated result table with export and detail
+
+    A fragment: changing the sort, page or selected alumnus reruns only
+    this part, not the filters and metrics above it.
+    """
+    data = snapshot.data
+    
+    # Sorting and pagination
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        sort_column = st.selectbox("Urutkan berdasarkan", list(SORT_OPTIONS), format_func=SORT_OPTIONS.get)
+    with col2:
+        ascending = st.selectbox("Arah", ["Naik", "Turun"]) == "Naik"
+    with col3:
+        page_size = st.selectbox("Baris per halaman", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE))
+    with col4:
+        page_count = (len(rows) - 1) // page_size + 1
+        page = st.number_input(f"Halaman (dari {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+    
+    if sort_column != 'No':
+        rows = index.sort(rows, sort_column, ascending)
+    elif not ascending:
+        rows = rows[::-1]
+    page_data = data.iloc[rows[(page - 1) * page_size:page * page_size]]
+    
+    # Format only the visible page
+    display_data = page_data[['Nama', 'NPM', 'Program Studi', 'Angkatan', 'Pekerjaan', 'Nama Perusahaan']].copy()
+    display_data['Rata-rata Gaji Formatted'] = format_currency_series(page_data['Rata-rata Gaji'])
+    
+    # Show data table
+    with alumni_profiler.timed('render.table'):
         st.dataframe(
-            display_data[['Nama', 'NPM', 'Program Studi', 'Angkatan', 'Pekerjaan', 'Nama Perusahaan', 'Rata-rata Gaji Formatted']],
+            display_data,
             use_container_width=True,
             hide_index=True,
             column_config={
@@ -283,23 +411,87 @@ def show_search_page():
                 'Rata-rata Gaji Formatted': 'Gaji'
             }
         )
-        
-        # Alumni detail selection
-        st.markdown("### 👤 Detail Alumni")
-        selected_name = st.selectbox(
-            "Pilih alumni untuk melihat detail lengkap:",
-            ["Pilih alumni..."] + filtered_data['Nama'].tolist()
+    
+    # Export the full (sorted) search result
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("📥 Unduh Hasil (CSV)", use_container_width=True):
+            show_download_button(snapshot, 'csv', label="💾 Download CSV", file_name="hasil_pencarian.csv", rows=rows)
+    with col2:
+        if st.button("📊 Unduh Hasil (Excel)", use_container_width=True):
+            show_download_button(snapshot, 'xlsx', label="💾 Download Excel", file_name="hasil_pencarian.xlsx", rows=rows)
+    
+    # Alumni detail selection (limited to the visible page)
+    st.markdown("### 👤 Detail Alumni")
+    labels = dict(zip(page_data['NPM'], page_data['Nama'] + ' (' + page_data['NPM'] + ')'))
+    selected_npm = st.selectbox(
+        "Pilih alumni di halaman ini untuk melihat detail lengkap:",
+        [None] + list(labels),
+        format_func=lambda npm: "Pilih alumni..." if npm is None else labels[npm]
+    )
+    
+    if selected_npm is not None:
+        show_alumni_detail(selected_npm, snapshot)
+
+@alumni_profiler.profiled('page.fulltext')
+def show_fulltext_search(snapshot):
+    """Ranked full-text search over thesis titles and company addresses"""
+    st.caption("Cari kata di judul skripsi dan alamat perusahaan. Imbuhan diabaikan (\"peramalan\" juga menemukan "
+               "\"meramalkan\"); akhiri kata dengan * untuk mencari awalan, misalnya regres*.")
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        query = st.text_input("Kata kunci", placeholder="contoh: peramalan inflasi")
+    with col2:
+        sources = st.multiselect(
+            "Cari di",
+            list(alumni_fts.SOURCE_LABELS),
+            default=list(alumni_fts.SOURCE_LABELS),
+            format_func=alumni_fts.SOURCE_LABELS.get
         )
-        
-        if selected_name != "Pilih alumni...":
-            show_alumni_detail(selected_name)
-    else:
-        st.warning("Tidak ada data alumni yang sesuai dengan filter pencarian.")
-        st.info("💡 Tip: Coba kurangi atau hapus beberapa filter untuk memperluas hasil pencarian.")
+    
+    if not query.strip() or not sources:
+        st.info("💡 Masukkan kata kunci untuk mulai mencari.")
+        return
+    
+    try:
+        hits = get_store().fulltext(query, tuple(sources))
+    except sqlite3.Error as e:
+        st.error(f"❌ Error: {str(e)}")
+        return
+    
+    # Rows committed after this snapshot was taken appear on the next rerun
+    positions = alumni_query.npm_positions(snapshot)
+    hits = hits[hits['NPM'].isin(positions)]
+    st.markdown(f"### 📋 Hasil Pencarian ({len(hits)} alumni, diurutkan menurut relevansi)")
+    if hits.empty:
+        st.warning("Tidak ada judul skripsi atau alamat perusahaan yang cocok.")
+        return
+    
+    matched = snapshot.data.iloc[[positions[npm] for npm in hits['NPM']]]
+    display_data = matched[['Nama', 'NPM', 'Program Studi']].reset_index(drop=True)
+    display_data['Sumber'] = hits['Sumber'].to_numpy()
+    display_data['Cuplikan'] = hits['Cuplikan'].to_numpy()
+    display_data['Skor'] = hits['Skor'].round(2).to_numpy()
+    with alumni_profiler.timed('render.table'):
+        st.dataframe(display_data, use_container_width=True, hide_index=True)
+    
+    labels = dict(zip(matched['NPM'], matched['Nama'] + ' (' + matched['NPM'] + ')'))
+    selected_npm = st.selectbox(
+        "Pilih alumni untuk melihat detail lengkap:",
+        [None] + list(labels),
+        format_func=lambda npm: "Pilih alumni..." if npm is None else labels[npm]
+    )
+    if selected_npm is not None:
+        show_alumni_detail(selected_npm, snapshot)
 
-def show_alumni_detail(nama):
-    """Show detailed information for selected alumni"""
-    alumni = st.session_state.alumni_data[st.session_state.alumni_data['Nama'] == nama].iloc[0]
+@alumni_profiler.profiled('page.detail')
+def show_alumni_detail(npm, snapshot):
+    """Show detailed information for the alumni with the given NPM"""
+    positions = alumni_query.npm_positions(snapshot)
+    if npm not in positions:
+        st.warning(f"Alumni dengan NPM {npm} tidak ditemukan.")
+        return
+    alumni = snapshot.data.iloc[positions[npm]]
     
     st.markdown(f"#### 🎓 {alumni['Nama']}")
     
@@ -326,150 +518,162 @@ def show_alumni_detail(nama):
         with st.expander("📍 Alamat Perusahaan"):
             st.write(alumni['Alamat Perusahaan'])
 
-def show_statistics_page():
+@alumni_profiler.profiled('page.statistics')
+def show_statistics_page(snapshot):
     """Display statistics page"""
     st.markdown('<h1 class="main-header">📊 Statistik Alumni</h1>', unsafe_allow_html=True)
     
-    data = st.session_state.alumni_data
+    overview = alumni_query.overview(snapshot)
     
     # Overview metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("🎓 Total Alumni", len(data))
+        st.metric("🎓 Total Alumni", overview['total'])
     
     with col2:
-        st.metric("📚 Program Studi", data['Program Studi'].nunique())
+        st.metric("📚 Program Studi", overview['program_studi'])
     
     with col3:
-        st.metric("🏢 Total Perusahaan", data['Nama Perusahaan'].nunique())
+        st.metric("🏢 Total Perusahaan", overview['perusahaan'])
     
     with col4:
-        avg_salary = data['Rata-rata Gaji'].mean()
-        st.metric("💰 Rata-rata Gaji", format_currency(avg_salary))
+        st.metric("💰 Rata-rata Gaji", format_currency(overview['gaji_mean']))
     
     # Additional metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        min_salary = data['Rata-rata Gaji'].min()
-        st.metric("💵 Gaji Terendah", format_currency(min_salary))
+        st.metric("💵 Gaji Terendah", format_currency(overview['gaji_min']))
     
     with col2:
-        max_salary = data['Rata-rata Gaji'].max()
-        st.metric("💎 Gaji Tertinggi", format_currency(max_salary))
+        st.metric("💎 Gaji Tertinggi", format_currency(overview['gaji_max']))
     
     with col3:
-        angkatan_range = f"{data['Angkatan'].min()}-{data['Angkatan'].max()}"
-        st.metric("📅 Rentang Angkatan", angkatan_range)
+        st.metric("📅 Rentang Angkatan", f"{overview['angkatan_min']}-{overview['angkatan_max']}")
     
     with col4:
-        avg_tahun_lulus = int(data['Tahun Lulus'].astype(int).mean())
-        st.metric("🎓 Rata-rata Lulus", avg_tahun_lulus)
+        avg_tahun_lulus = overview['tahun_lulus_mean']
+        st.metric("🎓 Rata-rata Lulus", int(avg_tahun_lulus) if avg_tahun_lulus else "N/A")
     
-    # Charts
+    # Charts (built in the background once per dataset version)
+    figures, current = get_warmer().ready(snapshot, 'figures', alumni_warmup.statistics_figures)
+    if not current:
+        st.caption("⏳ Grafik sedang diperbarui untuk data terbaru")
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("### 📊 Distribusi Program Studi")
-        program_counts = data['Program Studi'].value_counts()
-        fig1 = px.pie(
-            values=program_counts.values,
-            names=program_counts.index,
-            title="Distribusi Alumni per Program Studi",
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-        st.plotly_chart(fig1, use_container_width=True)
+        show_chart(figures['program'])
     
     with col2:
         st.markdown("### 📅 Distribusi Angkatan")
-        angkatan_counts = data['Angkatan'].value_counts().sort_index()
-        fig2 = px.bar(
-            x=angkatan_counts.index,
-            y=angkatan_counts.values,
-            title="Jumlah Alumni per Angkatan",
-            labels={'x': 'Angkatan', 'y': 'Jumlah Alumni'},
-            color=angkatan_counts.values,
-            color_continuous_scale='Blues'
-        )
-        st.plotly_chart(fig2, use_container_width=True)
+        show_chart(figures['angkatan'])
     
     # Salary analysis
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("### 💰 Distribusi Gaji")
-        fig3 = px.histogram(
-            data,
-            x='Rata-rata Gaji',
-            title="Distribusi Gaji Alumni",
-            nbins=15,
-            labels={'Rata-rata Gaji': 'Gaji (Rp)', 'count': 'Jumlah Alumni'}
-        )
-        st.plotly_chart(fig3, use_container_width=True)
+        show_chart(figures['gaji_histogram'])
     
     with col2:
         st.markdown("### 📈 Gaji per Program Studi")
-        fig4 = px.box(
-            data,
-            x='Program Studi',
-            y='Rata-rata Gaji',
-            title="Distribusi Gaji per Program Studi"
-        )
-        st.plotly_chart(fig4, use_container_width=True)
+        show_chart(figures['gaji_box'])
+    
+    # Salary per group, straight from the summary tables
+    st.markdown("### 📋 Ringkasan Gaji per Kelompok")
+    group_column = st.selectbox("Kelompokkan berdasarkan", alumni_stats.GROUP_COLUMNS, key="salary_group")
+    salary_table = alumni_query.statistics(snapshot).salary_by(group_column)
+    for col in ['Rata-rata Gaji', 'Gaji Terendah', 'Gaji Tertinggi']:
+        salary_table[col] = format_currency_series(salary_table[col])
+    st.dataframe(salary_table, use_container_width=True, hide_index=True)
     
     # Top companies
     st.markdown("### 🏆 Top Perusahaan")
-    company_counts = Counter(data['Nama Perusahaan'].dropna())
-    top_companies = company_counts.most_common(10)
+    companies_df = figures['companies_table']
     
-    if top_companies:
-        companies_df = pd.DataFrame(top_companies, columns=['Perusahaan', 'Jumlah Alumni'])
-        companies_df['Persentase'] = (companies_df['Jumlah Alumni'] / len(data) * 100).round(1)
-        
-        fig5 = px.bar(
-            companies_df,
-            x='Jumlah Alumni',
-            y='Perusahaan',
-            orientation='h',
-            title="Top 10 Perusahaan dengan Alumni Terbanyak",
-            text='Jumlah Alumni'
-        )
-        fig5.update_layout(yaxis={'categoryorder':'total ascending'})
-        st.plotly_chart(fig5, use_container_width=True)
+    if not companies_df.empty:
+        show_chart(figures['companies'])
         
         # Show detailed table
         st.dataframe(companies_df, use_container_width=True, hide_index=True)
     
     # Peminatan analysis
     st.markdown("### 🔬 Analisis Peminatan")
-    peminatan_counts = data['Peminatan'].value_counts()
     
     col1, col2 = st.columns(2)
     
     with col1:
-        fig6 = px.bar(
-            x=peminatan_counts.values,
-            y=peminatan_counts.index,
-            orientation='h',
-            title="Distribusi Alumni per Peminatan"
-        )
-        fig6.update_layout(yaxis={'categoryorder':'total ascending'})
-        st.plotly_chart(fig6, use_container_width=True)
+        show_chart(figures['peminatan'])
     
     with col2:
         # Salary by peminatan
-        peminatan_salary = data.groupby('Peminatan')['Rata-rata Gaji'].mean().sort_values(ascending=False)
-        fig7 = px.bar(
-            x=peminatan_salary.values,
-            y=peminatan_salary.index,
-            orientation='h',
-            title="Rata-rata Gaji per Peminatan"
+        show_chart(figures['peminatan_gaji'])
+    
+    show_salary_analytics(snapshot)
+
+@alumni_profiler.profiled('page.statistics.salary')
+def show_salary_analytics(snapshot):
+    """Percentile tables and year-over-year cohort trends of salaries"""
+    warmer = get_warmer()
+    analytics, current = warmer.ready(snapshot, 'salary', alumni_warmup.salary_analytics)
+    st.markdown("### 📐 Persentil Gaji")
+    if not current:
+        st.caption("⏳ Analisis gaji sedang diperbarui untuk data terbaru")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        group_by = st.multiselect(
+            "Kelompokkan berdasarkan",
+            alumni_salary.GROUP_COLUMNS,
+            default=alumni_warmup.DEFAULT_PERCENTILE_GROUPS,
+            key="percentile_groups"
+        )
+    with col2:
+        min_count = st.number_input(
+            "Minimal alumni per kelompok",
+            min_value=1,
+            value=alumni_warmup.DEFAULT_TREND[2],
+            step=1,
+            key="percentile_min"
         )
-        fig7.update_layout(yaxis={'categoryorder':'total ascending'})
-        st.plotly_chart(fig7, use_container_width=True)
+    
+    if group_by:
+        table = analytics.percentiles(group_by, min_count=min_count)
+        salary_columns = ['Rata-rata'] + [f'P{p}' for p in alumni_salary.PERCENTILES]
+        display = table.copy()
+        for col in salary_columns:
+            display[col] = format_currency_series(display[col])
+        st.caption(f"{len(table)} kelompok, {int(table['Jumlah'].sum())} alumni dengan data gaji")
+        st.dataframe(display, use_container_width=True, hide_index=True)
+    
+    st.markdown("### 📈 Tren Gaji per Angkatan Lulusan")
+    col1, col2 = st.columns(2)
+    with col1:
+        cohort = st.selectbox("Kohort", alumni_salary.COHORT_COLUMNS, key="trend_cohort")
+    with col2:
+        split = st.selectbox("Pisahkan per", ["(Semua alumni)", 'Program Studi', 'Peminatan'], key="trend_split")
+    by = None if split == "(Semua alumni)" else split
+    (trends, figure), current = warmer.ready(
+        snapshot,
+        alumni_warmup.trend_name(cohort, by, min_count),
+        lambda snapshot: alumni_warmup.salary_trend(snapshot, cohort, by, min_count)
+    )
+    if not current:
+        st.caption("⏳ Tren gaji sedang diperbarui untuk data terbaru")
+    if figure is None:
+        st.info("Belum ada data gaji untuk tren ini.")
+        return
+    show_chart(figure)
+    display = trends.copy()
+    for col in ['Rata-rata', 'Median']:
+        display[col] = format_currency_series(display[col])
+    for col in ['Perubahan Median (%)', 'Perubahan Rata-rata (%)']:
+        display[col] = display[col].round(2)
+    st.dataframe(display, use_container_width=True, hide_index=True)
 
-def show_add_form():
+@alumni_profiler.profiled('page.add_form')
+def show_add_form(snapshot):
     """Show form to add new alumni data"""
     st.markdown('<h1 class="main-header">➕ Tambah Data Alumni</h1>', unsafe_allow_html=True)
     
@@ -490,7 +694,7 @@ def show_add_form():
         
         with col1:
             # Get unique peminatan options from existing data
-            existing_peminatan = st.session_state.alumni_data['Peminatan'].dropna().unique().tolist()
+            existing_peminatan = list(alumni_query.statistics(snapshot).group_counts['Peminatan'])
             peminatan_options = sorted(set(existing_peminatan + ["Matematika Komputasi", "Matematika Murni", "Matematika Statistik", "Operational Research", "Aktuaria"]))
             peminatan = st.selectbox("Peminatan", peminatan_options)
             tahun_lulus = st.text_input("Tahun Lulus", placeholder="Contoh: 2020")
@@ -520,7 +724,6 @@ def show_add_form():
             else:
                 # Create new alumni record
                 new_alumni = {
-                    'No': len(st.session_state.alumni_data) + 1,
                     'Nama': nama,
                     'NPM': npm,
                     'Program Studi': program_studi,
@@ -535,20 +738,32 @@ def show_add_form():
                     'Rata-rata Gaji': gaji
                 }
                 
-                # Add to dataframe
-                new_row = pd.DataFrame([new_alumni])
-                st.session_state.alumni_data = pd.concat([st.session_state.alumni_data, new_row], ignore_index=True)
-                
-                st.success("✅ Data alumni berhasil ditambahkan!")
-                st.balloons()
+                # Queue the write (upsert on NPM) and wait for the published version
+                try:
+                    result = get_store().add(new_alumni)
+                except (sqlite3.Error, ValueError) as e:
+                    st.error(f"❌ Error: {str(e)}")
+                else:
+                    st.session_state.data_version = result.snapshot.version
+                    if result.created:
+                        st.success("✅ Data alumni berhasil ditambahkan!")
+                        st.balloons()
+                    else:
+                        st.info(f"ℹ️ NPM {npm} sudah terdaftar, datanya telah diperbarui.")
 
 def main():
     """Main application function"""
+    with alumni_profiler.rerun():
+        render_app()
+
+def render_app():
+    """Render the sidebar and the selected page"""
     init_session_state()
+    snapshot = load_alumni_data()
     
     # Sidebar navigation
     with st.sidebar:
-        st.image("https://via.placeholder.com/150x100/2563eb/ffffff?text=FMIPA+UI", use_column_width=True)
+        st.image(LOGO_PATH, use_container_width=True)
         st.markdown("### 🎓 Database Alumni")
         st.markdown("**Matematika FMIPA UI**")
         
@@ -574,60 +789,101 @@ def main():
         
         # Download data as CSV
         if st.button("📥 Download Data CSV", use_container_width=True):
-            csv = st.session_state.alumni_data.to_csv(index=False)
-            st.download_button(
-                label="💾 Download CSV",
-                data=csv,
-                file_name="alumni_data.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
+            show_download_button(snapshot, 'csv', label="💾 Download CSV", file_name="alumni_data.csv")
         
         # Download data as Excel
         if st.button("📊 Download Data Excel", use_container_width=True):
-            # This would create an Excel file download
-            st.info("💡 Feature Excel download sedang dalam pengembangan")
+            show_download_button(snapshot, 'xlsx', label="💾 Download Excel", file_name="alumni_data.xlsx")
         
         # File upload
         uploaded_file = st.file_uploader("📤 Upload Excel/CSV", type=['xlsx', 'csv'])
-        if uploaded_file is not None:
+        replace_data = st.checkbox("Ganti seluruh data dengan file ini", value=False)
+        if uploaded_file is not None and st.session_state.get('imported_upload') != uploaded_file.file_id:
+            progress_bar = st.progress(0.0, text="Mengimpor data...")
+            
+            import alumni_import
+
+            def report_progress(rows, fraction):
+                progress_bar.progress(fraction if fraction is not None else 0.0, text=f"Mengimpor data... {rows} baris")
+            
+            # Uploaded rows are also checked against the published data they join
+            quality = alumni_quality.QualityScanner(None if replace_data else snapshot.data, source=uploaded_file.name)
             try:
-                if uploaded_file.name.endswith('.xlsx'):
-                    df = pd.read_excel(uploaded_file, sheet_name='Data ')
+                imported = get_store().apply(lambda conn: alumni_import.import_chunks(
+                    conn,
+                    alumni_import.iter_upload_chunks(uploaded_file),
+                    replace=replace_data,
+                    progress=report_progress,
+                    quality=quality
+                ))
+                st.session_state.data_version = get_store().version
+                st.session_state.imported_upload = uploaded_file.file_id
+                st.session_state.quality_report = {
+                    'file': uploaded_file.name,
+                    'accepted': quality.accepted,
+                    'counts': quality.counts(),
+                    'rows': quality.quarantined(),
+                }
+                alumni_profiler.count('import.rows', imported)
+                st.success(f"✅ {imported} data berhasil diupload!")
+                st.rerun()
+            except Exception as e:
+                progress_bar.empty()
+                st.error(f"❌ Error: {str(e)}")
+        if 'quality_report' in st.session_state:
+            show_quality_report(st.session_state.quality_report)
+        
+        # Apply only what changed in the workbook since the last sync
+        if os.path.exists(alumni_db.EXCEL_PATH) and st.button("🔄 Sinkronkan Workbook", use_container_width=True):
+            try:
+                with st.spinner("Menyinkronkan workbook..."):
+                    delta = get_store().sync_workbook()
+                if delta is None:
+                    st.session_state.sync_message = "Workbook tidak berubah sejak sinkronisasi terakhir"
                 else:
-                    df = pd.read_csv(uploaded_file)
-                
-                st.session_state.alumni_data = df
-                st.success("✅ Data berhasil diupload!")
+                    counts = delta.counts()
+                    st.session_state.sync_message = (
+                        f"✅ Sinkronisasi selesai: {counts['tambah']} ditambah, {counts['ubah']} diubah, "
+                        f"{counts['hapus']} dihapus")
+                    st.session_state.data_version = get_store().version
                 st.rerun()
             except Exception as e:
                 st.error(f"❌ Error: {str(e)}")
+        if 'sync_message' in st.session_state:
+            st.info(st.session_state.pop('sync_message'))
         
         # Show current data info
         st.markdown("### 📊 Info Data Saat Ini")
-        data = st.session_state.alumni_data
-        st.metric("Total Alumni", len(data))
-        st.metric("Program Studi", data['Program Studi'].nunique())
+        stats = alumni_query.statistics(snapshot)
+        st.metric("Total Alumni", stats.total)
+        st.metric("Program Studi", stats.nunique('Program Studi'))
         
         # Quick stats
-        if len(data) > 0:
+        if stats.total > 0:
+            angkatan_min, angkatan_max = stats.angkatan_range
             st.markdown("**📈 Statistik Cepat:**")
-            st.write(f"• Angkatan: {data['Angkatan'].min()}-{data['Angkatan'].max()}")
-            st.write(f"• Rata-rata Gaji: {format_currency(data['Rata-rata Gaji'].mean())}")
+            st.write(f"• Angkatan: {angkatan_min}-{angkatan_max}")
+            st.write(f"• Rata-rata Gaji: {format_currency(stats.gaji_mean)}")
             
             # Top company
-            top_company = data['Nama Perusahaan'].mode().iloc[0] if not data['Nama Perusahaan'].mode().empty else "N/A"
+            top_companies = alumni_query.company_counts(snapshot).most_common(1)
+            top_company = top_companies[0][0] if top_companies else "N/A"
             st.write(f"• Perusahaan Populer: {top_company}")
     
     # Main content
+    alumni_profiler.count(f"page.{st.session_state.current_page}")
     if st.session_state.current_page == "welcome":
-        show_welcome_page()
+        show_welcome_page(snapshot)
     elif st.session_state.current_page == "search":
-        show_search_page()
+        show_search_page(snapshot)
     elif st.session_state.current_page == "statistics":
-        show_statistics_page()
+        show_statistics_page(snapshot)
     elif st.session_state.current_page == "add_form":
-        show_add_form()
+        show_add_form(snapshot)
+    
+    if alumni_profiler.enabled() and is_admin():
+        with st.sidebar:
+            show_profiling_panel()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
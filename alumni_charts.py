@@ -0,0 +1,159 @@
+"""Plotly figures for the Statistik page, built from pre-aggregated data
+
+No figure receives raw rows: salary distributions are sent as histogram
+bins and box-plot quartiles, so the payload size does not depend on the
+number of alumni. ``SerialisedFigure`` keeps the form a figure is sent in,
+for figures cached per dataset version.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+import alumni_schema
+
+HISTOGRAM_BINS = 15
+
+
+class SerialisedFigure(go.Figure):
+    """The plain-dict form of ``figure``, computed once, as ``st.plotly_chart`` takes it
+
+    ``st.plotly_chart`` converts every figure with ``to_dict`` (a deep copy
+    of all its traces) on each rerun, and a plain dict passed instead is
+    validated all over again. Cached next to the figure for one dataset
+    version, this hands back the same dict on every rerun; Streamlit has no
+    public way to take the JSON itself, so only the encoding is repeated.
+
+    It only carries the dict: ``figure`` stays an ordinary figure, and
+    changing it later needs a new ``SerialisedFigure``. Changing this one
+    fails instead of being ignored.
+    """
+
+    def __init__(self, figure):
+        # go.Figure.__init__ is skipped: it would validate every trace again
+        self._figure = figure
+        self._dict = figure.to_dict()
+
+    @property
+    def figure(self):
+        return self._figure
+
+    def to_dict(self):
+        return self._dict
+
+
+def serialised(figures):
+    """``figures`` with every Plotly figure replaced by its ``SerialisedFigure``"""
+    return {name: SerialisedFigure(fig) if isinstance(fig, go.Figure) else fig for name, fig in figures.items()}
+
+
+def salary_histogram(gaji, bins=HISTOGRAM_BINS):
+    """Return (counts, edges) for the non-missing salaries"""
+    values = gaji[~np.isnan(gaji)]
+    if len(values) == 0:
+        return np.array([], dtype=int), np.array([], dtype=float)
+    return np.histogram(values, bins=bins)
+
+
+def salary_box_stats(data, by='Program Studi'):
+    """Quartiles and Tukey whiskers of salary per group"""
+    gaji = pd.Series(alumni_schema.numeric_array(data['Rata-rata Gaji']), index=data.index)
+    groups = data[by]
+    quartiles = gaji.groupby(groups, observed=True).quantile([0.25, 0.5, 0.75]).unstack()
+    quartiles.columns = ['q1', 'median', 'q3']
+    iqr = quartiles['q3'] - quartiles['q1']
+    low_bound = groups.map(quartiles['q1'] - 1.5 * iqr).astype(float)
+    high_bound = groups.map(quartiles['q3'] + 1.5 * iqr).astype(float)
+    quartiles['lowerfence'] = gaji.where(gaji >= low_bound).groupby(groups, observed=True).min()
+    quartiles['upperfence'] = gaji.where(gaji <= high_bound).groupby(groups, observed=True).max()
+    return quartiles.dropna(subset=['median'])
+
+
+def _horizontal_bar(values, index, title):
+    fig = px.bar(x=values, y=index, orientation='h', title=title)
+    fig.update_layout(yaxis={'categoryorder': 'total ascending'})
+    return fig
+
+
+def build_statistics_figures(data, stats, companies=None):
+    """Build every Statistik chart for one dataset version
+
+    ``companies`` counts alumni per canonical employer; without it the
+    raw company names are counted.
+    """
+    figures = {}
+
+    program_counts = stats.counts('Program Studi')
+    figures['program'] = px.pie(
+        values=program_counts.values,
+        names=program_counts.index,
+        title="Distribusi Alumni per Program Studi",
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+
+    angkatan_counts = stats.counts('Angkatan').sort_index()
+    figures['angkatan'] = px.bar(
+        x=angkatan_counts.index,
+        y=angkatan_counts.values,
+        title="Jumlah Alumni per Angkatan",
+        labels={'x': 'Angkatan', 'y': 'Jumlah Alumni'},
+        color=angkatan_counts.values,
+        color_continuous_scale='Blues'
+    )
+
+    # Salary distribution as pre-binned bars
+    gaji = alumni_schema.numeric_array(data['Rata-rata Gaji'])
+    counts, edges = salary_histogram(gaji)
+    fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges)))
+    fig.update_layout(title="Distribusi Gaji Alumni", xaxis_title='Gaji (Rp)', yaxis_title='Jumlah Alumni', bargap=0)
+    figures['gaji_histogram'] = fig
+
+    # Salary per study program as precomputed box plots
+    boxes = salary_box_stats(data)
+    fig = go.Figure(go.Box(
+        x=boxes.index.tolist(),
+        q1=boxes['q1'].tolist(),
+        median=boxes['median'].tolist(),
+        q3=boxes['q3'].tolist(),
+        lowerfence=boxes['lowerfence'].tolist(),
+        upperfence=boxes['upperfence'].tolist(),
+        boxpoints=False,
+    ))
+    fig.update_layout(title="Distribusi Gaji per Program Studi", xaxis_title='Program Studi', yaxis_title='Rata-rata Gaji')
+    figures['gaji_box'] = fig
+
+    top_companies = companies.most_common(10) if companies is not None else stats.top('Nama Perusahaan', 10)
+    companies_df = pd.DataFrame(top_companies, columns=['Perusahaan', 'Jumlah Alumni'])
+    companies_df['Persentase'] = (companies_df['Jumlah Alumni'] / max(stats.total, 1) * 100).round(1)
+    figures['companies_table'] = companies_df
+    fig = px.bar(
+        companies_df,
+        x='Jumlah Alumni',
+        y='Perusahaan',
+        orientation='h',
+        title="Top 10 Perusahaan dengan Alumni Terbanyak",
+        text='Jumlah Alumni'
+    )
+    fig.update_layout(yaxis={'categoryorder': 'total ascending'})
+    figures['companies'] = fig
+
+    peminatan_counts = stats.counts('Peminatan')
+    figures['peminatan'] = _horizontal_bar(peminatan_counts.values, peminatan_counts.index, "Distribusi Alumni per Peminatan")
+    peminatan_salary = stats.peminatan_gaji_mean()
+    figures['peminatan_gaji'] = _horizontal_bar(peminatan_salary.values, peminatan_salary.index, "Rata-rata Gaji per Peminatan")
+    return figures
+
+
+def salary_trend_figure(trends, cohort, by=None):
+    """Median salary per cohort year (one line per ``by`` group) from ``SalaryAnalytics.cohort_trends``"""
+    fig = px.line(
+        trends,
+        x=cohort,
+        y='Median',
+        color=by,
+        markers=True,
+        hover_data=['Jumlah', 'Rata-rata', 'Perubahan Median (%)'],
+        title=f"Median Gaji per {cohort}",
+    )
+    fig.update_layout(xaxis_title=cohort, yaxis_title='Median Gaji (Rp)', xaxis={'dtick': 1})
+    return fig
@@ -0,0 +1,355 @@
+"""Resolve company-name variants to one canonical employer
+
+"PT Bank Central Asia Tbk", "Bank Central Asia" and "BCA" are the same
+employer. Every company string is reduced to a key (lower case, legal
+forms such as PT/Tbk dropped) and the key is mapped to a canonical name in
+the ``alias_perusahaan`` table.
+
+A key seen before costs one primary-key lookup. A new key is compared only
+with the employers that share a block with it: a word, a character
+trigram, an acronym ("bca" for "bank central asia") or the letter prefix of
+its Id Karyawan (BC, BR, KI, ...). Very common blocks are skipped, so the
+candidate set stays small however many employers are known and no
+pairwise rescan is ever needed.
+"""
+import functools
+import itertools
+import re
+import threading
+from collections import Counter, defaultdict
+
+import pandas as pd
+
+LEGAL_FORMS = {'pt', 'tbk', 'persero', 'cv', 'ltd', 'limited', 'inc', 'corp', 'corporation', 'co', 'company',
+               'plc', 'llc'}
+# Words left out of acronyms ("Ernst and Young" -> "ey")
+CONNECTIVES = {'and', 'dan', 'of', 'the', 'de'}
+# Id Karyawan prefix of companies entered without an employee id (see alumni_db.stored_values)
+SYNTHETIC_PREFIX = 'X'
+
+NGRAM = 3
+# Blocks shared by more employers than this carry no signal and are skipped
+MAX_BLOCK = 50
+MATCH_THRESHOLD = 0.8
+ACRONYM_SCORE = 0.95
+# Alumni columns the in-memory resolution reads
+SOURCE_COLUMNS = ['Nama Perusahaan', 'Id Karyawan']
+
+TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS alias_perusahaan (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kunci TEXT NOT NULL UNIQUE,
+        nama_kanonik TEXT NOT NULL,
+        skor REAL NOT NULL,
+        prefix TEXT
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS ix_alias_perusahaan_kanonik ON alias_perusahaan(nama_kanonik)',
+]
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+PREFIX_RE = re.compile(r'[A-Za-z]+')
+
+
+@functools.lru_cache(maxsize=65536)
+def name_key(name):
+    """Normalized key of a company name ('' if nothing is left)"""
+    if name is None:
+        return ''
+    text = str(name).lower().replace('&', ' and ').replace('.', '')
+    words = [w for w in WORD_RE.findall(text) if w not in LEGAL_FORMS]
+    # "Mckinsey & Company" -> "mckinsey", not "mckinsey and"
+    while words and words[-1] in CONNECTIVES:
+        words.pop()
+    # "Boston Consulting Group (BCG)" -> "boston consulting group"
+    if len(words) > 2 and words[-1] == _initials(' '.join(words[:-1])):
+        words.pop()
+    return ' '.join(words)
+
+
+def id_prefix(id_karyawan):
+    """Letter prefix of an Id Karyawan, or None for missing/synthetic ids"""
+    if id_karyawan is None:
+        return None
+    match = PREFIX_RE.match(str(id_karyawan))
+    if match is None or match.group(0).upper() == SYNTHETIC_PREFIX:
+        return None
+    return match.group(0).upper()
+
+
+def _initials(key):
+    """Acronym of a multi-word key ("bank central asia" -> "bca"), or None for one word"""
+    words = key.split()
+    if len(words) < 2:
+        return None
+    return ''.join(w[0] for w in words if w not in CONNECTIVES)
+
+
+def _grams(key):
+    padded = f' {key} '
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+def _dice(a, b):
+    return 2 * len(a & b) / (len(a) + len(b)) if a and b else 0.0
+
+
+class _Employer:
+    __slots__ = ('name', 'words', 'grams', 'initials', 'short_names', 'prefixes')
+
+    def __init__(self, name):
+        self.name = name
+        self.words = set()
+        self.grams = set()
+        # Acronyms of its multi-word aliases, and its one-word aliases (possibly acronyms)
+        self.initials = set()
+        self.short_names = set()
+        self.prefixes = set()
+
+
+class CompanyIndex:
+    """In-memory blocking index over the known employers and their aliases"""
+
+    def __init__(self):
+        self.aliases = {}
+        self._employers = {}
+        self._blocks = defaultdict(set)
+        self.last_id = 0
+        # Rows (id, kunci, nama_kanonik, prefix) added inside a transaction not known to be committed yet,
+        # and the connection that added them
+        self.unconfirmed = []
+        self.writer = None
+
+    def add(self, key, canonical, prefix=None):
+        """Record ``key`` as an alias of ``canonical``"""
+        self.aliases[key] = canonical
+        employer = self._employers.get(canonical)
+        if employer is None:
+            employer = self._employers[canonical] = _Employer(canonical)
+        words, grams, initials = set(key.split()), _grams(key), _initials(key)
+        employer.words |= words
+        employer.grams |= grams
+        if initials is None:
+            employer.short_names.add(key)
+        else:
+            employer.initials.add(initials)
+        blocks = [('w', w) for w in words] + [('g', g) for g in grams] + [('a', initials or key)]
+        if prefix:
+            employer.prefixes.add(prefix)
+            blocks.append(('p', prefix))
+        for block in blocks:
+            self._blocks[block].add(canonical)
+
+    def _candidates(self, key, prefix):
+        # One-word keys and the initials of multi-word keys share the acronym blocks
+        blocks = [('w', w) for w in key.split()] + [('g', g) for g in _grams(key)] + [('a', _initials(key) or key)]
+        if prefix:
+            blocks.append(('p', prefix))
+        candidates = set()
+        for block in blocks:
+            members = self._blocks.get(block, ())
+            if len(members) <= MAX_BLOCK:
+                candidates.update(members)
+        return candidates
+
+    def _score(self, key, prefix, employer):
+        words, grams = set(key.split()), _grams(key)
+        score = max(_dice(grams, employer.grams),
+                    len(words & employer.words) / len(words | employer.words))
+        initials = _initials(key)
+        if initials is None:
+            acronym = key in employer.initials
+        else:
+            # A full name is compared with full names when the employer has one
+            acronym = not employer.initials and initials in employer.short_names
+        if acronym:
+            score = max(score, ACRONYM_SCORE)
+        if prefix and prefix in employer.prefixes:
+            # Same employee-id prefix: one name containing the other is enough
+            score = max(score, len(words & employer.words) / min(len(words), len(employer.words)))
+        return score
+
+    def match(self, key, prefix=None):
+        """(canonical name, score) of the best known employer for ``key``, or (None, 0.0)"""
+        if key in self.aliases:
+            return self.aliases[key], 1.0
+        best, best_score = None, 0.0
+        for canonical in self._candidates(key, prefix):
+            score = self._score(key, prefix, self._employers[canonical])
+            if score > best_score or (score == best_score and best is not None and canonical < best):
+                best, best_score = canonical, score
+        if best_score >= MATCH_THRESHOLD:
+            return best, best_score
+        return None, best_score
+
+    def resolve(self, name, id_karyawan=None):
+        """Canonical name for ``name``, registering it as a new employer if nothing matches
+
+        Returns (canonical, score); the score is 1.0 for a new employer.
+        """
+        key, prefix = name_key(name), id_prefix(id_karyawan)
+        canonical, score = self.match(key, prefix)
+        if canonical is None:
+            canonical, score = str(name).strip(), 1.0
+        self.add(key, canonical, prefix)
+        return canonical, score
+
+
+# Database-backed index, one per database file and kept in sync incrementally
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _database_path(conn):
+    return conn.execute('PRAGMA database_list').fetchone()[2]
+
+
+def _add_row(index, conn, row):
+    alias_id, key, canonical, prefix = row
+    index.add(key, canonical, prefix)
+    index.last_id = alias_id
+    if conn.in_transaction:
+        index.unconfirmed.append(tuple(row))
+        index.writer = id(conn)
+
+
+def _synced_index(conn):
+    """The shared index of this database, brought up to date with ``alias_perusahaan``
+
+    Aliases enter the index as soon as they are inserted, before their
+    transaction commits. They are checked against the table on the next
+    call: if their transaction was rolled back the index is rebuilt, and
+    once another connection (or this one outside a transaction) sees them
+    they are committed.
+    """
+    path = _database_path(conn)
+    with _indexes_lock:
+        index = _indexes.setdefault(path, CompanyIndex())
+    if index.unconfirmed:
+        rows = conn.execute('SELECT id, kunci, nama_kanonik, prefix FROM alias_perusahaan WHERE id BETWEEN ? AND ? '
+                            'ORDER BY id', [index.unconfirmed[0][0], index.last_id]).fetchall()
+        if rows != index.unconfirmed:
+            # Rolled back: the index holds aliases the table does not
+            index = _indexes[path] = CompanyIndex()
+        elif index.writer != id(conn) or not conn.in_transaction:
+            index.unconfirmed = []
+    last_id = conn.execute('SELECT IFNULL(MAX(id), 0) FROM alias_perusahaan').fetchone()[0]
+    if last_id < index.last_id:
+        # Aliases were deleted behind our back: start over
+        index = _indexes[path] = CompanyIndex()
+    for row in conn.execute(
+            'SELECT id, kunci, nama_kanonik, prefix FROM alias_perusahaan WHERE id > ? ORDER BY id', [index.last_id]):
+        _add_row(index, conn, row)
+    return index
+
+
+def _resolve_order(name, count):
+    # Most used first, then the fullest spelling, so it becomes the canonical name
+    return -count, -len(name), name
+
+
+def _count_names(companies, uses):
+    """({(key, name): uses}, {key: Counter of id prefixes}) for weighted (id_karyawan, name) pairs"""
+    counts = Counter()
+    prefixes = defaultdict(Counter)
+    for (id_karyawan, name), weight in zip(companies, uses):
+        key = name_key(name)
+        if key:
+            counts[(key, name)] += weight
+            prefix = id_prefix(id_karyawan)
+            if prefix:
+                prefixes[key][prefix] += weight
+    return counts, prefixes
+
+
+def _unresolved(counts, prefixes, known):
+    """(key, name, most common prefix) of every unknown key, in resolution order"""
+    for (key, name), _ in sorted(counts.items(), key=lambda item: _resolve_order(str(item[0][1]), item[1])):
+        if not known(key):
+            yield key, name, prefixes[key].most_common(1)[0][0] if prefixes[key] else None
+
+
+def resolve(conn, companies, uses=None):
+    """Add aliases for the (id_karyawan, nama_perusahaan) pairs not resolved yet
+
+    ``uses`` optionally weights each pair (default 1). Runs inside the
+    caller's transaction; returns the number of new aliases.
+    """
+    counts, prefixes = _count_names(companies, uses or itertools.repeat(1))
+    index = None
+    added = 0
+    for key, name, prefix in _unresolved(
+            counts, prefixes, lambda key: conn.execute('SELECT 1 FROM alias_perusahaan WHERE kunci = ?', [key]).fetchone()):
+        if index is None:
+            index = _synced_index(conn)
+        canonical, score = index.match(key, prefix)
+        if canonical is None:
+            canonical, score = str(name).strip(), 1.0
+        cursor = conn.execute('INSERT OR IGNORE INTO alias_perusahaan (kunci, nama_kanonik, skor, prefix) '
+                              'VALUES (?, ?, ?, ?)', [key, canonical, score, prefix])
+        if cursor.rowcount:
+            _add_row(index, conn, (cursor.lastrowid, key, canonical, prefix))
+        added += 1
+    return added
+
+
+def create_tables(conn):
+    """Create the alias table (before the first write that resolves names)"""
+    with conn:
+        for sql in TABLES:
+            conn.execute(sql)
+
+
+def ensure_tables(conn):
+    """Create the alias table and resolve every company name not resolved yet
+
+    The names and their alumni counts come from the summary tables, so a
+    database that is already resolved costs one small read.
+    """
+    create_tables(conn)
+    names = conn.execute('SELECT nilai, jumlah FROM ringkasan_kelompok WHERE kolom = ?', ['Nama Perusahaan']).fetchall()
+    known = {key for key, in conn.execute('SELECT kunci FROM alias_perusahaan')}
+    missing = [(name, uses) for name, uses in names if name_key(name) and name_key(name) not in known]
+    if not missing:
+        return
+    with conn:
+        ids = [conn.execute("SELECT id_karyawan FROM perusahaan WHERE nama_perusahaan = ? ORDER BY id_karyawan LIKE ? "
+                            "LIMIT 1", [name, SYNTHETIC_PREFIX + '%']).fetchone()[0] for name, _ in missing]
+        resolve(conn, [(id_karyawan, name) for id_karyawan, (name, _) in zip(ids, missing)], [uses for _, uses in missing])
+
+
+def load_aliases(conn):
+    """Mapping of name key -> canonical name for the current database"""
+    return dict(conn.execute('SELECT kunci, nama_kanonik FROM alias_perusahaan'))
+
+
+def aliases_from_frame(data):
+    """Name key -> canonical name resolved in memory (for data not backed by the database)"""
+    names = data['Nama Perusahaan'].astype(object).where(data['Nama Perusahaan'].notna(), None)
+    if 'Id Karyawan' in data:
+        prefixes = data['Id Karyawan'].astype('string').str.extract(r'^([A-Za-z]+)', expand=False)
+        prefixes = prefixes.astype(object).where(prefixes.notna(), None)
+    else:
+        prefixes = pd.Series(None, index=data.index, dtype=object)
+    # One entry per distinct (name, prefix) pair instead of one per alumnus
+    pairs = Counter(zip(prefixes, names))
+    counts, prefix_counts = _count_names(pairs, pairs.values())
+    index = CompanyIndex()
+    for key, name, prefix in _unresolved(counts, prefix_counts, index.aliases.__contains__):
+        canonical, _ = index.match(key, prefix)
+        index.add(key, canonical or str(name).strip(), prefix)
+    return index.aliases
+
+
+def canonical_name(name, aliases):
+    """Canonical employer of ``name`` (``name`` itself if it was never resolved)"""
+    return aliases.get(name_key(name), name)
+
+
+def canonical_counts(counts, aliases):
+    """Re-key per-name counts (e.g. AlumniStats.group_counts['Nama Perusahaan']) by canonical employer"""
+    result = Counter()
+    for name, count in counts.items():
+        result[canonical_name(name, aliases)] += count
+    return result
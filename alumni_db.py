@@ -0,0 +1,496 @@
+"""SQLite data-access layer for the alumni database"""
+import os
+import sqlite3
+from contextlib import closing, contextmanager
+from urllib.parse import quote
+
+import pandas as pd
+
+import alumni_company
+import alumni_fts
+import alumni_quality
+import alumni_schema
+import alumni_summary
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, 'alumni_database.db')
+EXCEL_PATH = os.path.join(BASE_DIR, 'Database_Alumni S1 Departemen Matematika FMIPA UI.xlsx')
+EXCEL_SHEET = 'Data '
+
+# Bump whenever the schema or the import rules change; older files are re-imported
+SCHEMA_VERSION = 1
+
+COLUMNS = [
+    'No', 'Nama', 'NPM', 'Program Studi', 'Angkatan', 'Peminatan', 'Judul Skripsi',
+    'Tahun Lulus', 'Pekerjaan', 'Id Karyawan', 'Nama Perusahaan', 'Alamat Perusahaan',
+    'Rata-rata Gaji'
+]
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS mahasiswa (
+    npm TEXT PRIMARY KEY,
+    nama_lengkap TEXT NOT NULL,
+    program_studi TEXT NOT NULL,
+    angkatan INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS riwayat_akademis (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    npm TEXT NOT NULL,
+    peminatan TEXT,
+    judul_skripsi TEXT,
+    tahun_lulus INTEGER,
+    FOREIGN KEY (npm) REFERENCES mahasiswa(npm)
+);
+CREATE TABLE IF NOT EXISTS perusahaan (
+    id INTEGER PRIMARY KEY,
+    id_karyawan TEXT NOT NULL UNIQUE,
+    nama_perusahaan TEXT NOT NULL,
+    alamat_perusahaan TEXT
+);
+CREATE TABLE IF NOT EXISTS karier (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    npm TEXT NOT NULL,
+    pekerjaan TEXT,
+    id_karyawan TEXT,
+    rata_rata_gaji INTEGER,
+    FOREIGN KEY (npm) REFERENCES mahasiswa(npm),
+    FOREIGN KEY (id_karyawan) REFERENCES perusahaan(id_karyawan)
+);
+-- Bumped by every write; the token tells this database file apart from others
+CREATE TABLE IF NOT EXISTS versi_data (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    token TEXT NOT NULL,
+    versi INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO versi_data (id, token, versi) VALUES (1, lower(hex(randomblob(8))), 0);
+"""
+
+INDEX_SQL = """
+CREATE UNIQUE INDEX IF NOT EXISTS ux_riwayat_akademis_npm ON riwayat_akademis(npm);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_karier_npm ON karier(npm);
+CREATE INDEX IF NOT EXISTS ix_karier_id_karyawan ON karier(id_karyawan);
+CREATE INDEX IF NOT EXISTS ix_mahasiswa_program_studi ON mahasiswa(program_studi);
+CREATE INDEX IF NOT EXISTS ix_karier_gaji ON karier(rata_rata_gaji);
+
+DROP VIEW IF EXISTS v_alumni;
+CREATE VIEW v_alumni AS
+SELECT
+    m.rowid AS "No",
+    m.nama_lengkap AS "Nama",
+    m.npm AS "NPM",
+    m.program_studi AS "Program Studi",
+    m.angkatan AS "Angkatan",
+    r.peminatan AS "Peminatan",
+    r.judul_skripsi AS "Judul Skripsi",
+    r.tahun_lulus AS "Tahun Lulus",
+    k.pekerjaan AS "Pekerjaan",
+    k.id_karyawan AS "Id Karyawan",
+    p.nama_perusahaan AS "Nama Perusahaan",
+    p.alamat_perusahaan AS "Alamat Perusahaan",
+    k.rata_rata_gaji AS "Rata-rata Gaji"
+FROM mahasiswa m
+LEFT JOIN riwayat_akademis r ON r.npm = m.npm
+LEFT JOIN karier k ON k.npm = m.npm
+LEFT JOIN perusahaan p ON p.id_karyawan = k.id_karyawan;
+"""
+
+# Per-connection tuning; mmap pages are shared between connections by the OS
+PRAGMAS = {
+    'synchronous': 'NORMAL',  # durable enough with WAL, no fsync per commit
+    'cache_size': -8000,  # KiB
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON',
+}
+# Prepared statements kept per connection (keyed by SQL text)
+STATEMENT_CACHE_SIZE = 256
+
+# Search filters that can be pushed down into the WHERE clause of v_alumni,
+# matched as alumni_search.SearchIndex matches them: text anywhere, NPM from its start
+LIKE_FILTERS = {
+    'nama': '"Nama"',
+    'pekerjaan': '"Pekerjaan"',
+    'perusahaan': '"Nama Perusahaan"',
+}
+PREFIX_FILTERS = {
+    'npm': '"NPM"',
+}
+
+
+def connect(path=DB_PATH, readonly=False, check_same_thread=True):
+    """Open a tuned connection to the alumni database
+
+    Read-only connections are opened with ``mode=ro`` and cannot write even
+    by accident. Pass ``check_same_thread=False`` only when access is
+    serialized elsewhere (e.g. by a connection pool).
+    """
+    if readonly:
+        target, uri = f'file:{quote(os.path.abspath(path))}?mode=ro', True
+    else:
+        target, uri = path, False
+    conn = sqlite3.connect(target, uri=uri, check_same_thread=check_same_thread,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+    for pragma, value in PRAGMAS.items():
+        conn.execute(f'PRAGMA {pragma} = {value}')
+    alumni_fts.register(conn)
+    return conn
+
+
+def init_database(path=DB_PATH, excel_path=EXCEL_PATH):
+    """Create the schema and run the one-time Excel import when needed"""
+    with closing(connect(path)) as conn:
+        # Readers keep working while the writer commits; the mode is stored in the file
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.executescript(SCHEMA_SQL)
+        _add_company_ids(conn)
+        alumni_company.create_tables(conn)
+        alumni_quality.create_tables(conn)
+        # alumni_sync builds on this module, so it cannot be imported at the top
+        import alumni_sync
+        alumni_sync.create_tables(conn)
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version < SCHEMA_VERSION and excel_path and os.path.exists(excel_path):
+            import_excel(conn, excel_path)
+        conn.executescript(INDEX_SQL)
+        alumni_fts.ensure_index(conn)
+        alumni_summary.ensure_tables(conn)
+        # Reads the company names from the summary tables
+        alumni_company.ensure_tables(conn)
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    return path
+
+
+def _add_company_ids(conn):
+    """Give perusahaan of older files its ``id`` column, keeping every row's rowid
+
+    The address index refers to companies by that id. Without an INTEGER
+    PRIMARY KEY the rowid is implicit and VACUUM may renumber it. The
+    triggers on perusahaan go with the old table; the FTS and summary
+    setup in ``init_database`` creates them again.
+    """
+    if 'id' in [row[1] for row in conn.execute('PRAGMA table_info(perusahaan)')]:
+        return
+    conn.executescript("""
+        PRAGMA foreign_keys = OFF;
+        PRAGMA legacy_alter_table = ON;
+        BEGIN;
+        CREATE TABLE perusahaan_baru (
+            id INTEGER PRIMARY KEY,
+            id_karyawan TEXT NOT NULL UNIQUE,
+            nama_perusahaan TEXT NOT NULL,
+            alamat_perusahaan TEXT
+        );
+        INSERT INTO perusahaan_baru (id, id_karyawan, nama_perusahaan, alamat_perusahaan)
+        SELECT rowid, id_karyawan, nama_perusahaan, alamat_perusahaan FROM perusahaan;
+        DROP TABLE perusahaan;
+        ALTER TABLE perusahaan_baru RENAME TO perusahaan;
+        COMMIT;
+        PRAGMA legacy_alter_table = OFF;
+        PRAGMA foreign_keys = ON;
+    """)
+
+
+def normalize_npm(value):
+    """Return NPM as a plain digit string (Excel stores it as a float)"""
+    if value is None or pd.isna(value):
+        return None
+    text = str(value).strip()
+    if text.endswith('.0'):
+        text = text[:-2]
+    return text or None
+
+
+def clean_alumni_frame(df):
+    """Apply the dtype coercion and cleaning rules used for every data source"""
+    df = df.copy()
+    df['NPM'] = df['NPM'].map(normalize_npm)
+    df = alumni_schema.apply_schema(df)
+
+    # Remove any rows with missing critical data
+    df = df.dropna(subset=['Nama', 'NPM'])
+    return df
+
+
+def read_excel(path=EXCEL_PATH):
+    """Read and clean the 'Data ' sheet of the alumni workbook"""
+    df = pd.read_excel(path, sheet_name=EXCEL_SHEET)
+    return clean_alumni_frame(df)
+
+
+def import_excel(conn, path=EXCEL_PATH):
+    """Replace the database contents with the workbook rows that pass the quality checks"""
+    raw = pd.read_excel(path, sheet_name=EXCEL_SHEET)
+    quality = alumni_quality.QualityScanner(source=os.path.basename(path))
+    return import_frame(conn, quality.check(raw, clean_alumni_frame(raw)), replace=True, quality=quality)
+
+
+def _int_column(df, col):
+    """Column as Python ints with None for missing/unparseable values"""
+    values = pd.to_numeric(df[col], errors='coerce') if col in df else pd.Series(index=df.index, dtype=float)
+    values = values.round().astype('Int64').astype(object)
+    return values.where(values.notna(), None)
+
+
+def _text_column(df, col):
+    """Column as stripped strings with None for missing/empty values"""
+    if col not in df:
+        return pd.Series(None, index=df.index, dtype=object)
+    values = df[col].astype('string').str.strip()
+    values = values.mask(values == '').astype(object)
+    return values.where(values.notna(), None)
+
+
+def stored_values(df):
+    """Alumni records as ``v_alumni`` would return them once written (without "No")
+
+    Values are Python objects (str, int or None), as read from SQLite.
+    """
+    npm = df['NPM'].map(normalize_npm).astype(object)
+    angkatan = _int_column(df, 'Angkatan')
+    # UI NPMs start with the two-digit intake year
+    intake = pd.to_numeric(npm.str[:2], errors='coerce').add(2000).fillna(0).astype(int)
+    angkatan = angkatan.where(angkatan.notna(), intake)
+    nama_perusahaan = _text_column(df, 'Nama Perusahaan')
+    id_karyawan = _text_column(df, 'Id Karyawan')
+    # perusahaan is keyed by employee id; keep the company even without one
+    synthetic = id_karyawan.isna() & nama_perusahaan.notna()
+    id_karyawan = id_karyawan.where(~synthetic, 'X' + npm)
+    has_company = id_karyawan.notna()
+    program_studi = _text_column(df, 'Program Studi')
+    return pd.DataFrame({
+        'Nama': _text_column(df, 'Nama'),
+        'NPM': npm,
+        'Program Studi': program_studi.where(program_studi.notna(), ''),
+        'Angkatan': angkatan,
+        'Peminatan': _text_column(df, 'Peminatan'),
+        'Judul Skripsi': _text_column(df, 'Judul Skripsi'),
+        'Tahun Lulus': _int_column(df, 'Tahun Lulus'),
+        'Pekerjaan': _text_column(df, 'Pekerjaan'),
+        'Id Karyawan': id_karyawan,
+        'Nama Perusahaan': nama_perusahaan.where(nama_perusahaan.notna() | ~has_company, ''),
+        'Alamat Perusahaan': _text_column(df, 'Alamat Perusahaan').where(has_company, None),
+        'Rata-rata Gaji': _int_column(df, 'Rata-rata Gaji'),
+    }, index=df.index, dtype=object)
+
+
+def _table_rows(df):
+    """Split alumni records into row tuples for the four normalized tables"""
+    v = stored_values(df)
+    mahasiswa = list(zip(v['NPM'], v['Nama'], v['Program Studi'], v['Angkatan']))
+    riwayat = list(zip(v['NPM'], v['Peminatan'], v['Judul Skripsi'], v['Tahun Lulus']))
+    has_company = v['Id Karyawan'].notna()
+    perusahaan = list(zip(v['Id Karyawan'][has_company], v['Nama Perusahaan'][has_company],
+                          v['Alamat Perusahaan'][has_company]))
+    karier = list(zip(v['NPM'], v['Pekerjaan'], v['Id Karyawan'], v['Rata-rata Gaji']))
+    return mahasiswa, riwayat, perusahaan, karier
+
+
+INSERT_SQL = {
+    'mahasiswa': 'INSERT INTO mahasiswa (npm, nama_lengkap, program_studi, angkatan) VALUES (?, ?, ?, ?)',
+    'riwayat_akademis': 'INSERT INTO riwayat_akademis (npm, peminatan, judul_skripsi, tahun_lulus) VALUES (?, ?, ?, ?)',
+    'perusahaan': 'INSERT INTO perusahaan (id_karyawan, nama_perusahaan, alamat_perusahaan) VALUES (?, ?, ?)',
+    'karier': 'INSERT INTO karier (npm, pekerjaan, id_karyawan, rata_rata_gaji) VALUES (?, ?, ?, ?)',
+}
+
+UPSERT_SQL = {
+    'mahasiswa': INSERT_SQL['mahasiswa'] + ' ON CONFLICT(npm) DO UPDATE SET '
+                 'nama_lengkap = excluded.nama_lengkap, program_studi = excluded.program_studi, '
+                 'angkatan = excluded.angkatan',
+    'riwayat_akademis': INSERT_SQL['riwayat_akademis'] + ' ON CONFLICT(npm) DO UPDATE SET '
+                        'peminatan = excluded.peminatan, judul_skripsi = excluded.judul_skripsi, '
+                        'tahun_lulus = excluded.tahun_lulus',
+    'perusahaan': INSERT_SQL['perusahaan'] + ' ON CONFLICT(id_karyawan) DO UPDATE SET '
+                  'nama_perusahaan = excluded.nama_perusahaan, alamat_perusahaan = excluded.alamat_perusahaan',
+    'karier': INSERT_SQL['karier'] + ' ON CONFLICT(npm) DO UPDATE SET '
+              'pekerjaan = excluded.pekerjaan, id_karyawan = excluded.id_karyawan, '
+              'rata_rata_gaji = excluded.rata_rata_gaji',
+}
+
+
+def data_version(conn):
+    """Key of the current database contents ('<token>-v<n>'); changes with every write"""
+    return conn.execute("SELECT token || '-v' || versi FROM versi_data").fetchone()[0]
+
+
+def _bump_data_version(conn):
+    conn.execute('UPDATE versi_data SET versi = versi + 1')
+
+
+@contextmanager
+def read_transaction(conn):
+    """Run several reads against one consistent state of the database
+
+    Joins a transaction that is already open; otherwise opens one and
+    ends it afterwards.
+    """
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute('BEGIN')
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+
+
+def clear_tables(conn):
+    """Delete all alumni rows (children first); the caller owns the transaction"""
+    for table in ['karier', 'riwayat_akademis', 'perusahaan', 'mahasiswa']:
+        conn.execute(f'DELETE FROM {table}')
+    _bump_data_version(conn)
+
+
+def write_frame(conn, df, upsert=False):
+    """Write a cleaned alumni frame to the four tables; the caller owns the transaction"""
+    mahasiswa, riwayat, perusahaan, karier = _table_rows(df)
+    sql = UPSERT_SQL if upsert else INSERT_SQL
+    # Companies are a lookup table and are always upserted
+    conn.executemany(UPSERT_SQL['perusahaan'], perusahaan)
+    alumni_company.resolve(conn, [(id_karyawan, nama) for id_karyawan, nama, _ in perusahaan])
+    conn.executemany(sql['mahasiswa'], mahasiswa)
+    conn.executemany(sql['riwayat_akademis'], riwayat)
+    conn.executemany(sql['karier'], karier)
+    _bump_data_version(conn)
+    return len(mahasiswa)
+
+
+def delete_alumni(conn, npms):
+    """Delete the alumni with these NPMs (and companies no one works at any more); the caller owns the transaction
+
+    Returns the number of alumni deleted.
+    """
+    deleted = 0
+    for batch in _in_batches(npms):
+        placeholders = ', '.join('?' * len(batch))
+        employers = [row[0] for row in conn.execute(
+            f'SELECT DISTINCT id_karyawan FROM karier WHERE npm IN ({placeholders}) AND id_karyawan IS NOT NULL', batch)]
+        for table in ['karier', 'riwayat_akademis']:
+            conn.execute(f'DELETE FROM {table} WHERE npm IN ({placeholders})', batch)
+        deleted += conn.execute(f'DELETE FROM mahasiswa WHERE npm IN ({placeholders})', batch).rowcount
+        for companies in _in_batches(employers):
+            conn.execute(
+                f'DELETE FROM perusahaan WHERE id_karyawan IN ({", ".join("?" * len(companies))}) '
+                'AND NOT EXISTS (SELECT 1 FROM karier k WHERE k.id_karyawan = perusahaan.id_karyawan)', companies)
+    _bump_data_version(conn)
+    return deleted
+
+
+@contextmanager
+def bulk_load(conn):
+    """Suspend the per-row full-text and summary triggers; both are rebuilt once at the end"""
+    with alumni_fts.bulk_load(conn), alumni_summary.bulk_load(conn):
+        yield
+
+
+def import_frame(conn, df, replace=False, quality=None):
+    """Insert a cleaned alumni frame into the normalized tables in one transaction
+
+    The rows quarantined by ``quality`` (an ``alumni_quality.QualityScanner``)
+    are stored in the same transaction.
+    """
+    with conn:
+        if quality is not None:
+            quality.save(conn)
+        if not replace:
+            return write_frame(conn, df)
+        with bulk_load(conn):
+            clear_tables(conn)
+            return write_frame(conn, df)
+
+
+def insert_alumni(conn, record):
+    """Insert a single alumni record (as entered in the add form)"""
+    return import_frame(conn, pd.DataFrame([record]))
+
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def build_where(filters):
+    """Translate search filters into a WHERE clause and its parameters"""
+    clauses, params = [], []
+    filters = filters or {}
+    for key, column in LIKE_FILTERS.items():
+        value = filters.get(key)
+        if value:
+            clauses.append(f"{column} LIKE ? ESCAPE '\\'")
+            params.append(f'%{_escape_like(value)}%')
+    for key, column in PREFIX_FILTERS.items():
+        value = filters.get(key)
+        if value:
+            clauses.append(f"{column} LIKE ? ESCAPE '\\'")
+            params.append(f'{_escape_like(value)}%')
+    if filters.get('program_studi'):
+        clauses.append('"Program Studi" = ?')
+        params.append(filters['program_studi'])
+    if filters.get('gaji_min'):
+        clauses.append('"Rata-rata Gaji" >= ?')
+        params.append(filters['gaji_min'])
+    if filters.get('gaji_max'):
+        clauses.append('"Rata-rata Gaji" <= ?')
+        params.append(filters['gaji_max'])
+    where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+    return where, params
+
+
+def fetch_alumni(conn, filters=None):
+    """Return the joined alumni view, optionally filtered in SQL"""
+    where, params = build_where(filters)
+    df = pd.read_sql_query(f'SELECT * FROM v_alumni{where} ORDER BY "No"', conn, params=params)
+    return alumni_schema.apply_schema(df)
+
+
+def fetch_alumni_by_npm(conn, npm):
+    """Return the joined row(s) for one NPM"""
+    df = pd.read_sql_query('SELECT * FROM v_alumni WHERE "NPM" = ?', conn, params=[npm])
+    return alumni_schema.apply_schema(df)
+
+
+def _in_batches(values, size=500):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def fetch_alumni_by_npms(conn, npms):
+    """Return the joined rows for several NPMs in "No" order"""
+    frames = []
+    for batch in _in_batches(dict.fromkeys(npms)):
+        placeholders = ', '.join('?' * len(batch))
+        frames.append(pd.read_sql_query(f'SELECT * FROM v_alumni WHERE "NPM" IN ({placeholders})', conn, params=batch))
+    if not frames:
+        return fetch_alumni_by_npm(conn, None)
+    return alumni_schema.apply_schema(pd.concat(frames, ignore_index=True).sort_values('No', ignore_index=True))
+
+
+def fetch_stored(conn, npms):
+    """The stored values (see ``stored_values``) of the alumni with these NPMs, indexed by NPM"""
+    columns = [col for col in COLUMNS if col != 'No']
+    select = ', '.join(f'"{col}"' for col in columns)
+    rows = []
+    for batch in _in_batches(dict.fromkeys(npms)):
+        placeholders = ', '.join('?' * len(batch))
+        rows.extend(conn.execute(f'SELECT {select} FROM v_alumni WHERE "NPM" IN ({placeholders})', batch))
+    frame = pd.DataFrame(rows, columns=columns, dtype=object)
+    return frame.set_index(frame['NPM'].rename(None))
+
+
+def existing_npms(conn, npms):
+    """The subset of ``npms`` already present in mahasiswa"""
+    found = set()
+    for batch in _in_batches(dict.fromkeys(npms)):
+        placeholders = ', '.join('?' * len(batch))
+        found.update(row[0] for row in conn.execute(f'SELECT npm FROM mahasiswa WHERE npm IN ({placeholders})', batch))
+    return found
+
+
+def count_alumni(conn):
+    """Return the number of alumni in the database"""
+    return conn.execute('SELECT COUNT(*) FROM mahasiswa').fetchone()[0]
+
+
+def fetch_program_studi(conn):
+    """Return the distinct study programs"""
+    rows = conn.execute('SELECT DISTINCT program_studi FROM mahasiswa ORDER BY program_studi').fetchall()
+    return [r[0] for r in rows if r[0]]
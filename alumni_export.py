@@ -0,0 +1,136 @@
+"""CSV and Excel export of the alumni dataset with bounded memory
+
+Rows are written to a temporary file in fixed-size chunks taken straight
+from the shared snapshot. Finished files are cached per dataset version
+and row selection, so downloading the same data again costs nothing.
+"""
+import csv
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import alumni_db
+import alumni_profiler
+
+try:
+    import xlsxwriter
+except ImportError:  # openpyxl's write-only mode is used instead
+    xlsxwriter = None
+
+CHUNK_ROWS = 10000
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), 'alumni_exports')
+MIME_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def iter_chunks(data, rows=None, chunk_rows=CHUNK_ROWS):
+    """Yield consecutive row chunks of ``data`` (optionally only ``rows``)"""
+    columns = [col for col in alumni_db.COLUMNS if col in data.columns]
+    total = len(data) if rows is None else len(rows)
+    for start in range(0, total, chunk_rows):
+        if rows is None:
+            yield data.iloc[start:start + chunk_rows][columns]
+        else:
+            yield data.iloc[rows[start:start + chunk_rows]][columns]
+
+
+def _records(chunk):
+    """Plain Python values for one chunk, None for missing"""
+    values = chunk.astype(object).where(chunk.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def write_csv(path, chunks):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        header = True
+        for chunk in chunks:
+            chunk.to_csv(f, header=header, index=False, quoting=csv.QUOTE_MINIMAL)
+            header = False
+
+
+def write_xlsx(path, chunks, sheet_name=alumni_db.EXCEL_SHEET):
+    """Write the chunks to one sheet using a streaming (row-at-a-time) writer"""
+    if xlsxwriter is not None:
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'nan_inf_to_errors': True})
+        sheet = workbook.add_worksheet(sheet_name)
+        row_index = 0
+        for chunk in chunks:
+            if row_index == 0:
+                sheet.write_row(0, 0, list(chunk.columns))
+                row_index = 1
+            for record in _records(chunk):
+                sheet.write_row(row_index, 0, record)
+                row_index += 1
+        workbook.close()
+        return
+
+    import openpyxl
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    header = True
+    for chunk in chunks:
+        if header:
+            sheet.append(list(chunk.columns))
+            header = False
+        for record in _records(chunk):
+            sheet.append(record)
+    workbook.save(path)
+
+
+WRITERS = {'csv': write_csv, 'xlsx': write_xlsx}
+
+
+def selection_key(rows):
+    """Stable key for a row selection (None means all rows)"""
+    if rows is None:
+        return 'all'
+    return hashlib.blake2b(np.ascontiguousarray(rows, dtype=np.int64).tobytes(), digest_size=12).hexdigest()
+
+
+class ExportCache:
+    """Keeps the most recent export files, keyed by data version, format and selection"""
+
+    def __init__(self, max_files=16, directory=EXPORT_DIR):
+        self.max_files = max_files
+        self.directory = directory
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, snapshot, fmt, rows=None):
+        """Return the path of an export of ``snapshot`` (building it on a miss)
+
+        Files are keyed by the persistent data version, so a snapshot
+        published again by a new store never gets a file of other data;
+        snapshots not read from a database fall back to their local version.
+        """
+        version = snapshot.key or f'lokal-{snapshot.version}'
+        key = (version, fmt, selection_key(rows))
+        with self._lock:
+            path = self._files.get(key)
+            if path is not None and os.path.exists(path):
+                self._files.move_to_end(key)
+                alumni_profiler.cache_event('export', True)
+                return path
+            alumni_profiler.cache_event('export', False)
+
+            os.makedirs(self.directory, exist_ok=True)
+            fd, path = tempfile.mkstemp(suffix=f'.{fmt}', dir=self.directory)
+            os.close(fd)
+            try:
+                with alumni_profiler.timed(f'export.{fmt}'):
+                    WRITERS[fmt](path, iter_chunks(snapshot.data, rows))
+            except Exception:
+                os.remove(path)
+                raise
+            self._files[key] = path
+            while len(self._files) > self.max_files:
+                _, old_path = self._files.popitem(last=False)
+                if os.path.exists(old_path):
+                    os.remove(old_path)
+            return path
@@ -0,0 +1,227 @@
+"""Ranked full-text search over thesis titles and company addresses
+
+Two FTS5 tables mirror ``riwayat_akademis.judul_skripsi`` and
+``perusahaan.alamat_perusahaan``, keyed by the ``id`` of their row. Each row is indexed twice: the original
+words (for exact and prefix matches) and their Indonesian root words, so a
+query for "peramalan" also finds "meramalkan". Triggers keep both tables in
+step with every insert, upsert and delete; they call the ``stem_id`` SQL
+function that ``alumni_db.connect`` registers on each connection.
+"""
+import functools
+import re
+from contextlib import contextmanager
+
+import pandas as pd
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+QUERY_TERM_RE = re.compile(r'\w+\*?', re.UNICODE)
+
+# Light Indonesian affix stripping (particles, possessives, suffixes, prefixes)
+PARTICLES = ('lah', 'kah', 'tah', 'pun')
+POSSESSIVES = ('nya', 'ku', 'mu')
+SUFFIXES = ('kan', 'an', 'i')
+VOWELS = 'aiueo'
+MIN_ROOT = 4
+
+TABLES = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS judul_fts USING fts5(text, stem, tokenize = 'unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS alamat_fts USING fts5(text, stem, tokenize = 'unicode61 remove_diacritics 2')",
+]
+
+TRIGGERS = {
+    'trg_judul_fts_insert': """
+        CREATE TRIGGER IF NOT EXISTS trg_judul_fts_insert AFTER INSERT ON riwayat_akademis
+        WHEN new.judul_skripsi IS NOT NULL BEGIN
+            INSERT INTO judul_fts (rowid, text, stem) VALUES (new.id, new.judul_skripsi, stem_id(new.judul_skripsi));
+        END
+    """,
+    'trg_judul_fts_delete': """
+        CREATE TRIGGER IF NOT EXISTS trg_judul_fts_delete AFTER DELETE ON riwayat_akademis BEGIN
+            DELETE FROM judul_fts WHERE rowid = old.id;
+        END
+    """,
+    'trg_judul_fts_update': """
+        CREATE TRIGGER IF NOT EXISTS trg_judul_fts_update AFTER UPDATE OF judul_skripsi ON riwayat_akademis
+        WHEN old.judul_skripsi IS NOT new.judul_skripsi BEGIN
+            DELETE FROM judul_fts WHERE rowid = old.id;
+            INSERT INTO judul_fts (rowid, text, stem)
+            SELECT new.id, new.judul_skripsi, stem_id(new.judul_skripsi) WHERE new.judul_skripsi IS NOT NULL;
+        END
+    """,
+    'trg_alamat_fts_insert': """
+        CREATE TRIGGER IF NOT EXISTS trg_alamat_fts_insert AFTER INSERT ON perusahaan
+        WHEN new.alamat_perusahaan IS NOT NULL BEGIN
+            INSERT INTO alamat_fts (rowid, text, stem)
+            VALUES (new.id, new.alamat_perusahaan, stem_id(new.alamat_perusahaan));
+        END
+    """,
+    'trg_alamat_fts_delete': """
+        CREATE TRIGGER IF NOT EXISTS trg_alamat_fts_delete AFTER DELETE ON perusahaan BEGIN
+            DELETE FROM alamat_fts WHERE rowid = old.id;
+        END
+    """,
+    'trg_alamat_fts_update': """
+        CREATE TRIGGER IF NOT EXISTS trg_alamat_fts_update AFTER UPDATE OF alamat_perusahaan ON perusahaan
+        WHEN old.alamat_perusahaan IS NOT new.alamat_perusahaan BEGIN
+            DELETE FROM alamat_fts WHERE rowid = old.id;
+            INSERT INTO alamat_fts (rowid, text, stem)
+            SELECT new.id, new.alamat_perusahaan, stem_id(new.alamat_perusahaan) WHERE new.alamat_perusahaan IS NOT NULL;
+        END
+    """,
+}
+
+REBUILD = [
+    'DELETE FROM judul_fts',
+    'INSERT INTO judul_fts (rowid, text, stem) '
+    'SELECT id, judul_skripsi, stem_id(judul_skripsi) FROM riwayat_akademis WHERE judul_skripsi IS NOT NULL',
+    'DELETE FROM alamat_fts',
+    'INSERT INTO alamat_fts (rowid, text, stem) '
+    'SELECT id, alamat_perusahaan, stem_id(alamat_perusahaan) FROM perusahaan WHERE alamat_perusahaan IS NOT NULL',
+]
+
+# Per source: SQL returning the best (npm, bm25, snippet) rows for one MATCH
+# expression. Ordering by FTS5's own rank lets it stop after LIMIT rows, so
+# snippets are only built for rows that are returned. bm25 weights are per
+# FTS column: original words count more than roots.
+SOURCES = {
+    'judul': """
+        SELECT r.npm, rank, snippet(judul_fts, 0, '«', '»', '…', 16)
+        FROM judul_fts JOIN riwayat_akademis r ON r.id = judul_fts.rowid
+        WHERE judul_fts MATCH ? AND rank MATCH 'bm25(1.0, 0.6)'
+        ORDER BY rank LIMIT ?
+    """,
+    'alamat': """
+        SELECT k.npm, rank, snippet(alamat_fts, 0, '«', '»', '…', 16)
+        FROM alamat_fts
+        JOIN perusahaan p ON p.id = alamat_fts.rowid
+        JOIN karier k ON k.id_karyawan = p.id_karyawan
+        WHERE alamat_fts MATCH ? AND rank MATCH 'bm25(1.0, 0.6)'
+        ORDER BY rank LIMIT ?
+    """,
+}
+SOURCE_LABELS = {'judul': 'Judul Skripsi', 'alamat': 'Alamat Perusahaan'}
+
+
+def _strip_prefix(word):
+    if word.startswith(('meny', 'peny')) and len(word) > 5 and word[4] in VOWELS:
+        return 's' + word[4:]
+    for prefix in ('meng', 'peng'):
+        if word.startswith(prefix) and len(word) - len(prefix) >= MIN_ROOT:
+            return word[len(prefix):]
+    for prefix, recoded in (('mem', 'p'), ('pem', 'p'), ('men', 't'), ('pen', 't')):
+        if word.startswith(prefix) and len(word) - len(prefix) >= MIN_ROOT:
+            rest = word[len(prefix):]
+            return recoded + rest if rest[0] in VOWELS else rest
+    for prefix in ('ber', 'ter', 'per', 'me', 'pe', 'di', 'ke', 'se'):
+        if word.startswith(prefix) and len(word) - len(prefix) >= MIN_ROOT:
+            if prefix == 'per' and word[3] in VOWELS:
+                # pe- before a root starting with r (peramal -> ramal)
+                return word[2:]
+            return word[len(prefix):]
+    return word
+
+
+@functools.lru_cache(maxsize=65536)
+def stem(word):
+    """Root of one lower-case Indonesian word (best effort, never shorter than 4 letters)"""
+    if len(word) <= 4 or not word.isalpha():
+        return word
+    for group in (PARTICLES, POSSESSIVES, SUFFIXES):
+        for suffix in group:
+            if word.endswith(suffix) and len(word) - len(suffix) >= MIN_ROOT + 1:
+                word = word[:-len(suffix)]
+                break
+    return _strip_prefix(word)
+
+
+def stem_text(text):
+    """Space-separated roots of every word in ``text`` (the ``stem_id`` SQL function)"""
+    if text is None:
+        return None
+    return ' '.join(stem(word) for word in WORD_RE.findall(str(text).lower()))
+
+
+def register(conn):
+    """Make ``stem_id`` available to the FTS triggers on this connection"""
+    conn.create_function('stem_id', 1, stem_text, deterministic=True)
+
+
+def _create(conn):
+    for sql in TABLES + list(TRIGGERS.values()):
+        conn.execute(sql)
+
+
+def rebuild(conn):
+    """Re-index every title and address; the caller owns the transaction"""
+    for sql in REBUILD:
+        conn.execute(sql)
+
+
+def ensure_index(conn):
+    """Create the FTS tables and triggers, rebuilding them if they are out of step"""
+    with conn:
+        _create(conn)
+    indexed = conn.execute('SELECT (SELECT COUNT(*) FROM judul_fts) + (SELECT COUNT(*) FROM alamat_fts)').fetchone()[0]
+    expected = conn.execute(
+        'SELECT (SELECT COUNT(*) FROM riwayat_akademis WHERE judul_skripsi IS NOT NULL)'
+        ' + (SELECT COUNT(*) FROM perusahaan WHERE alamat_perusahaan IS NOT NULL)'
+    ).fetchone()[0]
+    if indexed != expected:
+        with conn:
+            rebuild(conn)
+
+
+@contextmanager
+def bulk_load(conn):
+    """Suspend per-row index maintenance for a bulk write and re-index once at the end
+
+    Must run inside the caller's transaction: if the write fails, the
+    rollback restores the dropped triggers together with the old rows.
+    """
+    if not conn.in_transaction:
+        # sqlite3 does not open a transaction for DDL on its own
+        conn.execute('BEGIN')
+    for name in TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+    yield
+    _create(conn)
+    rebuild(conn)
+
+
+def build_match(query):
+    """FTS5 MATCH expression for a user query, or None if it has no words
+
+    Every word must match, either as written or by its root; a trailing
+    ``*`` turns a word into a prefix query.
+    """
+    terms = []
+    for term in QUERY_TERM_RE.findall(query.lower()):
+        if term.endswith('*'):
+            terms.append(f'text : "{term[:-1]}"*')
+        else:
+            terms.append(f'(text : "{term}" OR stem : "{stem(term)}")')
+    return ' AND '.join(terms) or None
+
+
+def search(conn, query, sources=('judul', 'alamat'), limit=100):
+    """Rank alumni by BM25 relevance of their thesis title and/or company address
+
+    Returns NPM, score (higher is better), the best-matching source and
+    a snippet with the matched words between « and ».
+    """
+    columns = ['NPM', 'Skor', 'Sumber', 'Cuplikan']
+    match = build_match(query)
+    if match is None:
+        return pd.DataFrame(columns=columns)
+    hits = []
+    for source in sources:
+        for npm, rank, snippet in conn.execute(SOURCES[source], [match, limit]):
+            hits.append((npm, -rank, SOURCE_LABELS[source], snippet))
+    if not hits:
+        return pd.DataFrame(columns=columns)
+    hits = pd.DataFrame(hits, columns=columns)
+    # An alumnus matching in both sources gets the sum of the scores
+    best = hits.sort_values('Skor', ascending=False).drop_duplicates('NPM').set_index('NPM')
+    best['Skor'] = hits.groupby('NPM')['Skor'].sum()
+    best = best.sort_values('Skor', ascending=False).head(limit).reset_index()
+    return best[columns]
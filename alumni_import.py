@@ -0,0 +1,95 @@
+"""Streaming import of uploaded Excel/CSV files into the alumni database
+
+Uploads are read in fixed-size chunks (openpyxl read-only rows or chunked
+CSV parsing), cleaned with the same rules as the workbook loader and
+upserted batch by batch inside a single transaction, so peak memory is
+bounded by the chunk size rather than the file size. An optional
+``alumni_quality.QualityScanner`` keeps bad and duplicate rows out and
+records them in the same transaction.
+"""
+from contextlib import nullcontext
+
+import openpyxl
+import pandas as pd
+
+import alumni_db
+
+CHUNK_SIZE = 5000
+REQUIRED_COLUMNS = ['Nama', 'NPM']
+
+
+class UploadError(ValueError):
+    """The uploaded file does not look like an alumni sheet"""
+
+
+def iter_excel_chunks(source, chunk_size=CHUNK_SIZE, sheet_name=alumni_db.EXCEL_SHEET):
+    """Yield (chunk, fraction done) from the given worksheet"""
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        if sheet_name not in workbook.sheetnames:
+            raise UploadError(f"Sheet '{sheet_name}' tidak ditemukan")
+        sheet = workbook[sheet_name]
+        total = max((sheet.max_row or 0) - 1, 1)
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else '' for h in next(rows, ())]
+        # Cells without a header (e.g. formatted but unused columns) are not part of the data
+        keep = [i for i, name in enumerate(header) if name]
+        batch, done = [], 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                done += len(batch)
+                yield pd.DataFrame(batch, columns=header).iloc[:, keep], min(done / total, 1.0)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header).iloc[:, keep], 1.0
+    finally:
+        workbook.close()
+
+
+def iter_csv_chunks(source, chunk_size=CHUNK_SIZE, size=None):
+    """Yield (chunk, fraction done) from a CSV file object"""
+    reader = pd.read_csv(source, chunksize=chunk_size, dtype={'NPM': str})
+    for chunk in reader:
+        chunk.columns = [str(c).strip() for c in chunk.columns]
+        fraction = min(source.tell() / size, 1.0) if size else None
+        yield chunk, fraction
+
+
+def iter_upload_chunks(uploaded_file, chunk_size=CHUNK_SIZE):
+    """Pick the chunk reader matching the uploaded file's extension"""
+    if uploaded_file.name.endswith('.xlsx'):
+        return iter_excel_chunks(uploaded_file, chunk_size)
+    return iter_csv_chunks(uploaded_file, chunk_size, getattr(uploaded_file, 'size', None))
+
+
+def coerce_chunk(chunk):
+    """Check the columns of one chunk and apply the loader's dtype rules"""
+    missing = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+    if missing:
+        raise UploadError(f"Kolom wajib tidak ditemukan: {', '.join(missing)}")
+    chunk = chunk.reindex(columns=alumni_db.COLUMNS)
+    return alumni_db.clean_alumni_frame(chunk.dropna(how='all'))
+
+
+def import_chunks(conn, chunks, replace=False, progress=None, quality=None):
+    """Upsert every chunk inside one transaction; return the number of rows written
+
+    Nothing is committed if any chunk fails, so a bad file never leaves
+    the database half-imported.
+    """
+    written = 0
+    # A full replace re-indexes the full-text and summary tables once instead of per row
+    with conn, alumni_db.bulk_load(conn) if replace else nullcontext():
+        if replace:
+            alumni_db.clear_tables(conn)
+        for chunk, fraction in chunks:
+            frame = coerce_chunk(chunk)
+            if quality is not None:
+                frame = quality.check(chunk, frame)
+            written += alumni_db.write_frame(conn, frame, upsert=True)
+            if progress is not None:
+                progress(written, fraction)
+        if quality is not None:
+            quality.save(conn)
+    return written
@@ -0,0 +1,59 @@
+"""Thread-safe pool of SQLite connections to the alumni database
+
+Streamlit runs every session's reruns on its own thread; instead of each
+rerun opening a connection (and re-preparing the same SQL), connections
+are borrowed from a pool. Each pooled connection keeps its own prepared
+statement cache, so repeated search, detail and aggregate queries skip
+parsing and planning after their first run.
+"""
+import queue
+import threading
+from contextlib import contextmanager
+
+import alumni_db
+import alumni_profiler
+
+DEFAULT_SIZE = 8
+
+
+class ConnectionPool:
+    """At most ``size`` connections to one database, created on demand"""
+
+    def __init__(self, path=alumni_db.DB_PATH, size=DEFAULT_SIZE, readonly=False):
+        self.path = path
+        self.size = size
+        self.readonly = readonly
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; blocks while all ``size`` connections are in use
+
+        Any transaction still open when the block exits is rolled back, so
+        the next borrower always starts clean.
+        """
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+                alumni_profiler.cache_event('pool', True)
+            except queue.Empty:
+                conn = alumni_db.connect(self.path, readonly=self.readonly, check_same_thread=False)
+                alumni_profiler.cache_event('pool', False)
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close the idle connections"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -0,0 +1,168 @@
+"""Lightweight timers and counters for the Streamlit hot paths
+
+Profiling is off unless ``ALUMNI_PROFILE=1`` is set (or ``enable()`` is
+called); while off, ``timed`` hands back a shared no-op context manager and
+``profiled`` functions call straight through, so the instrumentation left in
+the code costs one flag check per call.
+
+Samples are kept in a bounded ring per stage for the admin sidebar panel.
+Set ``ALUMNI_PROFILE_LOG=/path/to/file.jsonl`` to also append every sample
+as one JSON line for offline analysis.
+"""
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+import pandas as pd
+
+MAX_SAMPLES = 1000
+PERCENTILES = [50, 90, 99]
+_TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+_enabled = os.environ.get('ALUMNI_PROFILE', '').lower() in _TRUE_VALUES
+_log_path = os.environ.get('ALUMNI_PROFILE_LOG') or None
+_NULL = nullcontext()
+
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+_counters = defaultdict(int)
+_cache_events = defaultdict(lambda: [0, 0])
+_local = threading.local()
+_rerun_ids = itertools.count(1)
+
+
+def enabled():
+    return _enabled
+
+
+def enable(log_path=None):
+    """Turn profiling on (optionally logging samples to ``log_path``)"""
+    global _enabled, _log_path
+    _enabled = True
+    if log_path is not None:
+        _log_path = log_path
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    """Forget every sample and counter"""
+    with _lock:
+        _samples.clear()
+        _counters.clear()
+        _cache_events.clear()
+
+
+def _record(stage, seconds):
+    rerun = getattr(_local, 'rerun', None)
+    with _lock:
+        _samples[stage].append(seconds)
+        if _log_path is not None:
+            with open(_log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'ts': time.time(), 'rerun': rerun, 'stage': stage, 'ms': seconds * 1000}) + '\n')
+
+
+@contextmanager
+def _timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(stage, time.perf_counter() - start)
+
+
+def timed(stage):
+    """Context manager timing one stage; a no-op while profiling is off"""
+    if not _enabled:
+        return _NULL
+    return _timer(stage)
+
+
+def profiled(stage):
+    """Decorator timing every call of the wrapped function as ``stage``"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _timer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def rerun():
+    """Tag the samples of one script run and time it as the ``rerun`` stage"""
+    if not _enabled:
+        yield
+        return
+    _local.rerun = next(_rerun_ids)
+    try:
+        with _timer('rerun'):
+            yield
+    finally:
+        _local.rerun = None
+
+
+def count(name, n=1):
+    if _enabled:
+        with _lock:
+            _counters[name] += n
+
+
+def cache_event(cache, hit):
+    """Record a hit or miss of the named cache"""
+    if _enabled:
+        with _lock:
+            _cache_events[cache][0 if hit else 1] += 1
+
+
+def stage_summary():
+    """Latency percentiles (ms) per stage over the retained samples"""
+    with _lock:
+        samples = {stage: np.array(values) * 1000 for stage, values in _samples.items() if values}
+    rows = []
+    for stage, ms in sorted(samples.items()):
+        row = {'Tahap': stage, 'Jumlah': len(ms)}
+        for p, value in zip(PERCENTILES, np.percentile(ms, PERCENTILES)):
+            row[f'p{p} (ms)'] = round(float(value), 2)
+        row['Maks (ms)'] = round(float(ms.max()), 2)
+        rows.append(row)
+    return pd.DataFrame(rows, columns=['Tahap', 'Jumlah'] + [f'p{p} (ms)' for p in PERCENTILES] + ['Maks (ms)'])
+
+
+def cache_summary():
+    """Hits, misses and hit rate per cache"""
+    with _lock:
+        events = {cache: tuple(counts) for cache, counts in _cache_events.items()}
+    rows = [
+        {'Cache': cache, 'Hit': hits, 'Miss': misses, 'Hit rate': round(hits / (hits + misses), 3)}
+        for cache, (hits, misses) in sorted(events.items())
+    ]
+    return pd.DataFrame(rows, columns=['Cache', 'Hit', 'Miss', 'Hit rate'])
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def export_jsonl():
+    """All retained samples, cache events and counters as JSON lines"""
+    with _lock:
+        lines = [json.dumps({'stage': stage, 'ms': [round(s * 1000, 3) for s in values]})
+                 for stage, values in sorted(_samples.items())]
+        lines += [json.dumps({'cache': cache, 'hits': hits, 'misses': misses})
+                  for cache, (hits, misses) in sorted(_cache_events.items())]
+        lines += [json.dumps({'counter': name, 'value': value}) for name, value in sorted(_counters.items())]
+    return '\n'.join(lines) + '\n'
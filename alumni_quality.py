@@ -0,0 +1,411 @@
+"""Data-quality checks that keep bad and duplicate rows out of the published data
+
+Every imported chunk (uploads and the workbook) passes through a
+``QualityScanner`` before it is written. Rows that fail are not written to
+the alumni tables but to the ``karantina`` table, with their reasons, so
+the Statistik page only counts valid, distinct alumni:
+
+- a required field is empty (the NOT NULL columns), or a number cannot
+  be parsed
+- a value is out of range: NPM not numeric, implausible Angkatan, Tahun
+  Lulus or salary (vectorized over the chunk)
+- an exact duplicate: the content hash of an earlier row of the same
+  upload, or its NPM with different content
+- a near duplicate: the same alumnus under another NPM, e.g. a mistyped
+  NPM with a respelled name, among the existing rows or the upload
+
+Near duplicates are found by blocking, not by comparing all pairs. Each
+row gets a few keys that two records of one person would share: its NPM
+with each digit deleted in turn (NPMs one typo apart share one), its
+thesis title and its Id Karyawan. Keys are hashed into sorted arrays, so
+a chunk is matched with binary searches. Only rows sharing a key have
+their names compared, and keys shared by more than MAX_BLOCK rows are
+skipped, so the work grows linearly with the number of rows.
+
+    python alumni_quality.py    # scan the rows already in the database
+"""
+import json
+from collections import Counter
+from contextlib import closing
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import alumni_schema
+
+# NOT NULL columns of the mahasiswa table; a row without them cannot be written
+REQUIRED_COLUMNS = ['Nama', 'NPM', 'Program Studi', 'Angkatan']
+NUMERIC_COLUMNS = ['Angkatan', 'Tahun Lulus', 'Rata-rata Gaji']
+# Columns hashed to recognise exact copies ('No' is only the position in the sheet)
+CONTENT_COLUMNS = [col for col in alumni_schema.SCHEMA if col != 'No']
+
+NPM_PATTERN = r'\d{6,15}'
+MIN_ANGKATAN = 1950
+MIN_STUDY_YEARS = 3
+MAX_STUDY_YEARS = 10
+MIN_GAJI = 500_000
+MAX_GAJI = 1_000_000_000
+# Thesis titles shorter than this are too generic to identify anyone
+MIN_TITLE_LENGTH = 15
+
+# Names are compared as trigrams of their letters
+NON_LETTER = r'[^a-z]+'
+NGRAM = 3
+NAME_THRESHOLD = 0.75
+# Keys shared by more rows than this carry no signal and are skipped
+MAX_BLOCK = 50
+# Sorted key arrays kept apart before they are merged into one
+MAX_SEGMENTS = 8
+
+REASONS = {
+    'data_wajib_kosong': "Nama, NPM, Program Studi atau Angkatan kosong",
+    'bukan_angka': "Angkatan, Tahun Lulus atau Gaji bukan angka",
+    'npm_tidak_valid': "NPM harus 6-15 digit angka",
+    'angkatan_tidak_wajar': f"Angkatan di luar {MIN_ANGKATAN} sampai tahun ini",
+    'tahun_lulus_tidak_wajar': f"Tahun Lulus tidak {MIN_STUDY_YEARS}-{MAX_STUDY_YEARS} tahun setelah Angkatan",
+    'gaji_tidak_wajar': f"Gaji di luar Rp{MIN_GAJI:,} - Rp{MAX_GAJI:,}".replace(',', '.'),
+    'duplikat': "Salinan persis baris sebelumnya",
+    'npm_ganda': "NPM sama dengan baris sebelumnya, isi berbeda",
+    'mirip': "Kemungkinan alumni yang sama dengan NPM lain",
+}
+
+TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS karantina (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sumber TEXT,
+        baris INTEGER,
+        npm TEXT,
+        nama TEXT,
+        alasan TEXT NOT NULL,
+        keterangan TEXT,
+        data TEXT NOT NULL,
+        dibuat TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+]
+
+
+def create_tables(conn):
+    """Create the quarantine table"""
+    with conn:
+        for sql in TABLES:
+            conn.execute(sql)
+
+
+def _grams(text):
+    padded = f'  {text} '
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+def _dice(a, b):
+    return 2 * len(a & b) / (len(a) + len(b)) if a and b else 0.0
+
+
+def _present(values):
+    """Cells holding something other than NA or blank text"""
+    text = values.astype('string').str.strip()
+    return (values.notna() & (text != '')).fillna(False).to_numpy(dtype=bool)
+
+
+def _text(values):
+    return pd.Series(values.to_numpy(dtype=object), dtype='string')
+
+
+def _hashes(values):
+    """64-bit hash of each value, 0 for NA"""
+    return np.where(values.notna(), pd.util.hash_array(values.to_numpy(dtype=object, na_value='')), 0)
+
+
+def normalize_names(values):
+    """Lower-case letters of each name, one space between words"""
+    return _text(values).fillna('').str.lower().str.replace(NON_LETTER, ' ', regex=True).str.strip()
+
+
+def identity(frame):
+    """NPM, normalized thesis title and Id Karyawan of each row (NA where unusable)"""
+    title = _text(frame['Judul Skripsi']).str.lower().str.replace(r'\s+', ' ', regex=True).str.strip()
+    employee = _text(frame['Id Karyawan']).str.strip().str.upper()
+    return (_text(frame['NPM']), title.where(title.str.len() >= MIN_TITLE_LENGTH),
+            employee.where(employee.str.len() > 0))
+
+
+def _npm_keys(npm):
+    """Each valid NPM and its variants with one digit deleted, as integers, and their row positions
+
+    A key is the digits as a number times 16 plus their count, so leading
+    zeros still count. Two NPMs one substitution, insertion or deletion
+    apart share one of these keys.
+    """
+    usable = npm.str.fullmatch(NPM_PATTERN).fillna(False).to_numpy(dtype=bool)
+    rows = np.flatnonzero(usable)
+    values = npm[usable].astype('int64').to_numpy()
+    lengths = npm[usable].str.len().to_numpy(dtype=np.int64)
+    keys, positions = [values * 16 + lengths], [rows]
+    for i in range(lengths.max(initial=0)):
+        mask = lengths > i
+        # Delete digit i, counted from the left: high digits stay, low digits move up one place
+        low = 10 ** (lengths[mask] - 1 - i)
+        value = values[mask]
+        keys.append(((value // (low * 10)) * low + value % low) * 16 + lengths[mask] - 1)
+        positions.append(rows[mask])
+    return np.concatenate(keys), np.concatenate(positions)
+
+
+def _block_keys(npm, title, employee):
+    """Hashed blocking keys of the rows and the row position of each"""
+    keys, positions = _npm_keys(npm)
+    hashes, rows = [pd.util.hash_array(keys)], [positions]
+    for tag, values in (('j', title), ('k', employee)):
+        mask = values.notna().to_numpy(dtype=bool)
+        hashes.append(pd.util.hash_array((tag + values[mask]).to_numpy(dtype=object)))
+        rows.append(np.flatnonzero(mask))
+    return np.concatenate(hashes), np.concatenate(rows)
+
+
+def one_edit_apart(a, b):
+    """Whether ``a`` and ``b`` differ by at most one substituted, inserted or deleted character"""
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return False
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i + (len(a) == len(b)):] == b[i + 1:]
+
+
+class BlockIndex:
+    """Hashed blocking keys of known rows, kept as a few sorted arrays"""
+
+    def __init__(self):
+        self._segments = []
+
+    def add(self, hashes, ids):
+        order = np.argsort(hashes, kind='stable')
+        self._segments.append((hashes[order], ids[order]))
+        if len(self._segments) > MAX_SEGMENTS:
+            hashes = np.concatenate([h for h, _ in self._segments])
+            ids = np.concatenate([i for _, i in self._segments])
+            order = np.argsort(hashes, kind='stable')
+            self._segments = [(hashes[order], ids[order])]
+
+    def candidates(self, hashes, rows):
+        """(row, id) pairs sharing a key, leaving out keys shared by more than MAX_BLOCK ids"""
+        # Sorted lookups walk the segments in order, which is much faster than random ones
+        order = np.argsort(hashes)
+        hashes, rows = hashes[order], rows[order]
+        bounds = [(np.searchsorted(h, hashes, 'left'), np.searchsorted(h, hashes, 'right')) for h, _ in self._segments]
+        counts = sum((high - low for low, high in bounds), np.zeros(len(hashes), dtype=np.int64))
+        keep = (counts > 0) & (counts <= MAX_BLOCK)
+        pair_rows, pair_ids = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        for (_, ids), (low, high) in zip(self._segments, bounds):
+            low, sizes = low[keep], (high - low)[keep]
+            total = sizes.sum()
+            if not total:
+                continue
+            # Position j of range k is low[k] + j
+            offsets = np.arange(total) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+            pair_rows.append(np.repeat(rows[keep], sizes))
+            pair_ids.append(ids[np.repeat(low, sizes) + offsets])
+        return np.concatenate(pair_rows), np.concatenate(pair_ids)
+
+
+class QualityScanner:
+    """Checks the chunks of one import and collects the rows it quarantines
+
+    ``existing`` is the data already published (None when it is being
+    replaced); uploaded rows that duplicate one of its alumni under
+    another NPM are quarantined too. Call ``check`` for every chunk, then
+    ``save`` in the import transaction.
+    """
+
+    def __init__(self, existing=None, source=None):
+        self.source = source
+        self.accepted = 0
+        self._index = BlockIndex()
+        self._npms = []
+        self._names = []
+        # Hashed NPM, thesis title and Id Karyawan of every row, 0 where missing
+        self._identity = np.empty((0, 3), dtype=np.uint64)
+        self._grams = {}
+        self._content = {}
+        self._lines = 0
+        self._quarantined = []
+        if existing is not None and len(existing):
+            self._index_rows(existing)
+
+    def _index_rows(self, frame):
+        """Add ``frame`` to the known rows; return its ids and its hashed keys"""
+        start = len(self._npms)
+        npm, title, employee = identity(frame)
+        self._npms.extend(npm.tolist())
+        self._names.extend(normalize_names(frame['Nama']).tolist())
+        identity_hashes = np.column_stack([_hashes(npm), _hashes(title), _hashes(employee)]).astype(np.uint64)
+        self._identity = np.concatenate([self._identity, identity_hashes])
+        hashes, rows = _block_keys(npm, title, employee)
+        self._index.add(hashes, rows + start)
+        return start + np.arange(len(frame)), hashes, rows
+
+    def _name_grams(self, name):
+        grams = self._grams.get(name)
+        if grams is None:
+            grams = self._grams[name] = (_grams(name), _grams(' '.join(sorted(name.split()))))
+        return grams
+
+    def similarity(self, a, b):
+        """Trigram similarity of two normalized names, also with their words sorted"""
+        (a_plain, a_sorted), (b_plain, b_sorted) = self._name_grams(a), self._name_grams(b)
+        return max(_dice(a_plain, b_plain), _dice(a_sorted, b_sorted))
+
+    def _plausible(self, rows, others):
+        """Which pairs of row ids may be one person under two NPMs, and which share a thesis or employee id
+
+        Pairs with the same NPM are updates, not duplicates. A thesis title
+        or employee id filled in on both rows but different tells two
+        people apart, whatever their NPMs and names.
+        """
+        a, b = self._identity[rows], self._identity[others]
+        filled = (a[:, 1:] != 0) & (b[:, 1:] != 0)
+        same = a == b
+        plausible = ~same[:, 0] & ~(filled & ~same[:, 1:]).any(axis=1)
+        return plausible, (filled & same[:, 1:]).any(axis=1)
+
+    def check(self, raw, clean):
+        """Return the rows of ``clean`` (cleaned from the chunk ``raw``) that pass every check"""
+        reasons = pd.DataFrame(False, index=clean.index, columns=list(REASONS))
+        details = {}
+        year = date.today().year
+
+        # Vectorized field checks
+        reasons['data_wajib_kosong'] = clean[REQUIRED_COLUMNS].isna().any(axis=1)
+        for col in NUMERIC_COLUMNS:
+            if col in raw:
+                reasons['bukan_angka'] |= _present(raw.loc[clean.index, col]) & clean[col].isna().to_numpy()
+        npm = clean['NPM'].astype('string')
+        reasons['npm_tidak_valid'] = (npm.notna() & ~npm.str.fullmatch(NPM_PATTERN)).fillna(False).astype(bool)
+        angkatan = alumni_schema.numeric_array(clean['Angkatan'])
+        lulus = alumni_schema.numeric_array(clean['Tahun Lulus'])
+        gaji = alumni_schema.numeric_array(clean['Rata-rata Gaji'])
+        with np.errstate(invalid='ignore'):
+            reasons['angkatan_tidak_wajar'] = (angkatan < MIN_ANGKATAN) | (angkatan > year)
+            study = lulus - angkatan
+            reasons['tahun_lulus_tidak_wajar'] = (study < MIN_STUDY_YEARS) | (study > MAX_STUDY_YEARS) | (lulus > year + 1)
+            reasons['gaji_tidak_wajar'] = (gaji < MIN_GAJI) | (gaji > MAX_GAJI)
+
+        # Exact duplicates, in upload order, among the rows still valid
+        valid = ~reasons.any(axis=1).to_numpy()
+        content = pd.util.hash_pandas_object(clean.loc[valid, CONTENT_COLUMNS], index=False).to_numpy()
+        for label, value, digest in zip(clean.index[valid], clean.loc[valid, 'NPM'].tolist(), content.tolist()):
+            previous = self._content.get(value)
+            if previous is None:
+                self._content[value] = digest
+            else:
+                reasons.at[label, 'duplikat' if previous == digest else 'npm_ganda'] = True
+        valid = ~reasons.any(axis=1).to_numpy()
+
+        # Near duplicates among the known rows and the earlier rows of this upload
+        rows = clean[valid]
+        ids, hashes, key_rows = self._index_rows(rows)
+        pair_rows, pair_ids = self._index.candidates(hashes, key_rows)
+        own = ids[pair_rows]
+        # An upload updating its own rows shares every NPM key with them: drop those pairs first
+        keep = (pair_ids < own) & (self._identity[own, 0] != self._identity[pair_ids, 0])
+        # One int64 per (row, earlier row) pair
+        pairs = np.unique(own[keep] << 32 | pair_ids[keep])
+        own, others = pairs >> 32, pairs & 0xFFFFFFFF
+        plausible, shared = self._plausible(own, others)
+        flagged = set()
+        for row_id, other, same_record in zip(own[plausible].tolist(), others[plausible].tolist(),
+                                              shared[plausible].tolist()):
+            # Without a shared thesis or employee id, only a mistyped NPM counts
+            if row_id in flagged or not (same_record or one_edit_apart(self._npms[row_id], self._npms[other])):
+                continue
+            if self.similarity(self._names[row_id], self._names[other]) >= NAME_THRESHOLD:
+                flagged.add(row_id)
+                label = rows.index[row_id - ids[0]]
+                reasons.at[label, 'mirip'] = True
+                details[label] = f"NPM {self._npms[other]}"
+
+        passed = ~reasons.any(axis=1).to_numpy()
+        self._collect(raw, clean, reasons[~passed], details)
+        self._lines += len(raw)
+        self.accepted += int(passed.sum())
+        return clean[passed]
+
+    def _collect(self, raw, clean, reasons, details):
+        """Remember the failed rows of one chunk (and the ones cleaning dropped) for the report"""
+        # Rows dropped while cleaning, unless they were blank
+        dropped = raw.index.difference(clean.index)
+        dropped = dropped[np.column_stack([_present(raw.loc[dropped, col]) for col in raw.columns]).any(axis=1)]
+        codes = [[code for code, hit in zip(REASONS, flags) if hit] for flags in reasons.to_numpy()]
+        labels = list(reasons.index) + list(dropped)
+        codes += [['data_wajib_kosong']] * len(dropped)
+        if not labels:
+            return
+        failed = raw.loc[labels]
+        # Sheet line: one header row, numbered from 1
+        lines = self._lines + raw.index.get_indexer(labels) + 2
+        frame = pd.DataFrame({
+            'Baris': lines,
+            'NPM': failed['NPM'].astype(object).tolist() if 'NPM' in failed else None,
+            'Nama': failed['Nama'].astype(object).tolist() if 'Nama' in failed else None,
+            'Alasan': [', '.join(c) for c in codes],
+            'Keterangan': ['; '.join([REASONS[code] for code in c] + ([details[label]] if label in details else []))
+                           for label, c in zip(labels, codes)],
+            'data': [json.dumps(record, ensure_ascii=False, default=str)
+                     for record in failed.astype(object).where(failed.notna(), None).to_dict('records')],
+        })
+        self._quarantined.append(frame)
+
+    def quarantined(self):
+        """Every quarantined row so far, in sheet order"""
+        if not self._quarantined:
+            return pd.DataFrame(columns=['Baris', 'NPM', 'Nama', 'Alasan', 'Keterangan', 'data'])
+        return pd.concat(self._quarantined, ignore_index=True).sort_values('Baris', ignore_index=True)
+
+    def counts(self):
+        """Number of quarantined rows per reason"""
+        counts = Counter()
+        for frame in self._quarantined:
+            for reasons in frame['Alasan']:
+                counts.update(reasons.split(', '))
+        return counts
+
+    def save(self, conn):
+        """Store the quarantined rows in place of those an earlier import of the same source left
+
+        Call once per import, inside its transaction: a source read again
+        (e.g. every workbook sync) reports only the rows still failing.
+        """
+        frame = self.quarantined()
+        conn.execute('DELETE FROM karantina WHERE sumber IS ?', [self.source])
+        conn.executemany(
+            'INSERT INTO karantina (sumber, baris, npm, nama, alasan, keterangan, data) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(self.source, int(line), npm, nama, reasons, detail, data)
+             for line, npm, nama, reasons, detail, data in frame.itertuples(index=False)],
+        )
+        return len(frame)
+
+
+def scan(data):
+    """Check an already loaded dataset as if it were uploaded; return the scanner"""
+    scanner = QualityScanner()
+    scanner.check(data, data)
+    return scanner
+
+
+def main():
+    import alumni_db
+
+    with closing(alumni_db.connect(alumni_db.init_database(), readonly=True)) as conn:
+        data = alumni_db.fetch_alumni(conn)
+    scanner = scan(data)
+    print(f"{len(data)} baris diperiksa, {len(data) - scanner.accepted} bermasalah")
+    for code, count in scanner.counts().most_common():
+        print(f"  {count:6d}  {REASONS[code]}")
+
+
+if __name__ == '__main__':
+    main()
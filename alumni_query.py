@@ -0,0 +1,298 @@
+"""Headless alumni queries: the search and Statistik logic without Streamlit
+
+The Streamlit pages and the HTTP API (``alumni_api``) both answer from a
+store snapshot through these functions, so a filter, a sort order or an
+aggregate means the same thing everywhere. Everything returned is plain
+Python (dicts, lists, str, int, float, None), ready to be sent as JSON.
+"""
+import base64
+import binascii
+import json
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import alumni_company
+import alumni_db
+import alumni_schema
+import alumni_search
+import alumni_stats
+
+# Columns of one search result; a detail lookup returns every column
+RESULT_COLUMNS = ['No', 'Nama', 'NPM', 'Program Studi', 'Angkatan', 'Pekerjaan', 'Nama Perusahaan', 'Rata-rata Gaji']
+SORT_COLUMNS = ['No', 'Nama', 'NPM', 'Program Studi', 'Angkatan', 'Nama Perusahaan', 'Rata-rata Gaji']
+NUMERIC_SORT_COLUMNS = {'No', 'Angkatan', 'Rata-rata Gaji'}
+DEFAULT_LIMIT = 25
+MAX_LIMIT = 200
+TOP_COMPANIES = 10
+# Sorted searches (and searches with their summary) kept per snapshot, so repeating one costs a lookup
+RECENT_SEARCHES = 16
+
+
+class QueryError(ValueError):
+    """A query parameter that cannot be answered (bad number, unknown column, broken cursor)"""
+
+
+def _json_value(value):
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return int(value) if value.is_integer() else value
+    return value
+
+
+class RecentCache:
+    """Thread-safe map keeping only the ``size`` most recently used entries"""
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+# Artifacts of a snapshot, built once per dataset version
+
+def search_index(snapshot):
+    return snapshot.derived('search_index', alumni_search.SearchIndex, alumni_search.INDEX_COLUMNS)
+
+
+def npm_positions(snapshot):
+    return snapshot.derived('npm_positions', alumni_search.npm_positions, ['NPM'])
+
+
+def statistics(snapshot):
+    """Aggregates for the given snapshot
+
+    Store snapshots carry them from the database summary tables; other
+    snapshots (the fallback data) compute them once from their rows.
+    """
+    return snapshot.derived('stats', alumni_stats.AlumniStats.from_frame, alumni_stats.SOURCE_COLUMNS)
+
+
+def company_counts(snapshot):
+    """Alumni per canonical employer, with name variants ("BCA", "PT Bank Central Asia Tbk") merged"""
+    aliases = snapshot.derived('company_aliases', alumni_company.aliases_from_frame, alumni_company.SOURCE_COLUMNS)
+    return alumni_company.canonical_counts(statistics(snapshot).group_counts['Nama Perusahaan'], aliases)
+
+
+# Search
+
+def parse_filters(params):
+    """Search filters from string parameters (e.g. a URL query); missing keys mean no filter"""
+    filters = {}
+    for key in alumni_search.FILTER_KEYS:
+        value = (params.get(key) or '').strip()
+        if key in ('gaji_min', 'gaji_max'):
+            try:
+                value = int(value) if value else 0
+            except ValueError:
+                raise QueryError(f"{key} harus berupa bilangan bulat") from None
+            if value < 0:
+                raise QueryError(f"{key} tidak boleh negatif")
+        elif key == 'program_studi':
+            value = value or None
+        filters[key] = value
+    return filters
+
+
+def search(snapshot, filters, previous=None):
+    """Row positions matching ``filters`` (all rows when unfiltered); see ``SearchIndex.search``"""
+    rows = search_index(snapshot).search(filters, previous)
+    return np.arange(len(snapshot.data)) if rows is None else rows
+
+
+def search_summary(data, rows):
+    """Metrics shown above the search results: count, mean salary and most common study program"""
+    program_mode = data['Program Studi'].iloc[rows].mode()
+    return {
+        'count': len(rows),
+        'gaji_mean': _json_value(data['Rata-rata Gaji'].iloc[rows].mean()),
+        'top_program': program_mode.iloc[0] if not program_mode.empty else None,
+    }
+
+
+def search_result(snapshot, filters, previous=None):
+    """Matching rows and their ``search_summary``, kept for the snapshot's recent searches
+
+    Returns (matched, rows, summary): ``matched`` is what ``SearchIndex.search``
+    returned (None when nothing was filtered), to pass on as ``previous``.
+    """
+    recent = snapshot.derived('search_results', lambda data: RecentCache(RECENT_SEARCHES))
+    cache_key = tuple(sorted(filters.items()))
+    result = recent.get(cache_key)
+    if result is None:
+        matched = search_index(snapshot).search(filters, previous)
+        rows = np.arange(len(snapshot.data)) if matched is None else matched
+        result = matched, rows, search_summary(snapshot.data, rows)
+        recent.put(cache_key, result)
+    return result
+
+
+def records(data, rows, columns=RESULT_COLUMNS):
+    """``columns`` of the given rows as a list of dicts, missing values as None"""
+    frame = data.iloc[rows, data.columns.get_indexer(columns)]
+    return json.loads(frame.to_json(orient='records', force_ascii=False))
+
+
+def detail(snapshot, npm):
+    """Every column of the alumnus with this NPM, or None"""
+    position = npm_positions(snapshot).get(alumni_db.normalize_npm(npm))
+    if position is None:
+        return None
+    data = snapshot.data
+    return records(data, [position], list(data.columns))[0]
+
+
+# Keyset pagination
+#
+# A page ends with a cursor naming its last row by (sort value, NPM). The
+# next page starts right after that row in the current dataset version, so
+# rows added or removed in between neither shift nor repeat the pages, as
+# an offset would.
+
+def encode_cursor(value, npm):
+    raw = json.dumps([_json_value(value), npm], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, npm = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise QueryError("Kursor halaman tidak valid") from None
+    return value, npm
+
+
+def _cursor_key(snapshot, keys, column, ascending, value, npm):
+    """Sort key after which the page following the cursor row starts"""
+    data = snapshot.data
+    position = npm_positions(snapshot).get(npm)
+    if position is not None and _json_value(data[column].iloc[position]) == value:
+        return keys[position]
+    # The row was deleted or changed: restart at its value (ties may repeat, nothing is skipped)
+    if column in NUMERIC_SORT_COLUMNS:
+        values = alumni_schema.numeric_array(data[column])
+        present = ~np.isnan(values)
+        if value is not None:
+            if not isinstance(value, (int, float)):
+                raise QueryError("Kursor halaman tidak valid")
+            present &= values < value if ascending else values > value
+    else:
+        values = data[column].astype(alumni_schema.TEXT_DTYPE)
+        present = values.notna()
+        if value is not None:
+            present &= values < str(value) if ascending else values > str(value)
+        present = present.to_numpy(dtype=bool)
+    return keys[present].max() if present.any() else -math.inf
+
+
+def sorted_search(snapshot, filters, sort, ascending=True):
+    """Matching rows in ``sort`` order and their sort keys (ascending), kept for recent searches"""
+    recent = snapshot.derived('recent_searches', lambda data: RecentCache(RECENT_SEARCHES))
+    cache_key = (tuple(sorted(filters.items())), sort, ascending)
+    result = recent.get(cache_key)
+    if result is None:
+        rows = search(snapshot, filters)
+        keys = search_index(snapshot).sort_keys(sort, ascending)[rows]
+        order = np.argsort(keys, kind='stable')
+        result = rows[order], keys[order]
+        recent.put(cache_key, result)
+    return result
+
+
+def page(snapshot, filters, sort='No', ascending=True, after=None, limit=DEFAULT_LIMIT):
+    """One page of search results in ``sort`` order, starting after the ``after`` cursor
+
+    Returns the total number of matches, the page ``items`` (``RESULT_COLUMNS``)
+    and the cursor of the next page (None on the last page).
+    """
+    if sort not in SORT_COLUMNS:
+        raise QueryError(f"Kolom urutan tidak dikenal: {sort}")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise QueryError(f"limit harus di antara 1 dan {MAX_LIMIT}")
+    keys = search_index(snapshot).sort_keys(sort, ascending)
+    if after:
+        # A client walking the pages: sort all matches once, then each page is a binary search
+        rows, row_keys = sorted_search(snapshot, filters, sort, ascending)
+        start = np.searchsorted(row_keys, _cursor_key(snapshot, keys, sort, ascending, *decode_cursor(after)),
+                                side='right')
+        total, rows = len(rows), rows[start:]
+    else:
+        # Most searches stop at the first page: only its rows need sorting
+        rows = search(snapshot, filters)
+        total = len(rows)
+        if total > limit:
+            rows = rows[np.argpartition(keys[rows], limit)[:limit + 1]]
+        rows = rows[np.argsort(keys[rows], kind='stable')]
+    more = len(rows) > limit
+    items = records(snapshot.data, rows[:limit])
+    cursor = encode_cursor(items[-1][sort], items[-1]['NPM']) if more else None
+    return {'total': total, 'count': len(items), 'items': items, 'next': cursor}
+
+
+# Statistik
+
+def overview(snapshot):
+    """Headline figures of the Statistik page"""
+    stats = statistics(snapshot)
+    angkatan_min, angkatan_max = stats.angkatan_range
+    return {
+        'total': stats.total,
+        'program_studi': stats.nunique('Program Studi'),
+        'perusahaan': len(company_counts(snapshot)),
+        'gaji_mean': _json_value(stats.gaji_mean),
+        'gaji_min': _json_value(stats.gaji_min),
+        'gaji_max': _json_value(stats.gaji_max),
+        'angkatan_min': _json_value(angkatan_min),
+        'angkatan_max': _json_value(angkatan_max),
+        'tahun_lulus_mean': _json_value(stats.tahun_lulus_mean),
+    }
+
+
+def counts(snapshot, column):
+    """Alumni per value of ``column`` (one of ``alumni_stats.GROUP_COLUMNS``), largest first"""
+    if column not in alumni_stats.GROUP_COLUMNS:
+        raise QueryError(f"Kolom kelompok tidak dikenal: {column}")
+    if column == 'Nama Perusahaan':
+        pairs = company_counts(snapshot).most_common()
+    else:
+        pairs = statistics(snapshot).group_counts[column].most_common()
+    return [{column: _json_value(value), 'Jumlah Alumni': count} for value, count in pairs]
+
+
+def salary_by(snapshot, column):
+    """Alumni count and salary mean/min/max per value of ``column``, largest group first"""
+    if column not in alumni_stats.GROUP_COLUMNS:
+        raise QueryError(f"Kolom kelompok tidak dikenal: {column}")
+    table = statistics(snapshot).salary_by(column)
+    return [{key: _json_value(value) for key, value in row.items()} for row in table.to_dict('records')]
+
+
+def top_companies(snapshot, n=TOP_COMPANIES):
+    """The ``n`` canonical employers with most alumni and their share of all alumni (%)"""
+    total = max(statistics(snapshot).total, 1)
+    return [
+        {'Perusahaan': name, 'Jumlah Alumni': count, 'Persentase': round(count / total * 100, 1)}
+        for name, count in company_counts(snapshot).most_common(n)
+    ]
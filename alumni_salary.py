@@ -0,0 +1,138 @@
+"""Salary percentiles and year-over-year cohort trends
+
+    >>> analytics = alumni_salary.SalaryAnalytics(data)
+    >>> analytics.percentiles(['Program Studi', 'Tahun Lulus'])
+    >>> analytics.cohort_trends('Tahun Lulus', by='Program Studi')
+
+Each grouping costs one ``np.lexsort`` of the salaries by group codes; all
+percentiles, counts and means are then read off the sorted array with
+vectorized index arithmetic (the same linear interpolation as
+``Series.quantile``), with no Python loop over groups. A SalaryAnalytics
+instance belongs to one dataset version and caches every table it builds.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+import alumni_schema
+
+GROUP_COLUMNS = ['Program Studi', 'Angkatan', 'Tahun Lulus', 'Peminatan']
+COHORT_COLUMNS = ['Tahun Lulus', 'Angkatan']
+# Every column the analytics read
+SOURCE_COLUMNS = GROUP_COLUMNS + ['Rata-rata Gaji']
+PERCENTILES = [10, 25, 50, 75, 90]
+
+
+def _codes(values):
+    """(codes, labels) of a column with -1 for missing values; labels keep their natural order"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    codes, labels = pd.factorize(values, sort=True)
+    return codes, labels
+
+
+def group_percentiles(codes, values, percentiles=PERCENTILES):
+    """Percentiles, count and mean of ``values`` per distinct row of ``codes``
+
+    ``codes`` is a list of equally long integer arrays (one per group
+    column, no missing values) and ``values`` a float array without NaN.
+    Returns (group codes as a list of arrays, counts, means, {p: values}).
+    """
+    order = np.lexsort([values] + codes[::-1])
+    sorted_values = values[order]
+    sorted_codes = [c[order] for c in codes]
+    n = len(sorted_values)
+    if n == 0:
+        empty = np.array([], dtype=float)
+        return [c[:0] for c in codes], np.array([], dtype=int), empty, {p: empty for p in percentiles}
+    boundary = np.zeros(n, dtype=bool)
+    boundary[0] = True
+    for c in sorted_codes:
+        boundary[1:] |= c[1:] != c[:-1]
+    starts = np.flatnonzero(boundary)
+    counts = np.diff(np.append(starts, n))
+    means = np.add.reduceat(sorted_values, starts) / counts
+    result = {}
+    for p in percentiles:
+        position = (counts - 1) * (p / 100)
+        lower = np.floor(position).astype(int)
+        upper = np.minimum(lower + 1, counts - 1)
+        low_values = sorted_values[starts + lower]
+        result[p] = low_values + (position - lower) * (sorted_values[starts + upper] - low_values)
+    return [c[starts] for c in sorted_codes], counts, means, result
+
+
+class SalaryAnalytics:
+    """Salary percentile tables and cohort trends for one dataset version"""
+
+    def __init__(self, data):
+        gaji = alumni_schema.numeric_array(data['Rata-rata Gaji'])
+        self._has_salary = ~np.isnan(gaji)
+        self._gaji = gaji[self._has_salary]
+        self._columns = {col: _codes(data[col]) for col in GROUP_COLUMNS if col in data}
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._gaji)
+
+    def percentiles(self, by=('Program Studi',), percentiles=PERCENTILES, min_count=1):
+        """Count, mean and salary percentiles per combination of the ``by`` columns
+
+        Alumni without a salary or with a missing group value are left out;
+        groups smaller than ``min_count`` are dropped.
+        """
+        by, percentiles = tuple(by), tuple(percentiles)
+        key = ('percentiles', by, percentiles)
+        table = self._tables.get(key)
+        if table is None:
+            table = self._build(by, percentiles)
+            with self._lock:
+                self._tables[key] = table
+        return table[table['Jumlah'] >= min_count].reset_index(drop=True)
+
+    def _build(self, by, percentiles):
+        unknown = [col for col in by if col not in self._columns]
+        if unknown:
+            raise KeyError(f"Kolom pengelompokan tidak dikenal: {', '.join(unknown)}")
+        codes = [self._columns[col][0][self._has_salary] for col in by]
+        complete = np.ones(len(self._gaji), dtype=bool)
+        for c in codes:
+            complete &= c >= 0
+        group_codes, counts, means, values = group_percentiles(
+            [c[complete] for c in codes], self._gaji[complete], percentiles)
+        table = {col: self._columns[col][1].take(c) for col, c in zip(by, group_codes)}
+        table['Jumlah'] = counts
+        table['Rata-rata'] = means
+        for p in percentiles:
+            table[f'P{p}'] = values[p]
+        return pd.DataFrame(table)
+
+    def cohort_trends(self, cohort='Tahun Lulus', by=None, min_count=1):
+        """Median and mean salary per cohort year, with the change from the year before
+
+        ``by`` optionally splits the trend (e.g. per Program Studi). The
+        year-over-year changes are NaN when the previous year has no
+        cohort (or one smaller than ``min_count``) in the same group.
+        """
+        groups = [by] if by else []
+        table = self.percentiles(groups + [cohort], [50], min_count)
+        table = table.rename(columns={'P50': 'Median'})
+        years = table[cohort].astype(float)
+        previous = table.groupby(groups, observed=True, sort=False) if groups else table
+        for col in ['Median', 'Rata-rata']:
+            before = previous[col].shift()
+            consecutive = (years - previous[cohort].shift().astype(float)) == 1
+            table[f'Perubahan {col} (%)'] = ((table[col] / before - 1) * 100).where(consecutive)
+        return table
+
+
+def percentile_table(data, by=('Program Studi',), percentiles=PERCENTILES, min_count=1):
+    """One-off ``SalaryAnalytics(data).percentiles(...)``"""
+    return SalaryAnalytics(data).percentiles(by, percentiles, min_count)
+
+
+def cohort_trends(data, cohort='Tahun Lulus', by=None, min_count=1):
+    """One-off ``SalaryAnalytics(data).cohort_trends(...)``"""
+    return SalaryAnalytics(data).cohort_trends(cohort, by, min_count)
@@ -0,0 +1,143 @@
+"""Typed, compact in-memory layout for the alumni frame
+
+Low-cardinality columns become categoricals, years are Int16, salary is
+Int64 and free text is stored as Arrow-backed strings when pyarrow is
+installed. Run ``python alumni_schema.py`` for a memory report comparing
+this layout with the old all-object one.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    TEXT_DTYPE = pd.StringDtype('pyarrow')
+except ImportError:  # pyarrow missing or too old for pandas
+    TEXT_DTYPE = pd.StringDtype('python')
+
+CATEGORY_COLUMNS = ['Program Studi', 'Peminatan', 'Nama Perusahaan']
+YEAR_COLUMNS = ['Angkatan', 'Tahun Lulus']
+TEXT_COLUMNS = ['Nama', 'NPM', 'Judul Skripsi', 'Pekerjaan', 'Id Karyawan', 'Alamat Perusahaan']
+
+SCHEMA = {
+    'No': 'Int32',
+    **{col: 'category' for col in CATEGORY_COLUMNS},
+    **{col: 'Int16' for col in YEAR_COLUMNS},
+    **{col: TEXT_DTYPE for col in TEXT_COLUMNS},
+    'Rata-rata Gaji': 'Int64',
+}
+
+
+def _to_integer(values, dtype):
+    return pd.to_numeric(values, errors='coerce').round().astype(dtype)
+
+
+def apply_schema(df):
+    """Return ``df`` converted to the compact layout (unknown columns are kept)"""
+    columns = {}
+    for col in df.columns:
+        dtype = SCHEMA.get(col)
+        if dtype is None or df[col].dtype == dtype:
+            columns[col] = df[col]
+        elif dtype in ('Int16', 'Int32', 'Int64'):
+            columns[col] = _to_integer(df[col], dtype)
+        elif dtype == 'category':
+            columns[col] = df[col].astype(TEXT_DTYPE).astype('category')
+        else:
+            columns[col] = df[col].astype(dtype)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def append_rows(data, rows):
+    """Concatenate typed frames, widening categories instead of falling back to object"""
+    rows = apply_schema(rows)
+    data_columns, row_columns = {}, {}
+    for col in data.columns:
+        left, right = data[col], rows[col] if col in rows else pd.Series(index=rows.index, dtype=data[col].dtype)
+        if isinstance(left.dtype, pd.CategoricalDtype):
+            new = right.dropna().astype(object).unique()
+            new = [v for v in new if v not in left.cat.categories]
+            if new:
+                left = left.cat.add_categories(new)
+            right = right.astype(object).astype(left.dtype)
+        data_columns[col], row_columns[col] = left, right
+    return pd.concat([pd.DataFrame(data_columns), pd.DataFrame(row_columns)], ignore_index=True)
+
+
+def _plain_values(column):
+    return [None if pd.isna(v) else v for v in column.astype(object)]
+
+
+def changed_columns(old, new):
+    """Columns whose values differ between two row-aligned frames"""
+    return {col for col in new.columns if col in old and _plain_values(old[col]) != _plain_values(new[col])}
+
+
+def replace_rows(data, positions, rows, columns=None):
+    """Copy of ``data`` with the rows at ``positions`` overwritten by ``rows``
+
+    Only ``columns`` (default: all shared columns) are copied and written;
+    the others are shared with ``data``. Categories are widened as needed.
+    """
+    rows = apply_schema(rows)
+    columns = [col for col in data.columns if col in rows and (columns is None or col in columns)]
+    result = {col: data[col] for col in data.columns}
+    for col in columns:
+        column = data[col].copy()
+        values = rows[col].astype(object)
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            new = [v for v in values.dropna().unique() if v not in column.cat.categories]
+            if new:
+                column = column.cat.add_categories(new)
+        column.iloc[positions] = values.astype(column.dtype).to_numpy()
+        result[col] = column
+    return pd.DataFrame(result, index=data.index)
+
+
+def drop_rows(data, positions):
+    """Copy of ``data`` without the rows at ``positions``, renumbered from 0"""
+    keep = np.ones(len(data), dtype=bool)
+    keep[list(positions)] = False
+    return data[keep].reset_index(drop=True)
+
+
+def numeric_array(values):
+    """Float ndarray of a numeric column with NaN for missing values"""
+    return pd.to_numeric(values, errors='coerce').astype('Float64').to_numpy(dtype=float, na_value=np.nan)
+
+
+def legacy_layout(df):
+    """The previous layout: Python object strings everywhere, years as str"""
+    legacy = df.astype(object)
+    for col in YEAR_COLUMNS:
+        if col in legacy:
+            legacy[col] = legacy[col].astype(str).astype(object)
+    if 'Rata-rata Gaji' in legacy:
+        legacy['Rata-rata Gaji'] = pd.to_numeric(legacy['Rata-rata Gaji'], errors='coerce').astype(float)
+    return legacy
+
+
+def memory_report(df):
+    """Per-column deep memory usage (bytes) of the legacy vs. compact layout"""
+    legacy = legacy_layout(df)
+    compact = apply_schema(df)
+    report = pd.DataFrame({
+        'legacy_dtype': legacy.dtypes.astype(str),
+        'legacy_bytes': legacy.memory_usage(index=False, deep=True),
+        'compact_dtype': compact.dtypes.astype(str),
+        'compact_bytes': compact.memory_usage(index=False, deep=True),
+    })
+    report.loc['TOTAL'] = ['', report['legacy_bytes'].sum(), '', report['compact_bytes'].sum()]
+    report['ratio'] = (report['compact_bytes'] / report['legacy_bytes']).round(3)
+    return report
+
+
+if __name__ == '__main__':
+    import sys
+
+    import alumni_db
+
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    data = alumni_db.read_excel()
+    if repeat > 1:
+        data = pd.concat([data] * repeat, ignore_index=True)
+    print(f"{len(data)} rows")
+    print(memory_report(data).to_string())
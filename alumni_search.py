@@ -0,0 +1,288 @@
+"""In-memory search index for the alumni search page
+
+The index is built once per dataset version and answers each filter with a
+sorted array of row positions; filters are combined by intersecting those
+arrays, so a rerun never scans or copies the full frame.
+"""
+import numpy as np
+import pandas as pd
+
+import alumni_profiler
+import alumni_schema
+
+NGRAM = 3
+
+# Filter key -> column, matching alumni_db.build_where (which also matches NPM by prefix)
+TEXT_FILTERS = {
+    'nama': 'Nama',
+    'pekerjaan': 'Pekerjaan',
+    'perusahaan': 'Nama Perusahaan',
+}
+
+# Columns read by the filters plus the columns the search page sorts on
+INDEX_COLUMNS = ['No', 'Nama', 'NPM', 'Program Studi', 'Angkatan', 'Pekerjaan', 'Nama Perusahaan', 'Rata-rata Gaji']
+
+
+FILTER_KEYS = list(TEXT_FILTERS) + ['npm', 'program_studi', 'gaji_min', 'gaji_max']
+
+
+def narrowed_filters(old, new):
+    """Keys whose value changed, if ``new`` can only match a subset of what ``old`` matched; else None
+
+    A filter narrows when it is added, when a text filter grows around its
+    old text ("sar" -> "sari"), when the NPM prefix gets longer or when a
+    salary bound tightens. Removing or replacing a filter widens the search.
+    Empty values and 0 salary bounds mean "no filter", as in ``search``.
+    """
+    changed = []
+    for key in FILTER_KEYS:
+        before, after = old.get(key) or None, new.get(key) or None
+        if before == after:
+            continue
+        if after is None:
+            return None
+        if before is not None:
+            if key in TEXT_FILTERS:
+                narrower = before.lower() in after.lower()
+            elif key == 'npm':
+                narrower = after.startswith(before)
+            elif key == 'gaji_min':
+                narrower = after >= before
+            elif key == 'gaji_max':
+                narrower = after <= before
+            else:
+                narrower = False
+            if not narrower:
+                return None
+        changed.append(key)
+    return changed
+
+
+def _ngrams(text):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class NpmPositions(dict):
+    """Hash map from NPM (the primary key) to row position"""
+
+    def appended(self, rows):
+        """Copy extended with the positions of rows appended after the current ones"""
+        positions = NpmPositions(self)
+        positions.update(zip(rows['NPM'], range(len(self), len(self) + len(rows))))
+        return positions
+
+
+def npm_positions(data):
+    return NpmPositions(zip(data['NPM'], range(len(data))))
+
+
+class NgramIndex:
+    """Case-insensitive substring index over one text column
+
+    Distinct values are indexed by their trigrams; rows are recovered from
+    the value codes, so repeated values (company names, job titles) cost
+    nothing extra.
+    """
+
+    def __init__(self, values):
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Categories are already the distinct values
+            codes = values.cat.codes.to_numpy()
+            uniques = values.cat.categories.astype(object).str.lower()
+        else:
+            codes, uniques = pd.factorize(values.astype(object).str.lower())
+        self._codes = codes
+        self._values = np.asarray(uniques, dtype=object)
+        self._value_strings = pd.Series(self._values, dtype='string')
+        postings = {}
+        for code, text in enumerate(self._values):
+            for gram in _ngrams(text):
+                postings.setdefault(gram, []).append(code)
+        self._postings = {gram: np.array(c, dtype=np.int32) for gram, c in postings.items()}
+
+    def _matching_values(self, query):
+        if len(query) < NGRAM:
+            # Too short for a trigram lookup; scan the distinct values only
+            return np.flatnonzero(self._value_strings.str.contains(query, regex=False).to_numpy(dtype=bool))
+        candidates = None
+        for gram in sorted(_ngrams(query), key=lambda g: len(self._postings.get(g, ()))):
+            posting = self._postings.get(gram)
+            if posting is None:
+                return np.empty(0, dtype=np.int32)
+            candidates = posting if candidates is None else np.intersect1d(candidates, posting, assume_unique=True)
+            if len(candidates) == 0:
+                return candidates
+        # Trigram hits are a superset; confirm the full substring
+        return np.array([c for c in candidates if query in self._values[c]], dtype=np.int32)
+
+    def _value_mask(self, query):
+        # Indexed by code + 1 so that missing values (code -1) never match
+        matched = np.zeros(len(self._values) + 1, dtype=bool)
+        matched[self._matching_values(query.lower()) + 1] = True
+        return matched
+
+    def search(self, query):
+        """Return sorted row positions whose value contains ``query``"""
+        return np.flatnonzero(self._value_mask(query)[self._codes + 1])
+
+    def filter(self, rows, query):
+        """Keep the ``rows`` whose value contains ``query``"""
+        return rows[self._value_mask(query)[self._codes[rows] + 1]]
+
+
+class PrefixIndex:
+    """Sorted string array answering prefix queries with binary search"""
+
+    def __init__(self, values):
+        keys = values.fillna('').astype(str).to_numpy(dtype=str)
+        self._order = np.argsort(keys, kind='stable')
+        self._sorted = keys[self._order]
+
+    def search(self, prefix):
+        lo = np.searchsorted(self._sorted, prefix, side='left')
+        hi = np.searchsorted(self._sorted, prefix + '\U0010ffff', side='left')
+        return np.sort(self._order[lo:hi])
+
+    def filter(self, rows, prefix):
+        # Two binary searches beat a per-row string comparison even on few rows
+        return rows[np.isin(rows, self.search(prefix), assume_unique=True)]
+
+
+class RangeIndex:
+    """Sorted numeric array answering range queries with binary search"""
+
+    def __init__(self, values):
+        self._numbers = alumni_schema.numeric_array(values)
+        valid = np.flatnonzero(~np.isnan(self._numbers))
+        order = np.argsort(self._numbers[valid], kind='stable')
+        self._order = valid[order]
+        self._sorted = self._numbers[self._order]
+
+    def search(self, low=None, high=None):
+        lo = 0 if low is None else np.searchsorted(self._sorted, low, side='left')
+        hi = len(self._sorted) if high is None else np.searchsorted(self._sorted, high, side='right')
+        return np.sort(self._order[lo:hi])
+
+    def filter(self, rows, low=None, high=None):
+        numbers = self._numbers[rows]
+        # NaN fails both comparisons, as in search()
+        keep = ~np.isnan(numbers)
+        if low is not None:
+            keep &= numbers >= low
+        if high is not None:
+            keep &= numbers <= high
+        return rows[keep]
+
+
+class CategoryIndex:
+    """Exact-match row lists for a low-cardinality column"""
+
+    def __init__(self, values):
+        codes, uniques = pd.factorize(values)
+        self._codes = codes
+        self._lookup = {value: code for code, value in enumerate(uniques)}
+        self._rows = {value: np.flatnonzero(codes == code) for code, value in enumerate(uniques)}
+
+    @property
+    def values(self):
+        return sorted(self._rows)
+
+    def search(self, value):
+        return self._rows.get(value, np.empty(0, dtype=np.intp))
+
+    def filter(self, rows, value):
+        code = self._lookup.get(value)
+        return rows[:0] if code is None else rows[self._codes[rows] == code]
+
+
+class SearchIndex:
+    """All indexes needed by the search page for one dataset version"""
+
+    def __init__(self, data):
+        self.size = len(data)
+        self._data = data
+        self._ranks = {}
+        self.text = {key: NgramIndex(data[column]) for key, column in TEXT_FILTERS.items()}
+        self.npm = PrefixIndex(data['NPM'])
+        self.gaji = RangeIndex(data['Rata-rata Gaji'])
+        self.program_studi = CategoryIndex(data['Program Studi'])
+
+    @alumni_profiler.profiled('search.filter')
+    def search(self, filters, previous=None):
+        """Return sorted row positions matching all filters, or None when unfiltered
+
+        ``previous`` is the (filters, rows) of an earlier search on this
+        index. When ``filters`` can only match a subset of it (see
+        ``narrowed_filters``), just the changed filters are checked, and
+        only against the earlier rows.
+        """
+        if previous is not None and previous[1] is not None:
+            changed = narrowed_filters(previous[0], filters)
+            alumni_profiler.cache_event('search.previous', changed is not None)
+            if changed is not None:
+                return self._refine(previous[1], {key: filters[key] for key in changed})
+
+        results = []
+        for key, index in self.text.items():
+            if filters.get(key):
+                results.append(index.search(filters[key]))
+        if filters.get('npm'):
+            results.append(self.npm.search(filters['npm']))
+        if filters.get('program_studi'):
+            results.append(self.program_studi.search(filters['program_studi']))
+        if filters.get('gaji_min') or filters.get('gaji_max'):
+            results.append(self.gaji.search(filters.get('gaji_min') or None, filters.get('gaji_max') or None))
+        if not results:
+            return None
+
+        # Intersect starting from the most selective filter
+        results.sort(key=len)
+        rows = results[0]
+        for other in results[1:]:
+            if len(rows) == 0:
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def _refine(self, rows, filters):
+        """Keep the ``rows`` that also match ``filters`` (order is preserved)"""
+        for key, index in self.text.items():
+            if filters.get(key):
+                rows = index.filter(rows, filters[key])
+        if filters.get('npm'):
+            rows = self.npm.filter(rows, filters['npm'])
+        if filters.get('program_studi'):
+            rows = self.program_studi.filter(rows, filters['program_studi'])
+        if filters.get('gaji_min') or filters.get('gaji_max'):
+            rows = self.gaji.filter(rows, filters.get('gaji_min') or None, filters.get('gaji_max') or None)
+        return rows
+
+    def _rank(self, column):
+        rank = self._ranks.get(column)
+        alumni_profiler.cache_event('search.rank', rank is not None)
+        if rank is None:
+            rank = self._data[column].rank(method='first', na_option='keep').to_numpy(dtype=float)
+            self._ranks[column] = rank
+        return rank
+
+    def sort_keys(self, column, ascending=True):
+        """One distinct float per row giving its place in the ``column`` order
+
+        Ties keep row order (reversed when descending) and missing values
+        always sort last, as in ``sort``.
+        """
+        keys = self._rank(column) if ascending else -self._rank(column)
+        missing = np.isnan(keys)
+        if missing.any():
+            keys = keys.copy()
+            # Past every ranked row, in row order
+            keys[missing] = self.size + np.flatnonzero(missing)
+        return keys
+
+    @alumni_profiler.profiled('search.sort')
+    def sort(self, rows, column, ascending=True):
+        """Order ``rows`` by ``column`` using a rank array cached per column
+
+        Missing values always sort last.
+        """
+        return rows[np.argsort(self.sort_keys(column, ascending)[rows], kind='stable')]
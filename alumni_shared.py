@@ -0,0 +1,92 @@
+"""Alumni snapshots shared by several app processes as memory-mapped Arrow files
+
+When the app runs as several Streamlit processes behind a load balancer,
+each one would otherwise read the whole dataset from SQLite into its own
+DataFrame. Instead, the first process to need a version writes it once as
+an uncompressed Arrow IPC file; every process then memory-maps that file.
+Text columns (most of the bytes) stay zero-copy views of the mapping, so
+their pages live once in the OS page cache however many workers there are.
+Only the small numeric and category-code arrays are copied per process.
+
+Files are named after ``alumni_db.data_version`` and never change once
+written, so a worker that sees a new data version simply maps the
+matching file. Without pyarrow every function here is a no-op and the
+store reads from SQLite as before.
+"""
+import os
+import threading
+
+try:
+    import pyarrow as pa
+    from pyarrow import ipc
+except ImportError:  # the store falls back to reading SQLite
+    pa = None
+
+import alumni_schema
+
+# Snapshot files kept per directory; older ones are deleted (mapped copies stay valid on POSIX)
+KEEP = 3
+SUFFIX = '.arrow'
+
+
+def available():
+    return pa is not None
+
+
+def snapshot_dir(db_path):
+    """Directory holding the shared snapshots of ``db_path``"""
+    return os.path.splitext(os.path.abspath(db_path))[0] + '_snapshots'
+
+
+def _path(directory, key):
+    return os.path.join(directory, f'alumni-{key}{SUFFIX}')
+
+
+def write(directory, key, data):
+    """Write ``data`` as the snapshot for data version ``key`` (once; later calls are no-ops)"""
+    if pa is None:
+        return None
+    path = _path(directory, key)
+    if os.path.exists(path):
+        return path
+    os.makedirs(directory, exist_ok=True)
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    # Written under a private name and renamed, so readers never see a partial file
+    temporary = f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'
+    try:
+        with pa.OSFile(temporary, 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    _prune(directory, path)
+    return path
+
+
+def _prune(directory, newest):
+    snapshots = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(SUFFIX)]
+    snapshots.sort(key=lambda path: (path != newest, -os.path.getmtime(path)))
+    for path in snapshots[KEEP:]:
+        try:
+            os.remove(path)
+        except OSError:
+            # Still mapped on Windows, or already removed by another worker
+            pass
+
+
+def read(directory, key):
+    """Memory-map the snapshot for data version ``key``; None if it was never written"""
+    if pa is None:
+        return None
+    try:
+        source = pa.memory_map(_path(directory, key))
+    except FileNotFoundError:
+        return None
+    # The mapping stays open as long as any column still references its buffers
+    data = ipc.open_file(source).read_all().to_pandas()
+    for col in alumni_schema.CATEGORY_COLUMNS:
+        if col in data:
+            categories = data[col].cat.categories
+            data[col] = data[col].cat.rename_categories(categories.astype(alumni_schema.TEXT_DTYPE))
+    return data
@@ -0,0 +1,131 @@
+"""Precomputed aggregates for the Beranda, Statistik and sidebar views"""
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+GROUP_COLUMNS = ['Program Studi', 'Angkatan', 'Peminatan', 'Nama Perusahaan']
+# Every column the aggregates read
+SOURCE_COLUMNS = GROUP_COLUMNS + ['Rata-rata Gaji', 'Tahun Lulus']
+
+
+def _nan_to_none(value):
+    return None if pd.isna(value) else value
+
+
+class AlumniStats:
+    """Counts and salary aggregates for one dataset version
+
+    Built from a single groupby over the raw rows, or from the summary
+    tables the database maintains (``alumni_summary``); after that every
+    figure the pages need is read from small dictionaries.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.group_counts = {col: Counter() for col in GROUP_COLUMNS}
+        self.gaji_count = 0
+        self.gaji_sum = 0.0
+        self.gaji_min = None
+        self.gaji_max = None
+        self.lulus_count = 0
+        self.lulus_sum = 0.0
+        # Column -> value -> [salary sum, salary count, salary min, salary max]
+        self.group_gaji = {col: {} for col in GROUP_COLUMNS}
+
+    @classmethod
+    def from_frame(cls, data):
+        """Compute all aggregates in one pass over ``data``"""
+        stats = cls()
+        frame = data[GROUP_COLUMNS].assign(
+            gaji=pd.to_numeric(data['Rata-rata Gaji'], errors='coerce'),
+            lulus=pd.to_numeric(data['Tahun Lulus'], errors='coerce'),
+        )
+        cube = frame.groupby(GROUP_COLUMNS, dropna=False, observed=True, sort=False).agg(
+            rows=('gaji', 'size'),
+            gaji_count=('gaji', 'count'),
+            gaji_sum=('gaji', 'sum'),
+            gaji_min=('gaji', 'min'),
+            gaji_max=('gaji', 'max'),
+            lulus_count=('lulus', 'count'),
+            lulus_sum=('lulus', 'sum'),
+        )
+        if cube.empty:
+            return stats
+
+        # Everything below works on the (small) cube, not on the rows
+        stats.total = int(cube['rows'].sum())
+        stats.gaji_count = int(cube['gaji_count'].sum())
+        stats.gaji_sum = float(cube['gaji_sum'].sum())
+        stats.gaji_min = _nan_to_none(cube['gaji_min'].min())
+        stats.gaji_max = _nan_to_none(cube['gaji_max'].max())
+        stats.lulus_count = int(cube['lulus_count'].sum())
+        stats.lulus_sum = float(cube['lulus_sum'].sum())
+        for col in GROUP_COLUMNS:
+            groups = cube.groupby(level=col, observed=True, sort=False).agg(
+                {'rows': 'sum', 'gaji_sum': 'sum', 'gaji_count': 'sum', 'gaji_min': 'min', 'gaji_max': 'max'})
+            groups = groups[groups.index.notna()]
+            stats.group_counts[col] = Counter(dict(zip(groups.index, groups['rows'].astype(int).tolist())))
+            stats.group_gaji[col] = {
+                k: [total, count, _nan_to_none(low), _nan_to_none(high)]
+                for k, total, count, low, high in zip(
+                    groups.index, groups['gaji_sum'].astype(float).tolist(), groups['gaji_count'].astype(int).tolist(),
+                    groups['gaji_min'].tolist(), groups['gaji_max'].tolist())
+            }
+        return stats
+
+    @classmethod
+    def from_summary(cls, rows, total_group):
+        """Rebuild the aggregates from ``alumni_summary.fetch_rows`` output"""
+        stats = cls()
+        for column, value, count, gaji_count, gaji_sum, gaji_min, gaji_max, lulus_count, lulus_sum in rows:
+            if column == total_group:
+                stats.total = count
+                stats.gaji_count, stats.gaji_sum = gaji_count, float(gaji_sum)
+                stats.gaji_min, stats.gaji_max = gaji_min, gaji_max
+                stats.lulus_count, stats.lulus_sum = lulus_count, float(lulus_sum)
+            elif column in stats.group_counts:
+                stats.group_counts[column][value] = count
+                stats.group_gaji[column][value] = [float(gaji_sum), gaji_count, gaji_min, gaji_max]
+        return stats
+
+    # Read accessors used by the pages
+
+    def counts(self, column):
+        """Value counts of ``column`` ordered by frequency"""
+        counter = self.group_counts[column]
+        return pd.Series(dict(counter.most_common()), dtype='int64')
+
+    def nunique(self, column):
+        return len(self.group_counts[column])
+
+    def top(self, column, n=10):
+        return self.group_counts[column].most_common(n)
+
+    @property
+    def gaji_mean(self):
+        return self.gaji_sum / self.gaji_count if self.gaji_count else np.nan
+
+    @property
+    def tahun_lulus_mean(self):
+        return self.lulus_sum / self.lulus_count if self.lulus_count else None
+
+    @property
+    def angkatan_range(self):
+        values = self.group_counts['Angkatan']
+        return (min(values), max(values)) if values else (None, None)
+
+    def peminatan_gaji_mean(self):
+        """Mean salary per Peminatan, highest first"""
+        means = {k: total / count for k, (total, count, _, _) in self.group_gaji['Peminatan'].items() if count}
+        return pd.Series(means, dtype='float64').sort_values(ascending=False)
+
+    def salary_by(self, column):
+        """Alumni count and salary mean/min/max per value of ``column``, largest group first"""
+        rows = [
+            {column: k, 'Jumlah Alumni': self.group_counts[column][k],
+             'Rata-rata Gaji': total / count if count else np.nan, 'Gaji Terendah': low, 'Gaji Tertinggi': high}
+            for k, (total, count, low, high) in self.group_gaji[column].items()
+        ]
+        frame = pd.DataFrame(rows, columns=[column, 'Jumlah Alumni', 'Rata-rata Gaji', 'Gaji Terendah', 'Gaji Tertinggi'])
+        return frame.sort_values('Jumlah Alumni', ascending=False, ignore_index=True)
@@ -0,0 +1,467 @@
+"""Process-wide, versioned alumni dataset shared by all sessions"""
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+import alumni_company
+import alumni_db
+import alumni_fts
+import alumni_pool
+import alumni_profiler
+import alumni_schema
+import alumni_search
+import alumni_shared
+import alumni_stats
+import alumni_summary
+import alumni_sync
+
+# Most records committed in one write-queue transaction
+MAX_BATCH = 200
+# Seconds between checks for writes made by other app processes
+REFRESH_INTERVAL = 1.0
+
+# Outcome of one queued write: the snapshot that contains it and whether the NPM was new
+WriteResult = namedtuple('WriteResult', ['snapshot', 'created'])
+
+
+class Snapshot:
+    """Read-only view of the alumni data at one version
+
+    Pass ``loader`` instead of ``data`` to defer reading the rows until a
+    page first asks for ``data``; attached artifacts such as ``stats`` are
+    available without it. ``version`` counts the versions published by
+    this process; ``key`` is the database's ``alumni_db.data_version``,
+    the same in every process (None for data not read from a database).
+    """
+
+    def __init__(self, version, data=None, loader=None, key=None):
+        self.version = version
+        self.key = key
+        self._data = data
+        self._loader = loader
+        self._derived = {}
+        self._columns = {}
+        self._lock = threading.Lock()
+        # One lock per artifact, so a slow build never holds up readers of another
+        self._build_locks = {}
+        self._load_lock = threading.Lock()
+        self._on_load = []
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    @property
+    def data(self):
+        if self._data is None:
+            callbacks = []
+            with self._load_lock:
+                if self._data is None:
+                    with alumni_profiler.timed('store.load'):
+                        self._data = self._loader()
+                    self._loader = None
+                    callbacks, self._on_load = self._on_load, []
+            for callback in callbacks:
+                callback(self)
+        return self._data
+
+    def when_loaded(self, callback):
+        """Call ``callback(snapshot)`` once the rows are loaded, right away if they already are"""
+        with self._load_lock:
+            if self._data is None:
+                self._on_load.append(callback)
+                return
+        callback(self)
+
+    def derived(self, name, builder, columns=None):
+        """Return an artifact computed from this version, building it once
+
+        ``columns`` lists the columns the artifact reads; it then survives
+        updates that touch none of them (None means it depends on all).
+        """
+        try:
+            artifact = self._derived[name]
+            alumni_profiler.cache_event(f'derived.{name}', True)
+            return artifact
+        except KeyError:
+            pass
+        with self._lock:
+            build_lock = self._build_locks.setdefault(name, threading.Lock())
+        with build_lock:
+            hit = name in self._derived
+            if not hit:
+                with alumni_profiler.timed(f'build.{name}'):
+                    artifact = builder(self.data)
+                with self._lock:
+                    self._derived[name] = artifact
+                    self._columns[name] = columns
+            alumni_profiler.cache_event(f'derived.{name}', hit)
+            return self._derived[name]
+
+    def peek(self, name):
+        """The artifact ``name`` if this version has it already, else None; never builds"""
+        return self._derived.get(name)
+
+    def attach(self, name, artifact, columns=None):
+        """Provide an artifact built elsewhere (e.g. from the database) for this version"""
+        with self._lock:
+            self._derived[name] = artifact
+            self._columns[name] = columns
+
+    def carry_forward(self, previous, appended=None, changed=()):
+        """Reuse the artifacts of ``previous`` that this version does not invalidate
+
+        ``changed`` names the columns overwritten in existing rows: artifacts
+        reading any of them are dropped. When ``appended`` rows are given,
+        artifacts exposing ``appended(rows)`` are updated incrementally and
+        the rest dropped. Dropped artifacts are rebuilt on first use; ones
+        this version already has (see ``attach``) are left alone.
+        """
+        for name, artifact in list(previous._derived.items()):
+            if name in self._derived:
+                continue
+            columns = previous._columns.get(name)
+            if changed and (columns is None or set(columns) & set(changed)):
+                continue
+            if appended is not None and len(appended):
+                append = getattr(artifact, 'appended', None)
+                if append is None:
+                    continue
+                artifact = append(appended)
+            self._derived[name] = artifact
+            self._columns[name] = columns
+
+
+class WriteQueue:
+    """Background writer that commits queued records in batches
+
+    Records that arrive while a batch is being written are committed
+    together in the next one, so a burst of submits shares a single
+    transaction and a single snapshot publish.
+    """
+
+    def __init__(self, write_batch, max_batch=MAX_BATCH):
+        self._write_batch = write_batch
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, record):
+        """Queue one record; the returned Future resolves to its WriteResult"""
+        future = Future()
+        self._queue.put((record, future))
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='alumni-writer', daemon=True)
+                self._thread.start()
+        return future
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            futures = [future for _, future in batch]
+            alumni_profiler.count('writer.batches')
+            alumni_profiler.count('writer.records', len(batch))
+            try:
+                outcomes = self._write_batch([record for record, _ in batch])
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, outcome in zip(futures, outcomes):
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+
+
+class AlumniStore:
+    """Holds the current snapshot and publishes a new one on every write
+
+    Readers grab ``snapshot()`` without locking and must treat its frame as
+    read-only; writers are serialized and swap in a fresh snapshot, so a
+    rerun that is still using the old version is never affected. Every
+    snapshot comes with its ``stats`` read from the summary tables and its
+    ``company_aliases`` read from the alias table, on the same connection
+    that loaded (or wrote) its rows.
+
+    Several app processes can serve the same database: each version's rows
+    are shared through ``alumni_shared`` files, and ``snapshot()`` picks up
+    writes made by the other processes. Callbacks passed to ``subscribe``
+    see every published snapshot.
+    """
+
+    def __init__(self, db_path=alumni_db.DB_PATH, readers=alumni_pool.DEFAULT_SIZE):
+        self.db_path = db_path
+        self.shared_dir = alumni_shared.snapshot_dir(db_path)
+        self._write_lock = threading.Lock()
+        self.writer = WriteQueue(self._write_batch)
+        # Reader pages share read-only connections; all writes go through one connection
+        self.readers = alumni_pool.ConnectionPool(db_path, size=readers, readonly=True)
+        self._writer_pool = alumni_pool.ConnectionPool(db_path, size=1)
+        self._checked = time.monotonic()
+        self._listeners = []
+        # Only the summary is read up front; the rows load when a page needs them
+        with self.readers.connection() as conn, alumni_db.read_transaction(conn):
+            self._data_version = alumni_db.data_version(conn)
+            self._snapshot = self._with_stats(Snapshot(1, loader=self._load_rows, key=self._data_version), conn)
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def snapshot(self):
+        """Return the current snapshot, first picking up writes made by other processes"""
+        self._refresh()
+        return self._snapshot
+
+    def subscribe(self, listener):
+        """Call ``listener(snapshot)`` with the current snapshot and every one published after it
+
+        Listeners run on the publishing thread, under the writer lock: they
+        should only hand the snapshot over (e.g. to ``alumni_warmup.Warmer``).
+        """
+        with self._write_lock:
+            self._listeners.append(listener)
+            listener(self._snapshot)
+
+    def _set_snapshot(self, snapshot, key):
+        self._snapshot = snapshot
+        self._data_version = key
+        for listener in self._listeners:
+            listener(snapshot)
+        return snapshot
+
+    def _refresh(self):
+        """Publish a new version if another process changed the database (checked at most once a second)"""
+        now = time.monotonic()
+        if now - self._checked < REFRESH_INTERVAL:
+            return
+        self._checked = now
+        with self.readers.connection() as conn:
+            if alumni_db.data_version(conn) == self._data_version:
+                return
+            with self._write_lock:
+                # Our own writer may have published it meanwhile
+                if alumni_db.data_version(conn) != self._data_version:
+                    self._publish(conn)
+
+    @staticmethod
+    def _with_stats(snapshot, conn):
+        with alumni_profiler.timed('store.summary'):
+            snapshot.attach('stats', alumni_summary.load_stats(conn), alumni_stats.SOURCE_COLUMNS)
+            snapshot.attach('company_aliases', alumni_company.load_aliases(conn), alumni_company.SOURCE_COLUMNS)
+        return snapshot
+
+    def _share(self, key, data):
+        """Offer ``data`` to the other app processes as data version ``key``"""
+        try:
+            alumni_shared.write(self.shared_dir, key, data)
+        except OSError:
+            # Sharing only saves the other processes a load; they fall back to SQLite
+            pass
+
+    def _read_rows(self, conn, key):
+        """Rows at data version ``key``: the shared snapshot if one exists, else SQLite (then shared)
+
+        Call inside a read transaction that also read ``key``.
+        """
+        data = alumni_shared.read(self.shared_dir, key)
+        if data is None:
+            data = alumni_db.fetch_alumni(conn)
+            self._share(key, data)
+        return data
+
+    def _load_rows(self):
+        """Rows of a lazily published snapshot
+
+        Rows committed after that version was published but before its
+        first load are included; every later version is loaded eagerly.
+        """
+        with self.readers.connection() as conn, alumni_db.read_transaction(conn):
+            return self._read_rows(conn, alumni_db.data_version(conn))
+
+    def _publish(self, conn):
+        """Publish the database contents as the next version (rows stay lazy if never loaded)"""
+        with alumni_db.read_transaction(conn):
+            key = alumni_db.data_version(conn)
+            if self._snapshot.loaded:
+                snapshot = Snapshot(self._snapshot.version + 1, self._read_rows(conn, key), key=key)
+            else:
+                snapshot = Snapshot(self._snapshot.version + 1, loader=self._load_rows, key=key)
+            return self._set_snapshot(self._with_stats(snapshot, conn), key)
+
+    @alumni_profiler.profiled('store.query')
+    def query(self, filters=None):
+        """Run a filtered query against the database"""
+        with self.readers.connection() as conn:
+            return alumni_db.fetch_alumni(conn, filters)
+
+    @alumni_profiler.profiled('store.detail')
+    def detail(self, npm):
+        """Fetch one alumnus by NPM from the database"""
+        with self.readers.connection() as conn:
+            return alumni_db.fetch_alumni_by_npm(conn, alumni_db.normalize_npm(npm))
+
+    @alumni_profiler.profiled('store.count')
+    def count(self):
+        """Number of alumni in the database"""
+        with self.readers.connection() as conn:
+            return alumni_db.count_alumni(conn)
+
+    @alumni_profiler.profiled('store.fulltext')
+    def fulltext(self, query, sources=('judul', 'alamat'), limit=100):
+        """Rank alumni by full-text relevance of thesis title and company address"""
+        with self.readers.connection() as conn:
+            return alumni_fts.search(conn, query, sources, limit)
+
+    @alumni_profiler.profiled('store.add')
+    def add(self, record):
+        """Upsert one alumni record through the write queue and wait for it
+
+        Returns a WriteResult; the record is part of ``result.snapshot``.
+        """
+        return self.writer.submit(record).result()
+
+    def _write_batch(self, records):
+        """Upsert records in one transaction and publish them; one outcome per record
+
+        Each record runs under its own savepoint, so a record that violates
+        a constraint is reported (as its exception) without failing the rest.
+        """
+        npms = [alumni_db.normalize_npm(record.get('NPM')) for record in records]
+        outcomes = []
+        with self._write_lock, self._writer_pool.connection() as conn:
+            # IMMEDIATE takes the write lock now, so no other process commits in between
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                base = alumni_db.data_version(conn)
+                known = alumni_db.existing_npms(conn, [npm for npm in npms if npm])
+                for npm, record in zip(npms, records):
+                    if not npm:
+                        outcomes.append(ValueError("NPM wajib diisi"))
+                        continue
+                    conn.execute('SAVEPOINT record')
+                    try:
+                        alumni_db.write_frame(conn, pd.DataFrame([record]), upsert=True)
+                    except sqlite3.Error as e:
+                        conn.execute('ROLLBACK TO record')
+                        outcomes.append(e)
+                    else:
+                        outcomes.append(npm not in known)
+                        known.add(npm)
+                    conn.execute('RELEASE record')
+                key = alumni_db.data_version(conn)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            written = [npm for npm, outcome in zip(npms, outcomes) if not isinstance(outcome, Exception)]
+            if written and base != self._data_version:
+                # Another process wrote since our last version: the rows in memory are stale
+                self._publish(conn)
+            elif written:
+                rows = alumni_db.fetch_alumni_by_npms(conn, written)
+                self._publish_rows(rows, conn, key)
+        snapshot = self._snapshot
+        return [outcome if isinstance(outcome, Exception) else WriteResult(snapshot, outcome) for outcome in outcomes]
+
+    def _publish_rows(self, rows, conn, key, deleted=()):
+        """Publish data version ``key``: the previous one with ``rows`` updated or appended, ``deleted`` NPMs removed"""
+        previous = self._snapshot
+        if not previous.loaded:
+            return self._publish(conn)
+        positions = previous.derived('npm_positions', alumni_search.npm_positions, ['NPM'])
+        existing = np.array([npm in positions for npm in rows['NPM']], dtype=bool)
+        updated, inserted = rows[existing], rows[~existing]
+        data, changed = previous.data, set()
+        if len(updated):
+            locations = [positions[npm] for npm in updated['NPM']]
+            changed = alumni_schema.changed_columns(data.iloc[locations], updated)
+            data = alumni_schema.replace_rows(data, locations, updated, changed)
+        if len(inserted):
+            data = alumni_schema.append_rows(data, inserted)
+        removed = [positions[npm] for npm in deleted if npm in positions]
+        if removed:
+            # Row positions shift: no artifact of the previous version still applies
+            data = alumni_schema.drop_rows(data, removed)
+            changed = set(data.columns)
+        snapshot = self._with_stats(Snapshot(previous.version + 1, data, key=key), conn)
+        snapshot.carry_forward(previous, inserted, changed)
+        # Not shared here, which would write the whole dataset under the lock: a process that
+        # needs this version reads it from SQLite and shares it then (see _read_rows)
+        return self._set_snapshot(snapshot, key)
+
+    @alumni_profiler.profiled('store.sync')
+    def sync_workbook(self, path=alumni_db.EXCEL_PATH, force=False):
+        """Apply what changed in the workbook since the last sync and publish only those rows
+
+        Returns the ``alumni_sync.Delta`` applied, or None when the file is
+        unchanged (then it is not even parsed, unless ``force``).
+        """
+        if not force:
+            with self.readers.connection() as conn:
+                if not alumni_sync.file_changed(conn, path):
+                    return None
+        # Parsing is the slow part and needs no lock; rows are checked against the published ones like uploads
+        data = self.snapshot().data
+        with self.readers.connection() as conn:
+            existing = alumni_sync.published_elsewhere(conn, alumni_sync.source_name(path), data)
+        workbook = alumni_sync.read_workbook(path, existing)
+        with self._write_lock, self._writer_pool.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                base = alumni_db.data_version(conn)
+                delta = alumni_sync.apply(conn, alumni_sync.diff(conn, workbook))
+                key = alumni_db.data_version(conn)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            if key != base and base != self._data_version:
+                self._publish(conn)
+            elif key != base:
+                self._publish_rows(alumni_db.fetch_alumni_by_npms(conn, delta.upserted), conn, key, delta.deleted)
+        return delta
+
+    @alumni_profiler.profiled('store.apply')
+    def apply(self, write):
+        """Run ``write(conn)`` under the writer lock and publish the result
+
+        Returns whatever ``write`` returns; the new snapshot is available
+        from ``snapshot()`` afterwards.
+        """
+        with self._write_lock:
+            with self._writer_pool.connection() as conn:
+                result = write(conn)
+                self._publish(conn)
+            return result
+
+    def replace(self, df):
+        """Replace the whole dataset with a cleaned frame"""
+        self.apply(lambda conn: alumni_db.import_frame(conn, df, replace=True))
+        return self._snapshot
+
+    def reload(self):
+        """Publish the current database contents as a new version"""
+        self.apply(lambda conn: None)
+        return self._snapshot
@@ -0,0 +1,248 @@
+"""Materialized summary tables kept up to date by SQLite triggers
+
+``ringkasan_kelompok`` holds, per group (Program Studi, Angkatan,
+Peminatan, Nama Perusahaan and the whole dataset as ``Semua``), the number
+of alumni and the salary and graduation-year sums. ``ringkasan_gaji``
+counts each distinct salary per group, so the lowest and highest salary of
+a group stay one index seek away even after rows are deleted.
+
+Every insert, update and delete on the four alumni tables adjusts only the
+groups of the alumnus it touches: the trigger subtracts the alumnus as it
+was and adds it as it is now. Reading the statistics therefore costs a few
+hundred rows however many alumni there are.
+"""
+from contextlib import contextmanager
+
+import alumni_stats
+
+TOTAL_GROUP = 'Semua'
+
+# Group column -> expression over the alumnus row built by ALUMNUS_SQL
+GROUP_EXPRESSIONS = {
+    TOTAL_GROUP: "''",
+    'Program Studi': 'a.program_studi',
+    'Angkatan': 'a.angkatan',
+    'Peminatan': 'a.peminatan',
+    'Nama Perusahaan': 'a.nama_perusahaan',
+}
+
+TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS ringkasan_kelompok (
+        kolom TEXT NOT NULL,
+        nilai NOT NULL,
+        jumlah INTEGER NOT NULL,
+        gaji_jumlah INTEGER NOT NULL,
+        gaji_total INTEGER NOT NULL,
+        lulus_jumlah INTEGER NOT NULL,
+        lulus_total INTEGER NOT NULL,
+        PRIMARY KEY (kolom, nilai)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ringkasan_gaji (
+        kolom TEXT NOT NULL,
+        nilai NOT NULL,
+        gaji INTEGER NOT NULL,
+        jumlah INTEGER NOT NULL,
+        PRIMARY KEY (kolom, nilai, gaji)
+    ) WITHOUT ROWID
+    """,
+    # Let the triggers find emptied groups without scanning
+    'CREATE INDEX IF NOT EXISTS ix_ringkasan_kelompok_kosong ON ringkasan_kelompok(kolom) WHERE jumlah = 0',
+    'CREATE INDEX IF NOT EXISTS ix_ringkasan_gaji_kosong ON ringkasan_gaji(kolom) WHERE jumlah = 0',
+]
+
+# One alumnus (or all of them) as its group values, salary and graduation year.
+# Each table placeholder is the table itself or a one-row image of old/new.
+ALUMNUS_SQL = """
+    SELECT m.program_studi, m.angkatan, r.peminatan, r.tahun_lulus, p.nama_perusahaan,
+           k.rata_rata_gaji AS gaji
+    FROM {mahasiswa} m
+    LEFT JOIN {riwayat_akademis} r ON r.npm = m.npm
+    LEFT JOIN {karier} k ON k.npm = m.npm
+    LEFT JOIN {perusahaan} p ON p.id_karyawan = k.id_karyawan
+    WHERE m.npm {npm}
+"""
+
+# Columns of each table that ALUMNUS_SQL reads
+TABLE_COLUMNS = {
+    'mahasiswa': ['npm', 'program_studi', 'angkatan'],
+    'riwayat_akademis': ['npm', 'peminatan', 'tahun_lulus'],
+    'karier': ['npm', 'id_karyawan', 'rata_rata_gaji'],
+    'perusahaan': ['id_karyawan', 'nama_perusahaan'],
+}
+
+UPDATE_KELOMPOK = """
+    INSERT INTO ringkasan_kelompok (kolom, nilai, jumlah, gaji_jumlah, gaji_total, lulus_jumlah, lulus_total)
+    SELECT kolom, nilai, SUM(arah), SUM(arah * (gaji IS NOT NULL)), SUM(arah * IFNULL(gaji, 0)),
+           SUM(arah * (tahun_lulus IS NOT NULL)), SUM(arah * IFNULL(tahun_lulus, 0))
+    FROM ({groups}) WHERE nilai IS NOT NULL
+    GROUP BY kolom, nilai
+    ON CONFLICT (kolom, nilai) DO UPDATE SET
+        jumlah = jumlah + excluded.jumlah,
+        gaji_jumlah = gaji_jumlah + excluded.gaji_jumlah,
+        gaji_total = gaji_total + excluded.gaji_total,
+        lulus_jumlah = lulus_jumlah + excluded.lulus_jumlah,
+        lulus_total = lulus_total + excluded.lulus_total
+"""
+
+UPDATE_GAJI = """
+    INSERT INTO ringkasan_gaji (kolom, nilai, gaji, jumlah)
+    SELECT kolom, nilai, gaji, SUM(arah)
+    FROM ({groups}) WHERE nilai IS NOT NULL AND gaji IS NOT NULL
+    GROUP BY kolom, nilai, gaji HAVING SUM(arah) != 0
+    ON CONFLICT (kolom, nilai, gaji) DO UPDATE SET jumlah = jumlah + excluded.jumlah
+"""
+
+REMOVE_EMPTY = """
+    DELETE FROM ringkasan_kelompok WHERE jumlah = 0;
+    DELETE FROM ringkasan_gaji WHERE jumlah = 0;
+"""
+
+READ_SQL = """
+    SELECT k.kolom, k.nilai, k.jumlah, k.gaji_jumlah, k.gaji_total,
+           (SELECT MIN(g.gaji) FROM ringkasan_gaji g WHERE g.kolom = k.kolom AND g.nilai = k.nilai),
+           (SELECT MAX(g.gaji) FROM ringkasan_gaji g WHERE g.kolom = k.kolom AND g.nilai = k.nilai),
+           k.lulus_jumlah, k.lulus_total
+    FROM ringkasan_kelompok k
+    ORDER BY k.kolom, k.jumlah DESC
+"""
+
+
+def _row_image(table, ref):
+    """One-row subquery standing in for ``table``: the ``old``/``new`` row, or no row if ref is None"""
+    columns = ', '.join(f'{ref}.{col} AS {col}' if ref else f'NULL AS {col}' for col in TABLE_COLUMNS[table])
+    return f'(SELECT {columns})'
+
+
+def _alumni(table=None, ref=None, npm='IS NOT NULL'):
+    images = {name: name for name in TABLE_COLUMNS}
+    if table is not None:
+        images[table] = _row_image(table, ref)
+    return ALUMNUS_SQL.format(npm=npm, **images)
+
+
+def _groups(sources):
+    """Rows (kolom, nilai, gaji, tahun_lulus, arah) for every group of the given alumnus sources
+
+    ``sources`` pairs an ALUMNUS_SQL query with +1 (add) or -1 (subtract).
+    """
+    cases = ' '.join(f"WHEN '{column}' THEN {expression}" for column, expression in GROUP_EXPRESSIONS.items())
+    columns = ' UNION ALL '.join(f"SELECT '{column}' AS kolom" for column in GROUP_EXPRESSIONS)
+    return ' UNION ALL '.join(
+        f'SELECT d.kolom, CASE d.kolom {cases} END AS nilai, a.gaji, a.tahun_lulus, {sign} AS arah '
+        f'FROM ({source}) a, ({columns}) d'
+        for source, sign in sources
+    )
+
+
+def _trigger(name, event, table, sources, when=None):
+    groups = _groups(sources)
+    condition = f' WHEN {when}' if when else ''
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table}{condition} BEGIN
+            {UPDATE_KELOMPOK.format(groups=groups)};
+            {UPDATE_GAJI.format(groups=groups)};
+            {REMOVE_EMPTY}
+        END
+    """
+
+
+def _triggers():
+    triggers = {}
+    for table in ('mahasiswa', 'riwayat_akademis', 'karier'):
+        short = table.split('_')[0]
+        # Before/after images of the changed row; the other tables are read as they are
+        triggers[f'trg_ringkasan_{short}_insert'] = _trigger(
+            f'trg_ringkasan_{short}_insert', 'INSERT', table,
+            [(_alumni(table, None, '= new.npm'), -1), (_alumni(table, 'new', '= new.npm'), 1)])
+        triggers[f'trg_ringkasan_{short}_delete'] = _trigger(
+            f'trg_ringkasan_{short}_delete', 'DELETE', table,
+            [(_alumni(table, 'old', '= old.npm'), -1), (_alumni(table, None, '= old.npm'), 1)])
+        triggers[f'trg_ringkasan_{short}_update'] = _trigger(
+            f'trg_ringkasan_{short}_update', 'UPDATE', table,
+            [(_alumni(table, 'old', '= old.npm'), -1), (_alumni(table, 'new', '= new.npm'), 1)])
+    # A renamed company moves every alumnus working there
+    employees = 'IN (SELECT npm FROM karier WHERE id_karyawan = new.id_karyawan)'
+    triggers['trg_ringkasan_perusahaan_update'] = _trigger(
+        'trg_ringkasan_perusahaan_update', 'UPDATE OF nama_perusahaan', 'perusahaan',
+        [(_alumni('perusahaan', 'old', employees), -1), (_alumni('perusahaan', 'new', employees), 1)],
+        when='old.nama_perusahaan IS NOT new.nama_perusahaan')
+    return triggers
+
+
+TRIGGERS = _triggers()
+
+# Full recompute: the join runs once into a temp table, then one plain
+# GROUP BY per group column (cheaper than the triggers' signed union)
+REBUILD_GROUPS = ' UNION ALL '.join(
+    f"SELECT '{column}', {expression}, COUNT(*), COUNT(gaji), IFNULL(SUM(gaji), 0), "
+    f"COUNT(tahun_lulus), IFNULL(SUM(tahun_lulus), 0) FROM temp.ringkasan_alumni a "
+    f"WHERE {expression} IS NOT NULL GROUP BY {expression}"
+    for column, expression in GROUP_EXPRESSIONS.items()
+)
+REBUILD_SALARIES = ' UNION ALL '.join(
+    f"SELECT '{column}', {expression}, gaji, COUNT(*) FROM temp.ringkasan_alumni a "
+    f"WHERE {expression} IS NOT NULL AND gaji IS NOT NULL GROUP BY {expression}, gaji"
+    for column, expression in GROUP_EXPRESSIONS.items()
+)
+REBUILD = [
+    'DELETE FROM ringkasan_kelompok',
+    'DELETE FROM ringkasan_gaji',
+    'DROP TABLE IF EXISTS temp.ringkasan_alumni',
+    f'CREATE TEMP TABLE ringkasan_alumni AS {_alumni()}',
+    f'INSERT INTO ringkasan_kelompok {REBUILD_GROUPS}',
+    f'INSERT INTO ringkasan_gaji {REBUILD_SALARIES}',
+    'DROP TABLE temp.ringkasan_alumni',
+]
+
+
+def _create(conn):
+    for sql in TABLES + list(TRIGGERS.values()):
+        conn.execute(sql)
+
+
+def rebuild(conn):
+    """Recompute every summary row from the alumni tables; the caller owns the transaction"""
+    for sql in REBUILD:
+        conn.execute(sql)
+
+
+def ensure_tables(conn):
+    """Create the summary tables and triggers, rebuilding them if they are out of step"""
+    with conn:
+        _create(conn)
+    summarized = conn.execute(
+        'SELECT IFNULL((SELECT jumlah FROM ringkasan_kelompok WHERE kolom = ?), 0)', [TOTAL_GROUP]
+    ).fetchone()[0]
+    if summarized != conn.execute('SELECT COUNT(*) FROM mahasiswa').fetchone()[0]:
+        with conn:
+            rebuild(conn)
+
+
+@contextmanager
+def bulk_load(conn):
+    """Suspend per-row summary maintenance for a bulk write and recompute once at the end
+
+    Same contract as ``alumni_fts.bulk_load``: run it inside the caller's
+    transaction so a failed write also restores the triggers.
+    """
+    if not conn.in_transaction:
+        conn.execute('BEGIN')
+    for name in TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+    yield
+    _create(conn)
+    rebuild(conn)
+
+
+def fetch_rows(conn):
+    """Every summary group as (kolom, nilai, jumlah, gaji_jumlah, gaji_total, gaji_min, gaji_max,
+    lulus_jumlah, lulus_total)"""
+    return conn.execute(READ_SQL).fetchall()
+
+
+def load_stats(conn):
+    """AlumniStats for the current database contents, read from the summary tables"""
+    return alumni_stats.AlumniStats.from_summary(fetch_rows(conn), TOTAL_GROUP)
@@ -0,0 +1,278 @@
+"""Delta sync from the alumni workbook into the database
+
+The workbook and the database are edited separately. Instead of importing
+the whole sheet again, a sync writes only what changed in the workbook
+since the previous sync:
+
+- every workbook row is fingerprinted by its NPM and a hash of its values
+  as they would be stored (``alumni_db.stored_values``)
+- rows whose fingerprint differs from the one recorded by the previous
+  sync (or, the first time, from the row in the database) are inserted
+  or updated; NPMs that left the workbook are deleted. Alumni added
+  through the app were never in the workbook and are left alone
+- rows failing the ``alumni_quality`` checks are quarantined; the
+  database keeps their last good version until they are fixed
+- every change is appended to ``log_perubahan`` (aksi tambah, ubah or
+  hapus) with the data version that contains it, an incremental feed of
+  what each sync did
+
+The per-row triggers keep the full-text and summary tables current and
+the store publishes only the changed rows, so everything after parsing
+the workbook costs time proportional to the changes. A workbook file
+identical to the one synced last is not parsed at all.
+
+    python alumni_sync.py                  # sync the default workbook
+    python alumni_sync.py --log 20         # show the last changes
+"""
+import argparse
+import hashlib
+import os
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+import alumni_db
+import alumni_quality
+
+STORED_COLUMNS = [col for col in alumni_db.COLUMNS if col != 'No']
+
+TABLES = [
+    # The workbook file last synced per source
+    """
+    CREATE TABLE IF NOT EXISTS sidik_berkas (
+        sumber TEXT PRIMARY KEY,
+        sidik TEXT NOT NULL,
+        disinkron TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # Fingerprint of every row as of the last sync
+    """
+    CREATE TABLE IF NOT EXISTS sidik_baris (
+        sumber TEXT NOT NULL,
+        npm TEXT NOT NULL,
+        sidik INTEGER NOT NULL,
+        PRIMARY KEY (sumber, npm)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS log_perubahan (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        versi TEXT NOT NULL,
+        sumber TEXT NOT NULL,
+        npm TEXT NOT NULL,
+        aksi TEXT NOT NULL,
+        kolom TEXT,
+        waktu TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+]
+
+
+def create_tables(conn):
+    """Create the fingerprint and change-log tables"""
+    with conn:
+        for sql in TABLES:
+            conn.execute(sql)
+
+
+def source_name(path):
+    return os.path.basename(path)
+
+
+def file_fingerprint(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_changed(conn, path):
+    """Whether the workbook differs from the one synced last (or was never synced)"""
+    row = conn.execute('SELECT sidik FROM sidik_berkas WHERE sumber = ?', [source_name(path)]).fetchone()
+    return row is None or row[0] != file_fingerprint(path)
+
+
+def _as_text(stored):
+    # The same value reads the same whether it came from the workbook or from SQLite
+    return stored[STORED_COLUMNS].astype('string').fillna('\0')
+
+
+def row_fingerprints(stored):
+    """64-bit hash of each row of stored values, signed so SQLite can keep it"""
+    return pd.util.hash_pandas_object(_as_text(stored), index=False).to_numpy().view(np.int64)
+
+
+class Workbook:
+    """The rows of one workbook, cleaned, checked and fingerprinted for a sync
+
+    Rows failing ``alumni_quality`` checks are left out (and quarantined
+    when the sync is applied), like in a full import. Their NPMs are
+    ``held``: the published row and its fingerprint stay as they are.
+    """
+
+    def __init__(self, source, frame, fingerprint=None, quality=None):
+        self.source = source
+        self.frame = frame
+        self.fingerprint = fingerprint
+        self.quality = quality
+        self.stored = alumni_db.stored_values(frame).set_index('NPM', drop=False)
+        self.stored.index.name = None
+        self.fingerprints = pd.Series(row_fingerprints(self.stored), index=self.stored.index)
+        quarantined = quality.quarantined()['NPM'] if quality is not None else []
+        self.held = pd.Index({npm for npm in map(alumni_db.normalize_npm, quarantined) if npm}, dtype=object)
+
+
+def published_elsewhere(conn, source, data):
+    """The published alumni (``data``) that did not come from this workbook
+
+    The workbook's own rows are checked against each other while it is
+    read; these are the ones added through the app or by uploads, which a
+    workbook row may duplicate under another NPM.
+    """
+    synced = [npm for (npm,) in conn.execute('SELECT npm FROM sidik_baris WHERE sumber = ?', [source])]
+    return data[~data['NPM'].isin(synced)]
+
+
+def read_workbook(path=alumni_db.EXCEL_PATH, existing=None):
+    """Read, check and fingerprint the workbook; ``existing`` as for ``alumni_quality.QualityScanner``"""
+    # Fingerprint first: a file saved again while it is read is synced once more next time
+    fingerprint = file_fingerprint(path)
+    raw = pd.read_excel(path, sheet_name=alumni_db.EXCEL_SHEET)
+    quality = alumni_quality.QualityScanner(existing, source=source_name(path))
+    frame = quality.check(raw, alumni_db.clean_alumni_frame(raw))
+    return Workbook(source_name(path), frame, fingerprint, quality)
+
+
+class Delta:
+    """What one sync writes: NPMs to insert, update (with their changed columns) and delete"""
+
+    def __init__(self, workbook, inserted, updated, deleted, recorded, forgotten):
+        self.workbook = workbook
+        self.inserted = inserted
+        self.updated = updated
+        self.deleted = deleted
+        # Fingerprints to record (Series by NPM) and NPMs whose fingerprint is dropped
+        self.recorded = recorded
+        self.forgotten = forgotten
+        # Data version containing the changes, once applied
+        self.version = None
+
+    @property
+    def upserted(self):
+        return self.inserted + list(self.updated)
+
+    def __len__(self):
+        return len(self.inserted) + len(self.updated) + len(self.deleted)
+
+    def counts(self):
+        return {'tambah': len(self.inserted), 'ubah': len(self.updated), 'hapus': len(self.deleted)}
+
+
+def _changed_columns(old, new):
+    """Per NPM (the shared index), the columns whose stored values differ"""
+    old, new = _as_text(old.loc[new.index]), _as_text(new)
+    differs = old.to_numpy() != new.to_numpy()
+    return {npm: [col for col, hit in zip(STORED_COLUMNS, row) if hit]
+            for npm, row in zip(new.index, differs) if row.any()}
+
+
+def diff(conn, workbook):
+    """Compare the workbook with the previous sync and the database; read-only"""
+    recorded = pd.Series(dict(conn.execute('SELECT npm, sidik FROM sidik_baris WHERE sumber = ?',
+                                           [workbook.source]).fetchall()), dtype='int64')
+    fingerprints = workbook.fingerprints
+    same = (fingerprints.index.isin(recorded.index)
+            & (recorded.reindex(fingerprints.index, fill_value=0).to_numpy() == fingerprints.to_numpy()))
+    # New or edited in the workbook since the last sync: only these rows are read from the database
+    candidates = fingerprints.index[~same]
+    current = alumni_db.fetch_stored(conn, candidates)
+    present = candidates.isin(current.index)
+    inserted = candidates[~present].tolist()
+    updated = _changed_columns(current, workbook.stored.loc[candidates[present]])
+    # A row edited into one that fails the checks is not gone: it is re-checked on the next sync
+    gone = recorded.index.difference(fingerprints.index).difference(workbook.held)
+    deleted = sorted(alumni_db.existing_npms(conn, gone))
+    return Delta(workbook, inserted, updated, deleted, fingerprints[~same], gone.tolist())
+
+
+def apply(conn, delta):
+    """Write the delta, its change log and the new fingerprints; the caller owns the transaction"""
+    workbook = delta.workbook
+    if delta.upserted:
+        rows = workbook.stored['NPM'].isin(delta.upserted).to_numpy()
+        alumni_db.write_frame(conn, workbook.frame[rows], upsert=True)
+    if delta.deleted:
+        alumni_db.delete_alumni(conn, delta.deleted)
+    delta.version = alumni_db.data_version(conn)
+    log = ([(npm, 'tambah', None) for npm in delta.inserted]
+           + [(npm, 'ubah', ', '.join(columns)) for npm, columns in delta.updated.items()]
+           + [(npm, 'hapus', None) for npm in delta.deleted])
+    conn.executemany('INSERT INTO log_perubahan (versi, sumber, npm, aksi, kolom) VALUES (?, ?, ?, ?, ?)',
+                     [(delta.version, workbook.source, npm, action, columns) for npm, action, columns in log])
+    conn.executemany('INSERT OR REPLACE INTO sidik_baris (sumber, npm, sidik) VALUES (?, ?, ?)',
+                     [(workbook.source, npm, value) for npm, value in delta.recorded.items()])
+    conn.executemany('DELETE FROM sidik_baris WHERE sumber = ? AND npm = ?',
+                     [(workbook.source, npm) for npm in delta.forgotten])
+    if workbook.fingerprint is not None:
+        conn.execute('INSERT INTO sidik_berkas (sumber, sidik) VALUES (?, ?) ON CONFLICT(sumber) DO UPDATE SET '
+                     'sidik = excluded.sidik, disinkron = CURRENT_TIMESTAMP', [workbook.source, workbook.fingerprint])
+    if workbook.quality is not None:
+        workbook.quality.save(conn)
+    return delta
+
+
+def sync(conn, path=alumni_db.EXCEL_PATH, force=False):
+    """Apply the workbook's changes in one transaction; None if the file is unchanged (unless ``force``)
+
+    Processes serving the data pick the changes up on their next refresh;
+    ``AlumniStore.sync_workbook`` does the same and publishes the changed
+    rows in place.
+    """
+    if not force and not file_changed(conn, path):
+        return None
+    existing = published_elsewhere(conn, source_name(path), alumni_db.fetch_alumni(conn))
+    workbook = read_workbook(path, existing)
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        delta = apply(conn, diff(conn, workbook))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return delta
+
+
+def changes(conn, after=0, limit=1000):
+    """The change log after entry ``after``, oldest first: the feed a consumer polls"""
+    return pd.read_sql_query('SELECT * FROM log_perubahan WHERE id > ? ORDER BY id LIMIT ?', conn,
+                             params=[after, limit])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workbook', default=alumni_db.EXCEL_PATH)
+    parser.add_argument('--force', action='store_true', help="parse the workbook even if the file is unchanged")
+    parser.add_argument('--log', type=int, metavar='N', help="only show the last N changes")
+    args = parser.parse_args()
+
+    with closing(alumni_db.connect(alumni_db.init_database())) as conn:
+        if args.log:
+            last = conn.execute('SELECT IFNULL(MAX(id), 0) FROM log_perubahan').fetchone()[0]
+            log = changes(conn, max(last - args.log, 0))
+            print(log.to_string(index=False) if len(log) else "Belum ada perubahan")
+            return
+        delta = sync(conn, args.workbook, args.force)
+    if delta is None:
+        print("Workbook tidak berubah sejak sinkronisasi terakhir")
+        return
+    counts = delta.counts()
+    print(f"{counts['tambah']} ditambah, {counts['ubah']} diubah, {counts['hapus']} dihapus"
+          + (f" (versi {delta.version})" if len(delta) else ""))
+    for npm, columns in delta.updated.items():
+        print(f"  {npm}: {', '.join(columns)}")
+
+
+if __name__ == '__main__':
+    main()
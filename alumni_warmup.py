@@ -0,0 +1,215 @@
+"""Background precomputation of the artifacts the Beranda and Statistik pages read
+
+The Statistik figures, the salary analytics and the search artifacts used
+to be built inside the rerun of whichever session first asked for them
+after a write. A ``Warmer`` subscribed to the store builds them on its
+own thread as soon as a version is published, and re-runs the searches
+sessions submit most often, so pages usually find them ready.
+
+While a version is still being warmed, ``ready`` hands a page the newest
+artifact already built (from an earlier version) instead of waiting for
+the current one. Only the very first version of a process has nothing to
+fall back on.
+
+Every artifact reads the rows, so a snapshot published before any page
+loaded them (e.g. the store's first one) is warmed once a page first
+loads them: starting the app never reads the whole dataset just to warm
+it. That page builds its own artifact in the rerun; the warmer builds
+the rest meanwhile.
+
+A thread rather than a process pool: the artifacts are plain Python
+objects (Plotly figures, indexes) the pages need in this process, and
+most of the work is NumPy and pandas code that releases the GIL.
+"""
+import threading
+from collections import Counter
+
+import alumni_profiler
+import alumni_query
+import alumni_salary
+import alumni_stats
+
+# Most submitted filter combinations re-run for every new version (besides the unfiltered search)
+COMMON_SEARCHES = 8
+# Filter combinations counted before the rarest ones are forgotten
+MAX_TRACKED = 1000
+# Defaults of the Statistik page's percentile table and trend chart
+DEFAULT_PERCENTILE_GROUPS = ['Program Studi']
+DEFAULT_TREND = ('Tahun Lulus', None, 5)
+
+
+def statistics_figures(snapshot):
+    """Statistik page figures for the given snapshot, built and serialised once per version"""
+    import alumni_charts
+
+    stats = alumni_query.statistics(snapshot)
+    companies = alumni_query.company_counts(snapshot)
+    return snapshot.derived(
+        'figures',
+        lambda data: alumni_charts.serialised(alumni_charts.build_statistics_figures(data, stats, companies)),
+        alumni_stats.SOURCE_COLUMNS
+    )
+
+
+def salary_analytics(snapshot):
+    """Salary percentile/trend engine for the given snapshot, built once per version"""
+    return snapshot.derived('salary', alumni_salary.SalaryAnalytics, alumni_salary.SOURCE_COLUMNS)
+
+
+def trend_name(cohort, by, min_count):
+    return f'salary_trend.{cohort}.{by}.{min_count}'
+
+
+def salary_trend(snapshot, cohort, by=None, min_count=1):
+    """Cohort trend table and its figure (None when the table is empty), built once per version"""
+    import alumni_charts
+
+    def build(data):
+        trends = salary_analytics(snapshot).cohort_trends(cohort, by=by, min_count=min_count)
+        if trends.empty:
+            return trends, None
+        return trends, alumni_charts.SerialisedFigure(alumni_charts.salary_trend_figure(trends, cohort, by))
+
+    return snapshot.derived(trend_name(cohort, by, min_count), build, alumni_salary.SOURCE_COLUMNS)
+
+
+def _warm_salary(snapshot):
+    analytics = salary_analytics(snapshot)
+    analytics.percentiles(DEFAULT_PERCENTILE_GROUPS)
+    return analytics
+
+
+# (name, build) per artifact, in the order they are warmed
+ARTIFACTS = [
+    ('search_index', alumni_query.search_index),
+    ('npm_positions', alumni_query.npm_positions),
+    ('figures', statistics_figures),
+    ('salary', _warm_salary),
+    (trend_name(*DEFAULT_TREND), lambda snapshot: salary_trend(snapshot, *DEFAULT_TREND)),
+]
+
+
+class Warmer:
+    """Builds the artifacts of every published snapshot on one background thread
+
+    Only the newest snapshot is warmed: one published while an older one is
+    still being warmed replaces it.
+    """
+
+    def __init__(self, artifacts=ARTIFACTS, common_searches=COMMON_SEARCHES):
+        self.artifacts = artifacts
+        self.common_searches = common_searches
+        self._searches = Counter()
+        self._latest = {}
+        # name -> the newest version whose build of it failed here
+        self._failed = {}
+        # Version of the newest snapshot published
+        self._published = None
+        self._pending = None
+        self._busy = False
+        self._thread = None
+        self._condition = threading.Condition()
+
+    def publish(self, snapshot):
+        """Warm ``snapshot`` next (the callback for ``AlumniStore.subscribe``)"""
+        with self._condition:
+            self._pending = snapshot
+            self._published = snapshot.version
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='alumni-warmup', daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def record_search(self, filters):
+        """Count one submitted search; the most common ones are warmed for every new version"""
+        with self._condition:
+            self._searches[tuple(sorted(filters.items()))] += 1
+            if len(self._searches) > MAX_TRACKED:
+                self._searches = Counter(dict(self._searches.most_common(MAX_TRACKED // 2)))
+
+    def common_filters(self):
+        """The unfiltered search followed by the most submitted filter combinations"""
+        unfiltered = alumni_query.parse_filters({})
+        with self._condition:
+            common = [dict(key) for key, _ in self._searches.most_common(self.common_searches + 1)]
+        return [unfiltered] + [filters for filters in common if filters != unfiltered][:self.common_searches]
+
+    def ready(self, snapshot, name, build):
+        """``build(snapshot)`` if that would not wait, else the newest artifact ``name`` already warmed
+
+        Returns (artifact, current): ``current`` is False when the artifact
+        belongs to an earlier version. Without any earlier one to show, or
+        when warming this version failed to build it, this builds it after
+        all, so the page reports the error.
+        """
+        artifact = snapshot.peek(name)
+        if artifact is None:
+            latest = self._latest.get(name)
+            failed = self._failed.get(name) == snapshot.version
+            if latest is not None and latest[0] < snapshot.version and not failed:
+                alumni_profiler.cache_event(f'warmup.{name}', False)
+                return latest[1], False
+            artifact = build(snapshot)
+        alumni_profiler.cache_event(f'warmup.{name}', True)
+        return artifact, True
+
+    def wait(self, timeout=None):
+        """Block until every published snapshot is warmed; False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+    def _loaded(self, snapshot):
+        """Warm a snapshot that was waiting for its rows, unless a newer one was published since"""
+        with self._condition:
+            newest = self._published == snapshot.version
+        if newest:
+            self.publish(snapshot)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None)
+                snapshot, self._pending = self._pending, None
+                self._busy = True
+            try:
+                with alumni_profiler.timed('warmup.version'):
+                    self._warm(snapshot)
+            except Exception:
+                # Outside any one build (e.g. the common searches): the thread must live on for the next version
+                alumni_profiler.count('warmup.errors')
+                with self._condition:
+                    for name, _ in self.artifacts:
+                        self._failed[name] = snapshot.version
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _warm(self, snapshot):
+        if not snapshot.loaded:
+            alumni_profiler.count('warmup.deferred')
+            snapshot.when_loaded(self._loaded)
+            return
+        jobs = list(self.artifacts)
+        jobs += [(None, lambda snapshot, filters=filters: alumni_query.search_result(snapshot, filters))
+                 for filters in self.common_filters()]
+        for name, build in jobs:
+            if self._pending is not None:
+                # A newer version is waiting: the rest of this one would never be read
+                alumni_profiler.count('warmup.superseded')
+                return
+            try:
+                artifact = build(snapshot)
+            except Exception:
+                # ready() then builds it again in the page's rerun, which reports the error
+                alumni_profiler.count('warmup.errors')
+                if name is not None:
+                    with self._condition:
+                        self._failed[name] = snapshot.version
+                continue
+            if name is not None:
+                with self._condition:
+                    latest = self._latest.get(name)
+                    if latest is None or latest[0] <= snapshot.version:
+                        self._latest[name] = (snapshot.version, artifact)
+        alumni_profiler.count('warmup.versions')
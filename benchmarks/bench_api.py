@@ -0,0 +1,209 @@
+"""Load-test the alumni HTTP API and report requests per second
+
+    python benchmarks/bench_api.py --rows 100000 --connections 32 --duration 5
+
+A synthetic database of ``--rows`` alumni is served by ``alumni_api`` in a
+separate uvicorn process. ``--connections`` keep-alive clients then send
+requests for ``--duration`` seconds per scenario:
+
+    search       a fixed set of filtered searches (served from the response cache)
+    revalidate   the same searches with If-None-Match (304, no body)
+    uncached     a different salary filter on every request (always computed)
+    paging       walking every page of a search with the ``next`` cursor
+    statistik    the statistics endpoints
+
+Reported per scenario: requests per second and the median and 99th
+percentile latency. The client runs on the same machine as the server,
+so absolute numbers include its own CPU use.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_alumni import generate_alumni, write_sqlite  # noqa: E402
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST = '127.0.0.1'
+
+SERVER_SCRIPT = """
+import sys, uvicorn, alumni_api
+uvicorn.run(alumni_api.AlumniAPI(sys.argv[1]), host=sys.argv[2], port=int(sys.argv[3]), log_level='warning')
+"""
+
+SEARCHES = [
+    '/alumni',
+    '/alumni?nama=sari',
+    '/alumni?perusahaan=bank&sort=Rata-rata%20Gaji&order=desc',
+    '/alumni?program_studi=Statistika&gaji_min=8000000',
+    '/alumni?npm=1806&limit=100',
+    '/alumni?pekerjaan=analyst&sort=Nama',
+]
+STATISTICS = [
+    '/statistik',
+    '/statistik/jumlah?kolom=Program%20Studi',
+    '/statistik/gaji?kolom=Angkatan',
+    '/statistik/gaji?kolom=' + quote('Nama Perusahaan'),
+]
+
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client for GET requests"""
+
+    def __init__(self, port):
+        self.port = port
+        self.reader = self.writer = None
+
+    async def get(self, path, headers=()):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(HOST, self.port)
+        lines = [f'GET {path} HTTP/1.1', f'Host: {HOST}', *headers, '', '']
+        self.writer.write('\r\n'.join(lines).encode('latin-1'))
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        fields = {}
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(':')
+                fields[name.strip().lower()] = value.strip()
+        body = await self.reader.readexactly(int(fields.get('content-length', 0)))
+        return int(status_line.split()[1]), fields, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def run_scenario(port, connections, duration, next_request):
+    """Have every connection send ``next_request(conn)`` requests until ``duration`` is over"""
+    latencies = []
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        conn = Connection(port)
+        try:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                status = await next_request(conn)
+                latencies.append(time.perf_counter() - start)
+                assert status in (200, 304), status
+        finally:
+            conn.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50': statistics.median(latencies),
+        'p99': latencies[int(len(latencies) * 0.99)],
+    }
+
+
+def scenarios(etags):
+    searches = itertools.cycle(SEARCHES)
+    stats = itertools.cycle(STATISTICS)
+    salaries = itertools.count(1_000_000, 1_000)
+
+    async def search(conn):
+        return (await conn.get(next(searches)))[0]
+
+    async def revalidate(conn):
+        path = next(searches)
+        return (await conn.get(path, [f'If-None-Match: {etags[path]}']))[0]
+
+    async def uncached(conn):
+        return (await conn.get(f'/alumni?perusahaan=bank&gaji_min={next(salaries)}&sort=Nama'))[0]
+
+    async def paging(conn):
+        # Each connection walks the whole result, then starts over
+        cursor = getattr(conn, 'cursor', None)
+        path = '/alumni?perusahaan=bank&sort=Rata-rata%20Gaji&order=desc&limit=100'
+        status, _, body = await conn.get(path + (f'&after={cursor}' if cursor else ''))
+        conn.cursor = json.loads(body)['next']
+        return status
+
+    async def statistik(conn):
+        return (await conn.get(next(stats)))[0]
+
+    return {'search': search, 'revalidate': revalidate, 'uncached': uncached, 'paging': paging,
+            'statistik': statistik}
+
+
+async def benchmark(port, connections, duration):
+    # Warm the server (first load, indexes) and collect the ETags to revalidate
+    conn = Connection(port)
+    etags = {}
+    for path in SEARCHES + STATISTICS:
+        status, fields, _ = await conn.get(path)
+        assert status == 200, (path, status)
+        etags[path] = fields['etag']
+    conn.close()
+    return {name: await run_scenario(port, connections, duration, request)
+            for name, request in scenarios(etags).items()}
+
+
+def start_server(db_path, port):
+    env = {**os.environ, 'PYTHONPATH': REPO_DIR}
+    process = subprocess.Popen([sys.executable, '-c', SERVER_SCRIPT, db_path, HOST, str(port)], env=env)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            asyncio.run(Connection(port).get('/versi'))
+            return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("API server exited during startup")
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("API server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--connections', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    import alumni_db
+
+    work_dir = tempfile.mkdtemp(prefix='alumni_api_')
+    try:
+        db_path = os.path.join(work_dir, 'alumni_database.db')
+        write_sqlite(generate_alumni(args.rows), db_path)
+        alumni_db.init_database(db_path, None)
+        server = start_server(db_path, args.port)
+        try:
+            results = asyncio.run(benchmark(args.port, args.connections, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"== {args.rows} alumni, {args.connections} connections, {args.duration:g} s per scenario ==")
+    for name, result in results.items():
+        print(f"{name:11s} {result['rps']:9.0f} req/s   p50 {result['p50'] * 1000:7.2f} ms   "
+              f"p99 {result['p99'] * 1000:7.2f} ms")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
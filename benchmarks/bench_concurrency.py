@@ -0,0 +1,172 @@
+"""Simulate many simultaneous sessions querying the alumni database
+
+    python benchmarks/bench_concurrency.py --rows 100000 --sessions 1 8 32
+
+Every session is a thread running a mix of detail lookups, selective SQL
+searches, aggregates, full-text queries and the occasional add-form write.
+The same workload runs twice: through the pooled AlumniStore and by
+opening a fresh connection for every query. Throughput and latency
+percentiles are reported for both.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import alumni_db  # noqa: E402
+import alumni_fts  # noqa: E402
+import alumni_store  # noqa: E402
+from generate_alumni import PROGRAMS, THESIS_TOPICS, generate_alumni, write_sqlite  # noqa: E402
+
+
+class PerQueryConnections:
+    """Baseline: open (and tune) a new connection for every query"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _run(self, fn):
+        with closing(alumni_db.connect(self.path)) as conn:
+            return fn(conn)
+
+    def query(self, filters):
+        return self._run(lambda conn: alumni_db.fetch_alumni(conn, filters))
+
+    def detail(self, npm):
+        return self._run(lambda conn: alumni_db.fetch_alumni_by_npm(conn, npm))
+
+    def count(self):
+        return self._run(alumni_db.count_alumni)
+
+    def fulltext(self, query):
+        return self._run(lambda conn: alumni_fts.search(conn, query))
+
+    def add(self, record):
+        def write(conn):
+            with conn:
+                alumni_db.write_frame(conn, pd.DataFrame([record]), upsert=True)
+        return self._run(write)
+
+
+def make_operations(data):
+    """(name, weight, fn(db, rng)) for the simulated session workload"""
+    npms = data['NPM'].tolist()
+    programs = list(PROGRAMS)
+    words = sorted({word for topic in THESIS_TOPICS for word in topic.lower().split() if len(word) > 4})
+    counter = iter(range(10 ** 9))
+
+    def detail(db, rng):
+        db.detail(rng.choice(npms))
+
+    def search(db, rng):
+        npm = rng.choice(npms)
+        db.query({'npm': npm[:7], 'program_studi': rng.choice(programs), 'gaji_min': rng.choice([0, 5_000_000])})
+
+    def aggregate(db, rng):
+        db.count()
+
+    def fulltext(db, rng):
+        db.fulltext(rng.choice(words))
+
+    def write(db, rng):
+        serial = next(counter)
+        db.add({'Nama': f'Sesi {serial}', 'NPM': f'99{serial:08d}', 'Program Studi': rng.choice(programs),
+                'Rata-rata Gaji': rng.randrange(5, 30) * 1_000_000})
+
+    return [('detail', 50, detail), ('search', 25, search), ('aggregate', 15, aggregate),
+            ('fulltext', 8, fulltext), ('write', 2, write)]
+
+
+def run_sessions(db, operations, sessions, ops_per_session, seed=0):
+    """Run the workload on ``sessions`` threads; return (elapsed seconds, latencies by op)"""
+    names = [name for name, _, _ in operations]
+    weights = [weight for _, weight, _ in operations]
+    functions = {name: fn for name, _, fn in operations}
+    latencies = defaultdict(list)
+    lock = threading.Lock()
+    barrier = threading.Barrier(sessions + 1)
+
+    def session(index):
+        rng = random.Random(seed * 1000 + index)
+        local = defaultdict(list)
+        barrier.wait()
+        for name in rng.choices(names, weights, k=ops_per_session):
+            start = time.perf_counter()
+            functions[name](db, rng)
+            local[name].append(time.perf_counter() - start)
+        with lock:
+            for name, values in local.items():
+                latencies[name].extend(values)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+
+def summarize(elapsed, latencies):
+    every = np.concatenate([np.array(values) for values in latencies.values()]) * 1000
+    summary = {
+        'ops_per_s': round(len(every) / elapsed, 1),
+        'p50_ms': round(float(np.percentile(every, 50)), 2),
+        'p95_ms': round(float(np.percentile(every, 95)), 2),
+        'p99_ms': round(float(np.percentile(every, 99)), 2),
+    }
+    for name, values in sorted(latencies.items()):
+        summary[f'{name}_p50_ms'] = round(float(np.median(values)) * 1000, 2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--ops', type=int, default=200, help="operations per session")
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='alumni_concurrency_')
+    source = os.path.join(work_dir, 'source.db')
+    results = {}
+    try:
+        data = generate_alumni(args.rows)
+        write_sqlite(data, source)
+        alumni_db.init_database(source, excel_path=None)
+        operations = make_operations(data)
+        for sessions in args.sessions:
+            for mode in ('pooled', 'per_query'):
+                path = os.path.join(work_dir, f'{mode}_{sessions}.db')
+                shutil.copy(source, path)
+                db = alumni_store.AlumniStore(path, readers=min(sessions, 16)) if mode == 'pooled' \
+                    else PerQueryConnections(path)
+                elapsed, latencies = run_sessions(db, operations, sessions, args.ops)
+                summary = summarize(elapsed, latencies)
+                results[f'{mode}/{sessions}'] = summary
+                print(f"{mode:10s} sessions={sessions:<4d} {summary['ops_per_s']:9.1f} ops/s  "
+                      f"p50 {summary['p50_ms']:7.2f} ms  p95 {summary['p95_ms']:7.2f} ms  p99 {summary['p99_ms']:7.2f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Measure the cold start of the Streamlit app
+
+    python benchmarks/bench_startup.py --rows 10000 100000
+
+The app is copied to a scratch directory next to a synthetic database of
+``--rows`` alumni. Every measurement runs in a fresh interpreter so module
+imports and the store load are really cold:
+
+* ``import``: importing ``alumni_app`` (module-level work only)
+* ``first_paint``: the first full script run of the Beranda page
+* ``rerun``: a second run of the same page in that process
+* ``page.<name>``: the first visit to each other page after the Beranda
+
+The heavy modules the app itself loaded by the first paint are listed too
+(Streamlit already imports some, e.g. plotly, on its own).
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_alumni import generate_alumni, write_sqlite  # noqa: E402
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['plotly', 'openpyxl', 'xlsxwriter', 'alumni_charts', 'alumni_import', 'alumni_export']
+PAGES = ['search', 'statistics', 'add_form']
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import alumni_app
+print(json.dumps({'import': time.perf_counter() - start}))
+"""
+
+RUN_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+heavy, pages = %r, %r
+preloaded = set(sys.modules)
+result = {}
+start = time.perf_counter()
+at = AppTest.from_file('alumni_app.py', default_timeout=600).run()
+result['first_paint'] = time.perf_counter() - start
+assert not at.exception, at.exception
+result['loaded'] = sorted(name for name in heavy if name in sys.modules and name not in preloaded)
+start = time.perf_counter()
+at.run()
+result['rerun'] = time.perf_counter() - start
+for page in pages:
+    at.session_state.current_page = page
+    start = time.perf_counter()
+    at.run()
+    assert not at.exception, (page, at.exception)
+    result['page.' + page] = time.perf_counter() - start
+print(json.dumps(result))
+"""
+
+
+def prepare(app_dir, rows):
+    """Copy the app modules and a synthetic database of ``rows`` alumni to ``app_dir``"""
+    for name in os.listdir(REPO_DIR):
+        source = os.path.join(REPO_DIR, name)
+        if name.endswith('.py') or name == 'static':
+            (shutil.copytree if os.path.isdir(source) else shutil.copy)(source, os.path.join(app_dir, name))
+    write_sqlite(generate_alumni(rows), os.path.join(app_dir, 'alumni_database.db'))
+
+
+def run_fresh(app_dir, script):
+    """Run ``script`` in a new interpreter inside ``app_dir``; return its JSON result"""
+    output = subprocess.run([sys.executable, '-c', script], cwd=app_dir, capture_output=True, text=True, check=True,
+                            env={**os.environ, 'PYTHONPATH': app_dir})
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def measure(app_dir, repeat):
+    """Median of ``repeat`` cold runs for every timing"""
+    runs = [{**run_fresh(app_dir, IMPORT_SCRIPT), **run_fresh(app_dir, RUN_SCRIPT % (HEAVY_MODULES, PAGES))}
+            for _ in range(repeat)]
+    result = {key: statistics.median(run[key] for run in runs) for key in runs[0] if key != 'loaded'}
+    result['loaded_by_first_paint'] = runs[0]['loaded']
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    for rows in args.rows:
+        app_dir = tempfile.mkdtemp(prefix='alumni_startup_')
+        try:
+            prepare(app_dir, rows)
+            results[str(rows)] = timings = measure(app_dir, args.repeat)
+        finally:
+            shutil.rmtree(app_dir, ignore_errors=True)
+        print(f"\n== {rows} alumni ==")
+        for name, value in timings.items():
+            print(f"{name:28s} {value * 1000:10.1f} ms" if isinstance(value, float) else f"{name:28s} {value}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Measure what each extra app process costs with and without shared snapshots
+
+    python benchmarks/bench_workers.py --rows 100000 --workers 4
+
+A synthetic database of ``--rows`` alumni is written once. Then
+``--workers`` fresh interpreters each load the dataset the way an
+AlumniStore does, either straight from SQLite (``sqlite``) or by mapping
+the shared Arrow snapshot (``shared``); all workers hold their frame until
+every one has loaded. Reported per mode: the median load time and the
+median private memory and proportional set size (PSS) that loading added
+to a worker. PSS counts a shared page once over all the processes mapping
+it, so shared snapshots keep it flat as workers are added. Memory figures
+need Linux (/proc/self/smaps_rollup).
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_alumni import generate_alumni, write_sqlite  # noqa: E402
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER_SCRIPT = """
+import json, sys, time
+from contextlib import closing
+import alumni_db, alumni_shared
+
+def memory():
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Pss:', 'Private_Clean:', 'Private_Dirty:'):
+                fields[parts[0]] = int(parts[1]) * 1024
+    return fields['Pss:'], fields['Private_Clean:'] + fields['Private_Dirty:']
+
+db_path, mode = sys.argv[1], sys.argv[2]
+pss_before, private_before = memory()
+start = time.perf_counter()
+with closing(alumni_db.connect(db_path, readonly=True)) as conn, alumni_db.read_transaction(conn):
+    key = alumni_db.data_version(conn)
+    data = alumni_shared.read(alumni_shared.snapshot_dir(db_path), key) if mode == 'shared' else None
+    if data is None:
+        data = alumni_db.fetch_alumni(conn)
+elapsed = time.perf_counter() - start
+data['Nama'].str.len().sum()  # touch the text so its pages are really mapped
+print('loaded', flush=True)
+sys.stdin.readline()  # hold the frame until every worker has loaded
+pss, private = memory()
+print(json.dumps({'load': elapsed, 'pss': pss - pss_before, 'private': private - private_before}), flush=True)
+"""
+
+
+def prepare(work_dir, rows):
+    """Write the database and its shared snapshot; return the database path"""
+    import alumni_db
+    import alumni_shared
+    from contextlib import closing
+
+    db_path = os.path.join(work_dir, 'alumni_database.db')
+    write_sqlite(generate_alumni(rows), db_path)
+    alumni_db.init_database(db_path, None)
+    with closing(alumni_db.connect(db_path)) as conn, alumni_db.read_transaction(conn):
+        alumni_shared.write(alumni_shared.snapshot_dir(db_path), alumni_db.data_version(conn),
+                            alumni_db.fetch_alumni(conn))
+    return db_path
+
+
+def run_workers(db_path, mode, workers):
+    """Start ``workers`` loaders at once; return their results once all have loaded"""
+    env = {**os.environ, 'PYTHONPATH': REPO_DIR}
+    processes = [subprocess.Popen([sys.executable, '-c', WORKER_SCRIPT, db_path, mode], stdin=subprocess.PIPE,
+                                  stdout=subprocess.PIPE, text=True, env=env) for _ in range(workers)]
+    for process in processes:
+        assert process.stdout.readline().strip() == 'loaded'
+    results = []
+    for process in processes:
+        process.stdin.write('\n')
+        process.stdin.flush()
+        results.append(json.loads(process.stdout.readline()))
+        process.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='alumni_workers_')
+    results = {}
+    try:
+        db_path = prepare(work_dir, args.rows)
+        for mode in ('sqlite', 'shared'):
+            runs = run_workers(db_path, mode, args.workers)
+            results[mode] = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"== {args.rows} alumni, {args.workers} workers ==")
+    for mode, timings in results.items():
+        print(f"{mode:8s} load {timings['load'] * 1000:8.1f} ms   "
+              f"private {timings['private'] / 2**20:7.1f} MiB   pss {timings['pss'] / 2**20:7.1f} MiB")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
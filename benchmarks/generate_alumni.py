@@ -0,0 +1,167 @@
+"""Generate synthetic alumni rows in the 13-column workbook schema
+
+    python benchmarks/generate_alumni.py --rows 100000 --out bench_data
+
+writes alumni_<rows>.csv, alumni_<rows>.xlsx and alumni_<rows>.db (the
+normalized SQLite tables) to the output directory.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import alumni_db  # noqa: E402
+import alumni_export  # noqa: E402
+import alumni_schema  # noqa: E402
+
+FIRST_NAMES = [
+    'Sari', 'Natasha', 'Fadel', 'Rina', 'Ahmad', 'Dewi', 'Budi', 'Putri', 'Rizky', 'Ayu',
+    'Muhammad', 'Nabila', 'Farrel', 'Adinda', 'Bagas', 'Citra', 'Dimas', 'Eka', 'Fajar', 'Gita',
+    'Hana', 'Indra', 'Joko', 'Kartika', 'Lestari', 'Maya', 'Nanda', 'Oki', 'Priska', 'Raka',
+]
+LAST_NAMES = [
+    'Fitri', 'Rosaline', 'Muhammad', 'Susanti', 'Fauzi', 'Pratama', 'Saputra', 'Wijaya', 'Permata',
+    'Sari', 'Nugroho', 'Hidayat', 'Kusuma', 'Santoso', 'Ramadhan', 'Lestari', 'Putra', 'Utami',
+    'Halim', 'Siregar', 'Nasution', 'Simanjuntak', 'Tanjung', 'Hakim', 'Wibowo', 'Gunawan',
+]
+PROGRAMS = {
+    # Program Studi: (weight, peminatan options, salary multiplier)
+    'Matematika': (0.45, ['Matematika Komputasi', 'Matematika Murni', 'Operational Research', 'Matematika Terapan'], 1.0),
+    'Statistika': (0.30, ['Matematika Statistik', 'Statistika Komputasi'], 1.05),
+    'Ilmu Aktuaria': (0.25, ['Aktuaria'], 1.25),
+}
+JOBS = [
+    'Data Analyst', 'Data Scientist', 'Data Engineer', 'Actuarial Analyst', 'Business Analyst',
+    'Risk Analyst', 'Software Engineer', 'Statistician', 'Consultant', 'Product Analyst',
+    'Quantitative Analyst', 'Management Trainee', 'Research Associate', 'Lecturer',
+]
+COMPANIES = [
+    # (name, Id Karyawan prefix, address)
+    ('PT Bank Central Asia Tbk', 'BC', 'Menara BCA, Jl. MH. Thamrin No. 1, Jakarta Pusat'),
+    ('PT Bank Raya Indonesia', 'BR', 'Jl. Jenderal Sudirman Kav. 44-46, Jakarta'),
+    ('Bank Indonesia', 'BI', 'Jl. MH. Thamrin No. 2, Jakarta Pusat'),
+    ('Bank Mandiri', 'BM', 'Plaza Mandiri, Jl. Gatot Subroto Kav. 36-38, Jakarta'),
+    ('Kimbo', 'KI', 'Ruko Harco Mangga Dua, Jakarta'),
+    ('Tokopedia', 'TO', 'Tokopedia Tower, Jl. Prof. Dr. Satrio Kav. 11, Jakarta'),
+    ('Shopee', 'SH', 'Pacific Century Place, SCBD, Jakarta'),
+    ('Traveloka', 'TR', 'Green Office Park 1, BSD City, Tangerang'),
+    ('Prudential Indonesia', 'PR', 'Prudential Tower, Jl. Jend. Sudirman Kav. 79, Jakarta'),
+    ('Manulife Indonesia', 'MA', 'Sampoerna Strategic Square, Jakarta'),
+    ('Allianz Indonesia', 'AL', 'Allianz Tower, Jl. HR Rasuna Said, Jakarta'),
+    ('Ernst and Young (EY)', 'EY', 'Indonesia Stock Exchange Building Tower 1, Jakarta'),
+    ('PWC', 'PW', 'WTC 3, Jl. Jend. Sudirman Kav. 29-31, Jakarta'),
+    ('Mckinsey & Company', 'MC', 'Indonesia Stock Exchange Building Tower 2, Jakarta'),
+    ('Google Indonesia', 'GO', 'Pacific Century Place, SCBD, Jakarta'),
+    ('Data Science Center Universitas Indonesia', 'DS', 'Kampus UI, Depok'),
+]
+THESIS_METHODS = [
+    'Regresi Logistik', 'Random Forest', 'Model Cox Proportional Hazard', 'K-Means Clustering',
+    'Jaringan Saraf Tiruan', 'Model ARIMA', 'Metode Monte Carlo', 'Support Vector Machine',
+    'Algoritma Genetika', 'Model Markov Tersembunyi',
+]
+THESIS_TOPICS = [
+    'Prediksi Risiko Kredit', 'Analisis Survival Pasien Kanker', 'Segmentasi Pelanggan',
+    'Peramalan Inflasi Indonesia', 'Valuasi Premi Asuransi Jiwa', 'Optimasi Rute Distribusi',
+    'Deteksi Topik pada Data Twitter', 'Prediksi Insiden DBD di DKI Jakarta',
+]
+
+
+def generate_alumni(rows, seed=0):
+    """Return a DataFrame of ``rows`` synthetic alumni in the workbook schema"""
+    rng = np.random.default_rng(seed)
+    programs = list(PROGRAMS)
+    weights = np.array([PROGRAMS[p][0] for p in programs])
+    program = rng.choice(programs, size=rows, p=weights / weights.sum())
+
+    peminatan = np.empty(rows, dtype=object)
+    multiplier = np.empty(rows)
+    for name, (_, options, factor) in PROGRAMS.items():
+        mask = program == name
+        peminatan[mask] = rng.choice(options, size=mask.sum())
+        multiplier[mask] = factor
+
+    angkatan = rng.integers(2010, 2021, size=rows)
+    tahun_lulus = angkatan + rng.choice([3, 4, 4, 4, 5], size=rows)
+    # NPM: two-digit intake year, faculty code 06, unique serial
+    serial = rng.permutation(10 ** 6)[:rows] if rows <= 10 ** 6 else np.arange(rows)
+    npm = [f'{a % 100:02d}06{s:06d}' for a, s in zip(angkatan, serial)]
+
+    nama = pd.Series(rng.choice(FIRST_NAMES, size=rows)) + ' ' + pd.Series(rng.choice(LAST_NAMES, size=rows))
+    company = rng.integers(0, len(COMPANIES), size=rows)
+    company_names = np.array([c[0] for c in COMPANIES], dtype=object)
+    prefixes = np.array([c[1] for c in COMPANIES], dtype=object)
+    addresses = np.array([c[2] for c in COMPANIES], dtype=object)
+    id_karyawan = [f'{p}{y}{i:05d}' for i, (p, y) in enumerate(zip(prefixes[company], tahun_lulus))]
+
+    judul = (pd.Series(rng.choice(THESIS_TOPICS, size=rows)) + ' Menggunakan '
+             + pd.Series(rng.choice(THESIS_METHODS, size=rows)))
+    gaji = rng.lognormal(mean=np.log(9_000_000), sigma=0.35, size=rows) * multiplier
+    gaji = (np.round(gaji / 100_000) * 100_000).astype(np.int64)
+
+    df = pd.DataFrame({
+        'No': np.arange(1, rows + 1),
+        'Nama': nama,
+        'NPM': npm,
+        'Program Studi': program,
+        'Angkatan': angkatan,
+        'Peminatan': peminatan,
+        'Judul Skripsi': judul,
+        'Tahun Lulus': tahun_lulus,
+        'Pekerjaan': rng.choice(JOBS, size=rows),
+        'Id Karyawan': id_karyawan,
+        'Nama Perusahaan': company_names[company],
+        'Alamat Perusahaan': addresses[company],
+        'Rata-rata Gaji': gaji,
+    })
+    return alumni_schema.apply_schema(df)
+
+
+def write_sqlite(df, path):
+    """Write ``df`` into a fresh alumni database at ``path``"""
+    if os.path.exists(path):
+        os.remove(path)
+    alumni_db.init_database(path, excel_path=None)
+    conn = alumni_db.connect(path)
+    try:
+        alumni_db.import_frame(conn, df, replace=True)
+    finally:
+        conn.close()
+
+
+def write_outputs(df, out_dir, formats=('csv', 'xlsx', 'db')):
+    """Write ``df`` in the requested formats; return the created paths"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {}
+    base = os.path.join(out_dir, f'alumni_{len(df)}')
+    chunks = lambda: alumni_export.iter_chunks(df)  # noqa: E731
+    if 'csv' in formats:
+        paths['csv'] = base + '.csv'
+        alumni_export.write_csv(paths['csv'], chunks())
+    if 'xlsx' in formats:
+        paths['xlsx'] = base + '.xlsx'
+        alumni_export.write_xlsx(paths['xlsx'], chunks())
+    if 'db' in formats:
+        paths['db'] = base + '.db'
+        write_sqlite(df, paths['db'])
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='bench_data')
+    parser.add_argument('--formats', nargs='+', default=['csv', 'xlsx', 'db'], choices=['csv', 'xlsx', 'db'])
+    args = parser.parse_args()
+
+    df = generate_alumni(args.rows, args.seed)
+    for fmt, path in write_outputs(df, args.out, args.formats).items():
+        print(f"{fmt}: {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+"""Time the alumni data paths on synthetic datasets and compare to a baseline
+
+    python benchmarks/run_benchmarks.py --rows 10000 100000
+    python benchmarks/run_benchmarks.py --rows 10000 --save-baseline
+
+Each benchmark reports the best of ``--repeat`` runs. Results slower than
+the stored baseline by more than ``--tolerance`` (and by at least
+``--min-delta`` seconds) are listed as regressions and the script exits
+with status 1.
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import closing
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io
+import plotly.tools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import alumni_charts  # noqa: E402
+import alumni_company  # noqa: E402
+import alumni_db  # noqa: E402
+import alumni_export  # noqa: E402
+import alumni_import  # noqa: E402
+import alumni_quality  # noqa: E402
+import alumni_schema  # noqa: E402
+import alumni_query  # noqa: E402
+import alumni_salary  # noqa: E402
+import alumni_search  # noqa: E402
+import alumni_shared  # noqa: E402
+import alumni_stats  # noqa: E402
+import alumni_store  # noqa: E402
+import alumni_summary  # noqa: E402
+import alumni_sync  # noqa: E402
+import alumni_warmup  # noqa: E402
+from generate_alumni import generate_alumni, write_outputs  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# One representative value per search filter; every non-empty combination is timed
+FILTER_VALUES = {
+    'nama': 'sari',
+    'program_studi': 'Statistika',
+    'npm': '1806',
+    'pekerjaan': 'analyst',
+    'perusahaan': 'bank',
+    'gaji_min': 8_000_000,
+    'gaji_max': 15_000_000,
+}
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_size(rows, repeat, work_dir, include_xlsx):
+    """Run every benchmark on a dataset of ``rows`` alumni"""
+    results = {}
+    df = generate_alumni(rows)
+    formats = ('csv', 'xlsx', 'db') if include_xlsx else ('csv', 'db')
+    paths = write_outputs(df, work_dir, formats)
+
+    with closing(alumni_db.connect(paths['db'])) as conn:
+        results['load.sqlite'] = best_of(lambda: alumni_db.fetch_alumni(conn), repeat)
+        data = alumni_db.fetch_alumni(conn)
+        shared_dir = os.path.join(work_dir, 'snapshots')
+        if alumni_shared.available():
+            results['shared.write'] = best_of(lambda: alumni_shared.write(shared_dir, f'bench-{rows}', data), 1)
+            results['load.shared'] = best_of(lambda: alumni_shared.read(shared_dir, f'bench-{rows}'), repeat)
+        results['stats.summary'] = best_of(lambda: alumni_summary.load_stats(conn), repeat)
+
+        def resolve_new_company():
+            # A name never seen before goes through the blocking index; rolled back so every run is new
+            with conn:
+                alumni_company.resolve(conn, [('ZZ0001', 'PT Perusahaan Belum Dikenal Tbk')])
+                conn.rollback()
+        results['company.resolve_new'] = best_of(resolve_new_company, repeat)
+    if include_xlsx:
+        results['load.workbook'] = best_of(lambda: alumni_db.read_excel(paths['xlsx']), 1)
+    snapshot = alumni_store.Snapshot(1, data)
+
+    results['index.build'] = best_of(lambda: alumni_search.SearchIndex(data), repeat)
+    index = alumni_search.SearchIndex(data)
+    for size in range(1, len(FILTER_VALUES) + 1):
+        for keys in itertools.combinations(FILTER_VALUES, size):
+            filters = {key: FILTER_VALUES[key] for key in keys}
+            results['search.' + '+'.join(keys)] = best_of(lambda: index.search(filters), repeat)
+    # Typing on from an earlier search only rechecks its hits
+    wide = {'nama': 'sa', 'gaji_min': 8_000_000}
+    narrow = {'nama': 'sari', 'gaji_min': 10_000_000, 'program_studi': 'Statistika'}
+    previous = (wide, index.search(wide))
+    results['search.narrowed'] = best_of(lambda: index.search(narrow, previous=previous), repeat)
+    all_rows = np.arange(len(data))
+    results['search.sort_gaji'] = best_of(lambda: index.sort(all_rows, 'Rata-rata Gaji', False), repeat)
+    # API pages: the first sorts only its own rows, later ones binary-search a cached order
+    query = alumni_query.parse_filters({'perusahaan': 'bank'})
+    first = alumni_query.page(snapshot, query, 'Rata-rata Gaji', False, limit=100)
+    results['query.page_first'] = best_of(
+        lambda: alumni_query.page(snapshot, query, 'Rata-rata Gaji', False, limit=100), repeat)
+    results['query.page_next'] = best_of(
+        lambda: alumni_query.page(snapshot, query, 'Rata-rata Gaji', False, after=first['next'], limit=100), repeat)
+
+    results['stats.build'] = best_of(lambda: alumni_stats.AlumniStats.from_frame(data), repeat)
+    stats = alumni_stats.AlumniStats.from_frame(data)
+    results['charts.build'] = best_of(
+        lambda: alumni_charts.serialised(alumni_charts.build_statistics_figures(data, stats)), repeat)
+    # What st.plotly_chart does with the cached figures on every rerun of the Statistik page
+    figures = [fig for fig in alumni_charts.serialised(alumni_charts.build_statistics_figures(data, stats)).values()
+               if isinstance(fig, go.Figure)]
+    results['charts.render'] = best_of(lambda: [plotly.io.to_json(
+        plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True), validate=False) for fig in figures], repeat)
+
+    results['company.resolve_frame'] = best_of(lambda: alumni_company.aliases_from_frame(data), repeat)
+
+    # Everything the background warmer builds for a newly published version, off the render path
+    warmer = alumni_warmup.Warmer()
+    aliases = alumni_company.aliases_from_frame(data)
+
+    def warm_version():
+        published = alumni_store.Snapshot(1, data)
+        published.attach('stats', stats, alumni_stats.SOURCE_COLUMNS)
+        published.attach('company_aliases', aliases, alumni_company.SOURCE_COLUMNS)
+        warmer.publish(published)
+        warmer.wait()
+    results['warmup.version'] = best_of(warm_version, min(repeat, 3))
+
+    results['salary.percentiles_all_groups'] = best_of(
+        lambda: alumni_salary.SalaryAnalytics(data).percentiles(alumni_salary.GROUP_COLUMNS), repeat)
+    results['salary.cohort_trends'] = best_of(
+        lambda: alumni_salary.SalaryAnalytics(data).cohort_trends('Tahun Lulus', by='Program Studi'), repeat)
+
+    results['detail.index_build'] = best_of(lambda: alumni_search.npm_positions(data), repeat)
+    positions = alumni_search.npm_positions(data)
+    sample = data['NPM'].sample(min(1000, len(data)), random_state=0).tolist()
+    results['detail.lookup_1000'] = best_of(lambda: [data.iloc[positions[npm]] for npm in sample], repeat)
+
+    # Re-uploading the whole dataset: index the published rows, then check every row against them
+    results['quality.check_upload'] = best_of(lambda: alumni_quality.QualityScanner(data).check(data, data), repeat)
+
+    with open(paths['csv'], 'rb') as f:
+        csv_bytes = f.read()
+
+    def import_csv():
+        db_path = os.path.join(work_dir, 'import.db')
+        shutil.copy(paths['db'], db_path)
+        upload = io.BytesIO(csv_bytes)
+        upload.name = 'upload.csv'
+        with closing(alumni_db.connect(db_path)) as conn:
+            alumni_import.import_chunks(conn, alumni_import.iter_upload_chunks(upload), replace=True)
+    results['import.csv'] = best_of(import_csv, min(repeat, 3))
+
+    # Workbook sync after editing 10 rows, adding one and removing one (parsing excluded, see load.workbook);
+    # the runs alternate between the two workbooks, so each applies the same delta
+    edited = data.copy()
+    edited['Rata-rata Gaji'] = edited['Rata-rata Gaji'].astype('Int64')
+    edited.loc[edited.index[1:11], 'Rata-rata Gaji'] += 1000
+    added = data.iloc[[-1]].assign(NPM='9999999999')
+    edited = alumni_schema.append_rows(edited.iloc[1:], added)
+    workbooks = itertools.cycle([alumni_sync.Workbook('bench', data), alumni_sync.Workbook('bench', edited)])
+    sync_path = os.path.join(work_dir, 'sync.db')
+    shutil.copy(paths['db'], sync_path)
+    with closing(alumni_db.connect(sync_path)) as conn:
+        def sync_delta():
+            with conn:
+                return alumni_sync.apply(conn, alumni_sync.diff(conn, next(workbooks)))
+        sync_delta()  # first sync: fingerprints every row against the database, changes nothing
+        results['sync.delta_12'] = best_of(sync_delta, repeat)
+
+    for fmt in ('csv', 'xlsx') if include_xlsx else ('csv',):
+        export_dir = os.path.join(work_dir, 'exports')
+        results[f'export.{fmt}'] = best_of(
+            lambda: alumni_export.ExportCache(directory=export_dir).export(snapshot, fmt),
+            1 if fmt == 'xlsx' else min(repeat, 3))
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta):
+    """Return (size, name, baseline, current) for every regression"""
+    regressions = []
+    for size, timings in results.items():
+        for name, current in timings.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            if current > previous * (1 + tolerance) and current - previous > min_delta:
+                regressions.append((size, name, previous, current))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.5, help="allowed slowdown ratio")
+    parser.add_argument('--min-delta', type=float, default=0.005, help="ignore differences below this (s)")
+    parser.add_argument('--xlsx-limit', type=int, default=100000,
+                        help="skip workbook load/export above this many rows")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix='alumni_bench_')
+    try:
+        for rows in args.rows:
+            timings = run_size(rows, args.repeat, work_dir, rows <= args.xlsx_limit)
+            results[str(rows)] = timings
+            print(f"\n== {rows} alumni ==")
+            for name, seconds in timings.items():
+                print(f"{name:60s} {seconds * 1000:10.2f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\nNo baseline found; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.min_delta)
+    if not regressions:
+        print("\nNo regressions against the baseline")
+        return 0
+    print(f"\n{len(regressions)} regression(s):")
+    for size, name, previous, current in regressions:
+        print(f"  [{size}] {name}: {previous * 1000:.2f} ms -> {current * 1000:.2f} ms "
+              f"({current / previous:.2f}x)")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""Fixtures shared by the tests: a fresh database imported from a copy of the bundled workbook
+
+    python -m pytest -q
+"""
+import os
+import shutil
+import sys
+from contextlib import closing
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import alumni_db  # noqa: E402
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = str(tmp_path / 'alumni.xlsx')
+    shutil.copy(alumni_db.EXCEL_PATH, path)
+    return path
+
+
+@pytest.fixture
+def raw(workbook):
+    """The workbook's sheet as read, before any cleaning"""
+    return pd.read_excel(workbook, sheet_name=alumni_db.EXCEL_SHEET)
+
+
+@pytest.fixture
+def db_path(tmp_path, workbook):
+    return alumni_db.init_database(str(tmp_path / 'alumni.db'), workbook)
+
+
+@pytest.fixture
+def conn(db_path):
+    with closing(alumni_db.connect(db_path)) as conn:
+        yield conn
+
+
+@pytest.fixture
+def data(conn):
+    return alumni_db.fetch_alumni(conn)
+
+
+@pytest.fixture
+def new_record(data):
+    """Factory for an alumnus not in the workbook: the first row's values under another NPM and name"""
+    def make(npm, **changes):
+        record = data.iloc[0].to_dict()
+        record.update({'NPM': npm, 'Nama': 'Alumni Uji Coba', 'Judul Skripsi': None, 'Id Karyawan': None})
+        record.update(changes)
+        return record
+    return make
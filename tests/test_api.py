@@ -0,0 +1,39 @@
+import asyncio
+
+import alumni_api
+import alumni_store
+
+
+async def get(api, path, query='', etag=None):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    headers = [(b'if-none-match', etag)] if etag else []
+    await api({'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode(), 'headers': headers},
+              None, send)
+    return messages[0]['status'], dict(messages[0]['headers']).get(b'etag'), messages[1]['body']
+
+
+def test_etag_and_not_modified(db_path, new_record):
+    store = alumni_store.AlumniStore(db_path)
+
+    async def run():
+        api = alumni_api.AlumniAPI(store=store)
+        status, etag, body = await get(api, '/alumni', 'limit=5&sort=Nama')
+        assert status == 200 and body
+        assert (await get(api, '/alumni', 'sort=Nama&limit=5'))[1] == etag
+        assert await get(api, '/alumni', 'sort=Nama&limit=5', etag) == (304, etag, b'')
+        # A repeated parameter counts with the value the handler reads (the last one)
+        status, first, _ = await get(api, '/alumni', 'limit=5&sort=Nama&sort=NPM')
+        status, second, _ = await get(api, '/alumni', 'limit=5&sort=NPM&sort=Nama')
+        assert second == etag and first != etag
+        assert (await get(api, '/alumni', 'limit=5&sort=NPM', second))[0] == 200
+
+        store.add(new_record('1234567890'))
+        api = alumni_api.AlumniAPI(store=store)
+        status, changed, _ = await get(api, '/alumni', 'limit=5&sort=Nama', etag)
+        assert status == 200 and changed != etag
+
+    asyncio.run(run())
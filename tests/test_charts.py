@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+import alumni_charts
+import alumni_stats
+
+
+def test_histogram_counts_every_salary(data):
+    gaji = pd.to_numeric(data['Rata-rata Gaji'], errors='coerce').to_numpy(dtype=float)
+    counts, edges = alumni_charts.salary_histogram(gaji)
+    assert counts.sum() == np.count_nonzero(~np.isnan(gaji))
+    assert len(edges) == alumni_charts.HISTOGRAM_BINS + 1
+    assert alumni_charts.salary_histogram(np.array([np.nan]))[0].size == 0
+
+
+def test_box_stats_match_pandas_quartiles(data):
+    boxes = alumni_charts.salary_box_stats(data)
+    gaji = pd.to_numeric(data['Rata-rata Gaji'], errors='coerce').groupby(data['Program Studi'])
+    assert boxes['median'].to_dict() == pytest.approx(gaji.median().dropna().to_dict())
+    assert (boxes['lowerfence'] <= boxes['q1']).all() and (boxes['q3'] <= boxes['upperfence']).all()
+
+
+def test_figures_do_not_grow_with_the_rows(data):
+    def trace_points(frame):
+        figures = alumni_charts.build_statistics_figures(frame, alumni_stats.AlumniStats.from_frame(frame))
+        return {name: [{key: len(value) for key, value in trace.to_plotly_json().items()
+                        if isinstance(value, (list, tuple, np.ndarray))} for trace in fig.data]
+                for name, fig in figures.items() if isinstance(fig, go.Figure)}
+
+    assert trace_points(pd.concat([data] * 4, ignore_index=True)) == trace_points(data)
+
+
+def test_serialised_figure_is_what_streamlit_sends(data):
+    import plotly.io
+    import plotly.tools
+
+    figure = alumni_charts.build_statistics_figures(data, alumni_stats.AlumniStats.from_frame(data))['program']
+    serialised = alumni_charts.SerialisedFigure(figure)
+    sent = plotly.tools.return_figure_from_figure_or_data(serialised, validate_figure=True)
+    assert sent is serialised.to_dict()
+    assert plotly.io.to_json(sent, validate=False) == plotly.io.to_json(figure, validate=False)
+    # The figure itself stays an ordinary one: later changes show up in a new serialisation
+    figure.update_layout(title="Diubah")
+    assert type(figure) is go.Figure
+    assert alumni_charts.SerialisedFigure(figure).to_dict()['layout']['title']['text'] == "Diubah"
+    with pytest.raises(AttributeError):
+        serialised.update_layout(title="Diubah")
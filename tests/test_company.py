@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+import alumni_company
+import alumni_db
+
+
+@pytest.mark.parametrize('name, key', [
+    ('PT Bank Central Asia Tbk', 'bank central asia'), ('Bank  Central Asia', 'bank central asia'),
+    ('PT. HM Sampoerna Tbk', 'hm sampoerna'), ('Mckinsey & Company', 'mckinsey'),
+    ('Boston Consulting Group (BCG)', 'boston consulting group'), (None, ''),
+])
+def test_name_key_drops_legal_forms_and_acronyms(name, key):
+    assert alumni_company.name_key(name) == key
+
+
+def test_variants_resolve_to_one_employer():
+    index = alumni_company.CompanyIndex()
+    assert index.resolve('PT Bank Central Asia Tbk') == ('PT Bank Central Asia Tbk', 1.0)
+    assert index.resolve('Bank Central Asia')[0] == 'PT Bank Central Asia Tbk'
+    assert index.resolve('BCA')[0] == 'PT Bank Central Asia Tbk'
+    assert index.resolve('Bank Mandiri')[0] == 'Bank Mandiri'
+    assert index.resolve('Bank Central Asia Syariah')[0] == 'Bank Central Asia Syariah'
+
+
+def test_database_aliases_match_the_in_memory_resolution(conn, data):
+    aliases = alumni_company.load_aliases(conn)
+    assert aliases == alumni_company.aliases_from_frame(data)
+    assert (alumni_company.canonical_name('PT. HM Sampoerna Tbk', aliases)
+            == alumni_company.canonical_name('PT HM Sampoerna Tbk', aliases))
+    assert (alumni_company.canonical_name('Bank  Indonesia', aliases)
+            == alumni_company.canonical_name('Bank Indonesia', aliases))
+    counts = alumni_company.canonical_counts(data['Nama Perusahaan'].value_counts().to_dict(), aliases)
+    assert sum(counts.values()) == data['Nama Perusahaan'].notna().sum()
+    assert len(counts) < data['Nama Perusahaan'].nunique()
+
+
+def test_writes_resolve_new_variants(conn, data, new_record):
+    canonical = alumni_company.canonical_name('Bank Indonesia', alumni_company.load_aliases(conn))
+    record = new_record('1234567890', **{'Nama Perusahaan': 'PT Bank Indonesia (Persero)', 'Id Karyawan': 'BI999'})
+    with conn:
+        alumni_db.write_frame(conn, alumni_db.clean_alumni_frame(pd.DataFrame([record])), upsert=True)
+    aliases = alumni_company.load_aliases(conn)
+    assert alumni_company.canonical_name('PT Bank Indonesia (Persero)', aliases) == canonical
+
+
+def test_rolled_back_aliases_are_forgotten(conn):
+    conn.execute('BEGIN')
+    alumni_company.resolve(conn, [(None, 'Perusahaan Hilang Sejahtera')])
+    conn.rollback()
+    with conn:
+        alumni_company.resolve(conn, [(None, 'PT Perusahaan Hilang Sejahtera Tbk')])
+    aliases = alumni_company.load_aliases(conn)
+    assert aliases['perusahaan hilang sejahtera'] == 'PT Perusahaan Hilang Sejahtera Tbk'
+    # A committed alias stays known
+    with conn:
+        alumni_company.resolve(conn, [(None, 'Perusahaan Hilang Sejahtera (Persero)')])
+    assert alumni_company.load_aliases(conn) == aliases
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import alumni_db
+import alumni_export
+import alumni_store
+
+
+def read_back(path, fmt):
+    if fmt == 'csv':
+        return pd.read_csv(path, dtype={'NPM': str})
+    return pd.read_excel(path, sheet_name=alumni_db.EXCEL_SHEET, dtype={'NPM': str})
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'xlsx'])
+def test_chunked_export_holds_every_row(tmp_path, data, fmt):
+    path = str(tmp_path / f'alumni.{fmt}')
+    alumni_export.WRITERS[fmt](path, alumni_export.iter_chunks(data, chunk_rows=7))
+    exported = read_back(path, fmt)
+    assert list(exported.columns) == [col for col in alumni_db.COLUMNS if col in data.columns]
+    assert exported['NPM'].tolist() == data['NPM'].tolist()
+    assert exported['Nama'].tolist() == data['Nama'].tolist()
+    assert exported['Rata-rata Gaji'].sum() == pytest.approx(data['Rata-rata Gaji'].sum())
+
+
+def test_export_of_a_selection_keeps_its_order(tmp_path, data):
+    rows = np.array([5, 0, 3])
+    path = str(tmp_path / 'pilihan.csv')
+    alumni_export.write_csv(path, alumni_export.iter_chunks(data, rows, chunk_rows=2))
+    assert read_back(path, 'csv')['NPM'].tolist() == data['NPM'].iloc[rows].tolist()
+
+
+def test_export_cache_reuses_files_per_version(tmp_path, data):
+    cache = alumni_export.ExportCache(max_files=2, directory=str(tmp_path / 'ekspor'))
+    snapshot = alumni_store.Snapshot(1, data)
+    path = cache.export(snapshot, 'csv')
+    assert cache.export(snapshot, 'csv') == path
+    assert cache.export(snapshot, 'csv', rows=np.array([0, 1])) != path
+    assert cache.export(alumni_store.Snapshot(2, data), 'csv') != path
+    # Only the two most recent files are kept
+    assert not os.path.exists(path)
+    assert len(os.listdir(tmp_path / 'ekspor')) == 2
+
+
+def test_export_cache_is_keyed_on_the_data_version(tmp_path, db_path, data, new_record):
+    cache = alumni_export.ExportCache(directory=str(tmp_path / 'ekspor'))
+    path = cache.export(alumni_store.AlumniStore(db_path).snapshot(), 'csv')
+    store = alumni_store.AlumniStore(db_path)
+    store.add(new_record('1234567890'))
+    # A new store starts counting at version 1 again, with other data
+    restarted = alumni_store.AlumniStore(db_path).snapshot()
+    assert restarted.version == 1
+    fresh = cache.export(restarted, 'csv')
+    assert fresh != path
+    assert read_back(fresh, 'csv')['NPM'].tolist() == restarted.data['NPM'].tolist()
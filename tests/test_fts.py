@@ -0,0 +1,81 @@
+import shutil
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+import alumni_db
+import alumni_fts
+
+
+@pytest.mark.parametrize('word, root', [
+    ('peramalan', 'ramal'), ('meramalkan', 'ramal'), ('ramalan', 'ramal'),
+    ('penerapan', 'terap'), ('diterapkan', 'terap'), ('pembelajaran', 'belajar'),
+    ('memprediksi', 'prediks'), ('sistem', 'sistem'),
+])
+def test_stemmer_finds_the_root(word, root):
+    assert alumni_fts.stem(word) == root
+
+
+def titles_with(data, word):
+    return set(data.loc[data['Judul Skripsi'].str.contains(word, case=False, na=False), 'NPM'])
+
+
+def test_search_matches_every_form_of_a_word(conn, data):
+    # "Prediksi ..." and "... untuk Memprediksi ..." share the root
+    expected = titles_with(data, 'prediksi')
+    assert len(expected) > 1
+    result = alumni_fts.search(conn, 'prediksi', sources=('judul',))
+    assert set(result['NPM']) == expected
+    assert result['Skor'].is_monotonic_decreasing
+    # Titles with the word as written are highlighted and rank above root-only matches
+    highlighted = result['Cuplikan'].str.contains('«')
+    assert highlighted.any() and highlighted.is_monotonic_decreasing
+
+
+def test_prefix_and_conjunctive_queries(conn, data):
+    assert set(alumni_fts.search(conn, 'predik*', sources=('judul',))['NPM']) == titles_with(data, r'\bpredik')
+    both = alumni_fts.search(conn, 'prediksi jakarta', sources=('judul',))
+    assert set(both['NPM']) == titles_with(data, 'prediksi') & titles_with(data, 'jakarta')
+    assert alumni_fts.search(conn, ' * ').empty
+
+
+def test_triggers_keep_the_index_in_step(conn, data):
+    npm = data['NPM'].iloc[0]
+    with conn:
+        conn.execute("UPDATE riwayat_akademis SET judul_skripsi = 'Peramalan Curah Hujan' WHERE npm = ?", [npm])
+    assert alumni_fts.search(conn, 'meramalkan')['NPM'].tolist() == [npm]
+    with conn:
+        conn.execute('DELETE FROM riwayat_akademis WHERE npm = ?', [npm])
+    assert alumni_fts.search(conn, 'ramalan').empty
+
+
+def addresses_with(data, word):
+    return set(data.loc[data['Alamat Perusahaan'].str.contains(word, case=False, na=False), 'NPM'])
+
+
+def test_address_hits_survive_a_vacuum(conn, data):
+    # Free the first company's rowid, then let VACUUM compact the table
+    first = conn.execute('SELECT id_karyawan FROM perusahaan ORDER BY rowid LIMIT 1').fetchone()[0]
+    with conn:
+        conn.execute('UPDATE karier SET id_karyawan = NULL WHERE id_karyawan = ?', [first])
+        conn.execute('DELETE FROM perusahaan WHERE id_karyawan = ?', [first])
+    conn.execute('VACUUM')
+    data = alumni_db.fetch_alumni(conn)
+    for word in ['jakarta', 'sudirman', 'tangerang']:
+        hits = alumni_fts.search(conn, word, sources=('alamat',))
+        assert set(hits['NPM']) == addresses_with(data, word), word
+
+
+def test_older_databases_get_company_ids(tmp_path, workbook):
+    path = str(tmp_path / 'lama.db')
+    shutil.copy(alumni_db.DB_PATH, path)
+    with closing(sqlite3.connect(path)) as old:
+        assert 'id' not in [row[1] for row in old.execute('PRAGMA table_info(perusahaan)')]
+    alumni_db.init_database(path, workbook)
+    with closing(alumni_db.connect(path)) as conn:
+        assert 'id' in [row[1] for row in conn.execute('PRAGMA table_info(perusahaan)')]
+        assert conn.execute('PRAGMA foreign_key_check').fetchall() == []
+        assert conn.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+        data = alumni_db.fetch_alumni(conn)
+        assert set(alumni_fts.search(conn, 'jakarta', sources=('alamat',))['NPM']) == addresses_with(data, 'jakarta')
@@ -0,0 +1,63 @@
+import io
+
+import pandas as pd
+import pytest
+
+import alumni_db
+import alumni_import
+
+
+def upload(name, content):
+    """A file object like the one st.file_uploader returns"""
+    file = io.BytesIO(content)
+    file.name = name
+    file.size = len(content)
+    return file
+
+
+def by_npm(frame):
+    return frame.drop(columns='No').sort_values('NPM', ignore_index=True)
+
+
+@pytest.fixture
+def csv_upload(workbook):
+    raw = pd.read_excel(workbook, sheet_name=alumni_db.EXCEL_SHEET, dtype={'NPM': str})
+    return upload('alumni.csv', raw.to_csv(index=False).encode('utf-8'))
+
+
+def test_chunked_csv_import_matches_the_workbook(conn, data, csv_upload):
+    fractions = []
+    written = alumni_import.import_chunks(conn, alumni_import.iter_upload_chunks(csv_upload, chunk_size=7),
+                                          replace=True, progress=lambda rows, fraction: fractions.append(fraction))
+    assert written == len(data)
+    assert len(fractions) > 1 and fractions[-1] == 1.0
+    pd.testing.assert_frame_equal(by_npm(alumni_db.fetch_alumni(conn)), by_npm(data))
+
+
+def test_chunked_excel_import_matches_the_workbook(conn, data, workbook):
+    content = io.BytesIO()
+    with pd.ExcelWriter(content) as writer:
+        pd.read_excel(workbook, sheet_name=alumni_db.EXCEL_SHEET).to_excel(
+            writer, sheet_name=alumni_db.EXCEL_SHEET, index=False)
+    chunks = alumni_import.iter_upload_chunks(upload('alumni.xlsx', content.getvalue()), chunk_size=7)
+    assert alumni_import.import_chunks(conn, chunks, replace=True) == len(data)
+    pd.testing.assert_frame_equal(by_npm(alumni_db.fetch_alumni(conn)), by_npm(data))
+
+
+def test_the_bundled_workbook_can_be_uploaded(conn, data, workbook):
+    # Its header row has blank cells past the last column
+    with open(workbook, 'rb') as f:
+        chunks = alumni_import.iter_upload_chunks(upload('alumni.xlsx', f.read()), chunk_size=7)
+        assert alumni_import.import_chunks(conn, chunks, replace=True) == len(data)
+    pd.testing.assert_frame_equal(by_npm(alumni_db.fetch_alumni(conn)), by_npm(data))
+
+
+def test_a_bad_chunk_leaves_the_database_untouched(conn, data, csv_upload):
+    def chunks():
+        first, fraction = next(alumni_import.iter_upload_chunks(csv_upload, chunk_size=7))
+        yield first.assign(Nama='Ditimpa'), fraction
+        yield first.drop(columns='NPM'), 1.0
+
+    with pytest.raises(alumni_import.UploadError):
+        alumni_import.import_chunks(conn, chunks(), replace=True)
+    pd.testing.assert_frame_equal(alumni_db.fetch_alumni(conn), data)
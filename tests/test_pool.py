@@ -0,0 +1,50 @@
+import sqlite3
+import threading
+
+import pytest
+
+import alumni_pool
+
+
+def test_connections_are_reused(db_path):
+    pool = alumni_pool.ConnectionPool(db_path, size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as again:
+        assert again is first
+    pool.close()
+
+
+def test_pool_never_exceeds_its_size(db_path):
+    pool = alumni_pool.ConnectionPool(db_path, size=1)
+    borrowed = threading.Event()
+
+    def borrow():
+        with pool.connection():
+            borrowed.set()
+
+    with pool.connection():
+        threading.Thread(target=borrow, daemon=True).start()
+        assert not borrowed.wait(0.2)
+    assert borrowed.wait(5)
+    pool.close()
+
+
+def test_an_open_transaction_is_rolled_back_on_return(db_path, data):
+    pool = alumni_pool.ConnectionPool(db_path, size=1)
+    with pool.connection() as conn:
+        conn.execute('BEGIN')
+        conn.execute('DELETE FROM karier')
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute('SELECT COUNT(*) FROM karier').fetchone()[0] == len(data)
+    pool.close()
+
+
+def test_readonly_connections_cannot_write(db_path):
+    pool = alumni_pool.ConnectionPool(db_path, readonly=True)
+    with pool.connection() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM mahasiswa').fetchone()[0] > 0
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute('DELETE FROM mahasiswa')
+    pool.close()
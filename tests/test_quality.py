@@ -0,0 +1,45 @@
+import alumni_db
+import alumni_quality
+
+
+def npm_of(raw, row):
+    return alumni_db.normalize_npm(raw.loc[row, 'NPM'])
+
+
+def test_quarantine_rules(raw):
+    upload = raw.iloc[:6].astype(object)
+    upload.loc[1, 'NPM'] = 'abc'
+    upload.loc[2, 'Angkatan'] = 1800
+    upload.loc[3, 'Rata-rata Gaji'] = 10
+    upload.loc[5] = upload.loc[0]
+    upload.loc[6] = upload.loc[4]
+    upload.loc[6, 'Pekerjaan'] = 'Pekerjaan Lain'
+    upload = upload.reset_index(drop=True)
+    scanner = alumni_quality.QualityScanner(source='unggahan')
+    passed = scanner.check(upload, alumni_db.clean_alumni_frame(upload))
+
+    assert sorted(passed['NPM']) == sorted([npm_of(raw, 0), npm_of(raw, 4)])
+    reasons = dict(zip(scanner.quarantined()['Baris'], scanner.quarantined()['Alasan']))
+    assert reasons == {3: 'npm_tidak_valid', 4: 'angkatan_tidak_wajar, tahun_lulus_tidak_wajar',
+                       5: 'gaji_tidak_wajar', 7: 'duplikat', 8: 'npm_ganda'}
+
+
+def test_near_duplicates_of_published_rows(conn, data, raw):
+    # The same alumnus under an NPM one typo away from a published one
+    npm = npm_of(raw, 0)
+    typo = npm[:-1] + ('0' if npm[-1] != '0' else '1')
+    copy = raw.iloc[[0]].assign(NPM=typo, Nama=raw.loc[0, 'Nama'].upper())
+    scanner = alumni_quality.QualityScanner(data, source='unggahan')
+    assert scanner.check(copy, alumni_db.clean_alumni_frame(copy)).empty
+    assert scanner.counts() == {'mirip': 1}
+
+    with conn:
+        scanner.save(conn)
+        scanner.save(conn)
+    assert conn.execute("SELECT COUNT(*) FROM karantina WHERE sumber = 'unggahan'").fetchone()[0] == 1
+
+
+def test_the_bundled_workbook_is_clean(raw, data):
+    scanner = alumni_quality.QualityScanner(source='workbook')
+    assert len(scanner.check(raw, alumni_db.clean_alumni_frame(raw))) == len(data)
+    assert scanner.quarantined().empty
@@ -0,0 +1,34 @@
+import pytest
+
+import alumni_query
+import alumni_store
+
+
+def walk_pages(snapshot, sort, ascending, limit):
+    npms, after = [], None
+    while True:
+        result = alumni_query.page(snapshot, alumni_query.parse_filters({}), sort, ascending, after, limit)
+        npms += [item['NPM'] for item in result['items']]
+        after = result['next']
+        if after is None:
+            return npms
+
+
+@pytest.mark.parametrize('sort, ascending', [('Rata-rata Gaji', False), ('Program Studi', True), ('No', True)])
+def test_keyset_pages_cover_every_row_once(data, sort, ascending):
+    snapshot = alumni_store.Snapshot(1, data=data)
+    npms = walk_pages(snapshot, sort, ascending, limit=7)
+    assert sorted(npms) == sorted(data['NPM'])
+    assert npms == walk_pages(snapshot, sort, ascending, limit=200)
+
+
+def test_keyset_cursor_survives_a_new_version(data):
+    first = alumni_query.page(alumni_store.Snapshot(1, data=data), alumni_query.parse_filters({}), 'Nama', limit=10)
+    # Drop a row of the first page and one not read yet: the next page neither repeats nor skips any row
+    later = alumni_store.Snapshot(2, data=data[~data['NPM'].isin([first['items'][0]['NPM'], data['NPM'].iloc[-1]])])
+    rest = alumni_query.page(later, alumni_query.parse_filters({}), 'Nama', after=first['next'], limit=200)
+    expected = later.data.sort_values(['Nama', 'NPM'])['NPM'].tolist()
+    assert [item['NPM'] for item in rest['items']] == expected[expected.index(first['items'][-1]['NPM']) + 1:]
+
+    with pytest.raises(alumni_query.QueryError):
+        alumni_query.page(later, alumni_query.parse_filters({}), 'Nama', after='bukan-kursor')
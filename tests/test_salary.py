@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import alumni_salary
+
+
+def with_salary(data):
+    return data.assign(gaji=pd.to_numeric(data['Rata-rata Gaji'], errors='coerce').astype(float)).dropna(
+        subset=['gaji'])
+
+
+@pytest.mark.parametrize('by', [['Program Studi'], ['Angkatan'], ['Program Studi', 'Tahun Lulus'], ['Peminatan']])
+def test_percentiles_match_pandas_quantiles(data, by):
+    table = alumni_salary.percentile_table(data, by).set_index(by)
+    groups = with_salary(data).dropna(subset=by).groupby(by, observed=True)['gaji']
+    assert sorted(table.index.tolist()) == sorted(groups.size().index.tolist())
+    for key, values in groups:
+        key = key[0] if len(by) == 1 else key
+        row = table.loc[key]
+        assert row['Jumlah'] == len(values)
+        assert row['Rata-rata'] == pytest.approx(values.mean())
+        for p in alumni_salary.PERCENTILES:
+            assert row[f'P{p}'] == pytest.approx(values.quantile(p / 100))
+
+
+def test_min_count_drops_small_groups(data):
+    analytics = alumni_salary.SalaryAnalytics(data)
+    full = analytics.percentiles(['Program Studi', 'Angkatan'])
+    table = analytics.percentiles(['Program Studi', 'Angkatan'], min_count=5)
+    assert table.equals(full[full['Jumlah'] >= 5].reset_index(drop=True))
+    assert len(table) < len(full)
+    with pytest.raises(KeyError):
+        analytics.percentiles(['Nama'])
+
+
+def test_cohort_trends_compare_consecutive_years():
+    data = pd.DataFrame({
+        'Program Studi': ['A', 'A', 'A', 'A', 'B', 'B'],
+        'Angkatan': [2015, 2015, 2016, 2018, 2015, 2016],
+        'Tahun Lulus': [2019, 2019, 2020, 2022, 2019, 2020],
+        'Peminatan': [None] * 6,
+        'Rata-rata Gaji': [10, 20, 30, 60, 100, 50],
+    })
+    trends = alumni_salary.cohort_trends(data, 'Tahun Lulus', by='Program Studi')
+    changes = dict(zip(zip(trends['Program Studi'], trends['Tahun Lulus']), trends['Perubahan Median (%)']))
+    assert np.isnan(changes[('A', 2019)]) and np.isnan(changes[('B', 2019)])
+    assert changes[('A', 2020)] == pytest.approx(100.0)
+    # 2021 has no cohort, so 2022 is not compared with 2020
+    assert np.isnan(changes[('A', 2022)])
+    assert changes[('B', 2020)] == pytest.approx(-50.0)
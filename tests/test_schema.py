@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+import alumni_schema
+
+
+def test_database_reads_use_the_compact_layout(data):
+    for col, dtype in alumni_schema.SCHEMA.items():
+        assert data[col].dtype == dtype, col
+
+
+def test_schema_round_trip_keeps_the_values(data):
+    legacy = alumni_schema.legacy_layout(data)
+    pd.testing.assert_frame_equal(alumni_schema.apply_schema(legacy), data)
+    assert alumni_schema.apply_schema(data) is not data
+
+
+def test_appended_rows_widen_the_categories(data):
+    row = data.iloc[[0]].astype(object).assign(**{'NPM': '1234567890', 'Program Studi': 'Prodi Baru',
+                                                  'Angkatan': '2020', 'Rata-rata Gaji': 7_500_000.0})
+    combined = alumni_schema.append_rows(data, row)
+    assert isinstance(combined['Program Studi'].dtype, pd.CategoricalDtype)
+    assert combined['Program Studi'].iloc[-1] == 'Prodi Baru'
+    assert combined['Angkatan'].dtype == 'Int16' and combined['Angkatan'].iloc[-1] == 2020
+    pd.testing.assert_frame_equal(combined.iloc[:-1].astype(object), data.astype(object))
+
+
+def test_numeric_array_marks_missing_values_nan(data):
+    values = alumni_schema.numeric_array(data['Rata-rata Gaji'])
+    assert values.dtype == float
+    assert np.isnan(values).sum() == data['Rata-rata Gaji'].isna().sum()
+    assert np.nansum(values) == data['Rata-rata Gaji'].sum()
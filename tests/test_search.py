@@ -0,0 +1,129 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import alumni_db
+import alumni_search
+
+
+def search_filters(data):
+    """One value per filter that matches some of the bundled alumni"""
+    return {
+        'nama': 'muhammad',
+        'pekerjaan': 'analyst',
+        'perusahaan': 'bank',
+        'npm': str(data['NPM'].iloc[0])[:4],
+        'program_studi': 'Statistika',
+        'gaji_min': 8_000_000,
+        'gaji_max': 15_000_000,
+    }
+
+
+def scan(data, filters):
+    """The rows matching ``filters``, found by scanning every row"""
+    matched = np.ones(len(data), dtype=bool)
+    for key, column in alumni_search.TEXT_FILTERS.items():
+        if filters.get(key):
+            values = data[column].astype('string').str.lower()
+            matched &= values.str.contains(filters[key], regex=False).fillna(False).to_numpy(dtype=bool)
+    if filters.get('npm'):
+        matched &= data['NPM'].astype('string').str.startswith(filters['npm']).fillna(False).to_numpy(dtype=bool)
+    if filters.get('program_studi'):
+        matched &= (data['Program Studi'] == filters['program_studi']).fillna(False).to_numpy(dtype=bool)
+    gaji = data['Rata-rata Gaji'].astype(float).to_numpy()
+    with np.errstate(invalid='ignore'):
+        if filters.get('gaji_min'):
+            matched &= gaji >= filters['gaji_min']
+        if filters.get('gaji_max'):
+            matched &= gaji <= filters['gaji_max']
+    return np.flatnonzero(matched)
+
+
+def test_unfiltered_search_returns_none(data):
+    assert alumni_search.SearchIndex(data).search({}) is None
+
+
+def test_every_filter_combination_matches_a_scan(data):
+    index = alumni_search.SearchIndex(data)
+    values = search_filters(data)
+    for size in range(1, len(values) + 1):
+        for keys in itertools.combinations(values, size):
+            filters = {key: values[key] for key in keys}
+            assert np.array_equal(index.search(filters), scan(data, filters)), filters
+
+
+@pytest.mark.parametrize('key, value', [('nama', 'mu'), ('nama', 'MUHAMMAD'), ('perusahaan', 'zzz tidak ada')])
+def test_short_uppercase_and_missing_queries(data, key, value):
+    filters = {key: value}
+    assert np.array_equal(alumni_search.SearchIndex(data).search(filters), scan(data, {key: value.lower()}))
+
+
+def test_npm_filter_matches_by_prefix(data):
+    index = alumni_search.SearchIndex(data)
+    npm = str(data['NPM'].iloc[0])
+    assert 0 in index.search({'npm': npm[:-2]})
+    assert 0 not in index.search({'npm': npm[2:]})
+
+
+@pytest.mark.parametrize('column', ['Nama', 'Angkatan', 'Rata-rata Gaji', 'Nama Perusahaan'])
+@pytest.mark.parametrize('ascending', [True, False])
+def test_sort_orders_the_rows_with_missing_values_last(data, column, ascending):
+    index = alumni_search.SearchIndex(data)
+    rows = index.search({'gaji_max': 20_000_000})
+    ordered = index.sort(rows, column, ascending)
+    assert sorted(ordered) == sorted(rows)
+    values = data[column].iloc[ordered]
+    present = values.notna().to_numpy()
+    assert present.tolist() == sorted(present, reverse=True)
+    expected = values[present].sort_values(ascending=ascending)
+    assert values[present].tolist() == expected.tolist()
+
+
+def test_npm_positions_find_every_row(data):
+    positions = alumni_search.npm_positions(data)
+    assert len(positions) == len(data)
+    for npm, position in positions.items():
+        assert data['NPM'].iloc[position] == npm
+
+
+@pytest.mark.parametrize('old, new, changed', [
+    ({'nama': 'sar'}, {'nama': 'sari'}, ['nama']),
+    ({'nama': 'ari'}, {'nama': 'Sari'}, ['nama']),
+    ({'npm': '16'}, {'npm': '1606'}, ['npm']),
+    ({'gaji_min': 5}, {'gaji_min': 8, 'program_studi': 'Statistika'}, ['program_studi', 'gaji_min']),
+    ({'gaji_max': 20}, {'gaji_max': 15}, ['gaji_max']),
+    ({'nama': 'sari'}, {'nama': 'sari'}, []),
+    ({'nama': 'sari'}, {'nama': 'sar'}, None),
+    ({'nama': 'sari'}, {}, None),
+    ({'program_studi': 'Statistika'}, {'program_studi': 'Matematika'}, None),
+    ({'gaji_max': 15}, {'gaji_max': 20}, None),
+    ({'npm': '1606'}, {'npm': '1607'}, None),
+])
+def test_narrowed_filters(old, new, changed):
+    assert alumni_search.narrowed_filters(old, new) == changed
+
+
+def test_refining_the_previous_result_matches_a_fresh_search(data):
+    index = alumni_search.SearchIndex(data)
+    steps = [{'gaji_max': 30_000_000}, {'gaji_max': 30_000_000, 'nama': 'a'},
+             {'gaji_max': 20_000_000, 'nama': 'an', 'program_studi': 'Statistika'},
+             {'gaji_max': 20_000_000, 'gaji_min': 6_000_000, 'nama': 'an', 'program_studi': 'Statistika',
+              'npm': str(data['NPM'].iloc[0])[:4]}]
+    previous = None
+    for filters in steps:
+        rows = index.search(filters, previous)
+        assert np.array_equal(rows, scan(data, filters)), filters
+        previous = (filters, rows)
+    # A wider search starts over
+    assert np.array_equal(index.search({'nama': 'a'}, previous), scan(data, {'nama': 'a'}))
+
+
+def test_sql_filters_match_the_index(conn, data):
+    index = alumni_search.SearchIndex(data)
+    values = dict(search_filters(data), npm=str(data['NPM'].iloc[0])[2:6])
+    for size in range(1, 3):
+        for keys in itertools.combinations(values, size):
+            filters = {key: values[key] for key in keys}
+            expected = data['NPM'].iloc[index.search(filters)].tolist()
+            assert alumni_db.fetch_alumni(conn, filters)['NPM'].tolist() == expected, filters
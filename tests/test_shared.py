@@ -0,0 +1,56 @@
+import os
+
+import pandas as pd
+import pytest
+
+import alumni_shared
+import alumni_store
+
+pytestmark = pytest.mark.skipif(not alumni_shared.available(), reason="pyarrow is not installed")
+
+
+def test_snapshot_files_round_trip(tmp_path, data):
+    directory = str(tmp_path / 'snapshots')
+    path = alumni_shared.write(directory, 'abc-v1', data)
+    pd.testing.assert_frame_equal(alumni_shared.read(directory, 'abc-v1'), data)
+    # Files never change once written
+    mtime = os.path.getmtime(path)
+    assert alumni_shared.write(directory, 'abc-v1', data.iloc[:1]) == path
+    assert os.path.getmtime(path) == mtime
+    assert alumni_shared.read(directory, 'abc-v2') is None
+
+
+def test_only_the_newest_files_are_kept(tmp_path, data):
+    directory = str(tmp_path / 'snapshots')
+    for version in range(alumni_shared.KEEP + 2):
+        newest = alumni_shared.write(directory, f'abc-v{version}', data.iloc[:5])
+    files = os.listdir(directory)
+    assert len(files) == alumni_shared.KEEP and os.path.basename(newest) in files
+
+
+def test_a_store_picks_up_writes_from_another_process(db_path, data, new_record, monkeypatch):
+    monkeypatch.setattr(alumni_store, 'REFRESH_INTERVAL', 0)
+    writer, reader = alumni_store.AlumniStore(db_path), alumni_store.AlumniStore(db_path)
+    assert len(reader.snapshot().data) == len(data)
+    writer.add(new_record('1234567890'))
+
+    snapshot = reader.snapshot()
+    assert snapshot.version == 2
+    assert snapshot.derived('stats', None).total == len(data) + 1
+    assert '1234567890' in set(snapshot.data['NPM'])
+    # The rows came from the file the writer shared
+    assert os.listdir(writer.shared_dir)
+    pd.testing.assert_frame_equal(snapshot.data, writer.snapshot().data)
+
+
+def test_in_place_writes_are_shared_by_the_process_that_needs_them(db_path, data, new_record, monkeypatch):
+    monkeypatch.setattr(alumni_store, 'REFRESH_INTERVAL', 0)
+    writer = alumni_store.AlumniStore(db_path)
+    assert len(writer.snapshot().data) == len(data)
+    shared = set(os.listdir(writer.shared_dir))
+    assert writer.add(new_record('1234567890')).snapshot.loaded
+    assert set(os.listdir(writer.shared_dir)) == shared
+
+    reader = alumni_store.AlumniStore(db_path)
+    assert '1234567890' in set(reader.snapshot().data['NPM'])
+    assert len(set(os.listdir(writer.shared_dir)) - shared) == 1
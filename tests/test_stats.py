@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import alumni_stats
+import alumni_store
+
+
+def aggregates(stats):
+    """Everything the pages read from an AlumniStats, as plain values"""
+    return {
+        'total': stats.total,
+        'counts': {column: stats.counts(column).to_dict() for column in alumni_stats.GROUP_COLUMNS},
+        'gaji': (stats.gaji_mean, stats.gaji_min, stats.gaji_max),
+        'tahun_lulus_mean': stats.tahun_lulus_mean,
+        'angkatan_range': stats.angkatan_range,
+        'peminatan_gaji': stats.peminatan_gaji_mean().to_dict(),
+    }
+
+
+def test_aggregates_match_pandas(data):
+    stats = alumni_stats.AlumniStats.from_frame(data)
+    gaji = pd.to_numeric(data['Rata-rata Gaji'], errors='coerce')
+    assert stats.total == len(data)
+    for column in alumni_stats.GROUP_COLUMNS:
+        assert stats.counts(column).to_dict() == data[column].value_counts().to_dict()
+    assert stats.gaji_mean == pytest.approx(gaji.mean())
+    assert (stats.gaji_min, stats.gaji_max) == (gaji.min(), gaji.max())
+    assert stats.tahun_lulus_mean == pytest.approx(pd.to_numeric(data['Tahun Lulus'], errors='coerce').mean())
+    expected = gaji.groupby(data['Peminatan']).mean().dropna()
+    assert stats.peminatan_gaji_mean().to_dict() == pytest.approx(expected.to_dict())
+
+
+def test_empty_frame(data):
+    stats = alumni_stats.AlumniStats.from_frame(data.iloc[:0])
+    assert stats.total == 0 and np.isnan(stats.gaji_mean) and stats.angkatan_range == (None, None)
+
+
+def test_added_record_updates_the_aggregates(db_path, new_record):
+    store = alumni_store.AlumniStore(db_path)
+    store.snapshot().derived('stats', alumni_stats.AlumniStats.from_frame)
+    snapshot = store.add(new_record('1234567890', **{'Program Studi': 'Statistika', 'Rata-rata Gaji': 99_000_000})).snapshot
+    # Read from the summary tables, not rebuilt from the rows
+    stats = snapshot.derived('stats', lambda data: pytest.fail("the aggregates were rebuilt"))
+    assert aggregates(stats) == aggregates(alumni_stats.AlumniStats.from_frame(snapshot.data))
+    assert stats.gaji_max == 99_000_000
@@ -0,0 +1,79 @@
+import sqlite3
+import threading
+
+import pytest
+
+import alumni_store
+
+
+def test_records_queued_during_a_write_share_the_next_batch():
+    started, release = threading.Event(), threading.Event()
+    batches = []
+
+    def write_batch(records):
+        batches.append(records)
+        started.set()
+        release.wait(5)
+        return [record * 10 for record in records]
+
+    writer = alumni_store.WriteQueue(write_batch)
+    first = writer.submit(1)
+    assert started.wait(5)
+    waiting = [writer.submit(n) for n in (2, 3, 4)]
+    release.set()
+    assert [future.result(5) for future in [first] + waiting] == [10, 20, 30, 40]
+    assert batches == [[1], [2, 3, 4]]
+
+
+def test_a_failing_batch_fails_every_caller():
+    writer = alumni_store.WriteQueue(lambda records: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        writer.submit('a').result(5)
+
+
+def test_add_inserts_then_updates_in_place(db_path, data, new_record):
+    store = alumni_store.AlumniStore(db_path)
+    result = store.add(new_record('1234567890'))
+    assert result.created and len(result.snapshot) == len(data) + 1
+
+    result = store.add(new_record('1234567890', Pekerjaan='Analis Data'))
+    assert not result.created and len(result.snapshot) == len(data) + 1
+    rows = result.snapshot.data[result.snapshot.data['NPM'] == '1234567890']
+    assert rows['Pekerjaan'].tolist() == ['Analis Data']
+    assert result.snapshot.data['No'].is_unique
+
+
+def test_a_bad_record_is_reported_to_its_caller_only(db_path, data, new_record):
+    store = alumni_store.AlumniStore(db_path)
+    outcomes = store._write_batch([new_record('1234567890'), new_record(None),
+                                   new_record('1234567891', Nama=None), new_record('1234567892')])
+    assert isinstance(outcomes[1], ValueError)
+    assert isinstance(outcomes[2], sqlite3.IntegrityError)
+    assert outcomes[0].created and outcomes[3].created
+    assert outcomes[3].snapshot is store.snapshot()
+    assert set(store.snapshot().data['NPM']) == set(data['NPM']) | {'1234567890', '1234567892'}
+
+
+def test_snapshot_rows_load_once_on_first_use(data):
+    calls = []
+    snapshot = alumni_store.Snapshot(1, loader=lambda: calls.append(1) or data)
+    snapshot.attach('stats', 'ringkasan')
+    assert snapshot.derived('stats', lambda rows: pytest.fail("the rows were read")) == 'ringkasan'
+    assert not snapshot.loaded and not calls
+    assert snapshot.data is data and len(snapshot) == len(data)
+    assert snapshot.loaded and calls == [1]
+
+
+def test_store_starts_from_the_summary_only(db_path, data, new_record):
+    store = alumni_store.AlumniStore(db_path)
+    assert not store.snapshot().loaded
+    assert store.snapshot().derived('stats', None).total == len(data)
+
+    # Writes before the first load publish lazily, with fresh stats
+    snapshot = store.add(new_record('1234567890')).snapshot
+    assert not snapshot.loaded
+    assert snapshot.derived('stats', None).total == len(data) + 1
+    assert '1234567890' in set(snapshot.data['NPM'])
+
+    snapshot = store.add(new_record('1234567891')).snapshot
+    assert snapshot.loaded and len(snapshot.data) == len(data) + 2
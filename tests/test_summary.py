@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+import alumni_db
+import alumni_stats
+import alumni_summary
+
+
+def summary_rows(conn):
+    return sorted(alumni_summary.fetch_rows(conn), key=repr)
+
+
+def by_group(table, column):
+    return table.astype({column: str}).sort_values(column, ignore_index=True)
+
+
+def delete(conn, npm):
+    for table in ['karier', 'riwayat_akademis', 'mahasiswa']:
+        conn.execute(f'DELETE FROM {table} WHERE npm = ?', [npm])
+
+
+def test_summary_triggers_match_rebuild(conn, data, new_record):
+    changed = data.iloc[:3].astype(object)
+    changed['Program Studi'] = 'Statistika'
+    changed['Nama Perusahaan'] = 'Perusahaan Baru'
+    changed['Rata-rata Gaji'] = [5_000_000, None, 30_000_000]
+    added = pd.DataFrame([new_record('1234567890', **{'Rata-rata Gaji': 12_000_000})])
+    with conn:
+        alumni_db.write_frame(conn, alumni_db.clean_alumni_frame(changed), upsert=True)
+        alumni_db.write_frame(conn, alumni_db.clean_alumni_frame(added), upsert=True)
+        delete(conn, data['NPM'].iloc[5])
+        delete(conn, data['NPM'].iloc[6])
+        conn.execute("UPDATE perusahaan SET nama_perusahaan = 'Nama Baru' WHERE id_karyawan = ?",
+                     [data['Id Karyawan'].dropna().iloc[-1]])
+    maintained = summary_rows(conn)
+    with conn:
+        alumni_summary.rebuild(conn)
+    assert maintained == summary_rows(conn)
+
+    stats = alumni_summary.load_stats(conn)
+    expected = alumni_stats.AlumniStats.from_frame(alumni_db.fetch_alumni(conn))
+    assert stats.total == expected.total == len(data) - 1
+    for column in alumni_stats.GROUP_COLUMNS:
+        assert stats.counts(column).to_dict() == expected.counts(column).to_dict()
+        pd.testing.assert_frame_equal(by_group(stats.salary_by(column), column),
+                                      by_group(expected.salary_by(column), column), check_dtype=False)
+    assert stats.gaji_mean == pytest.approx(expected.gaji_mean)
+    assert (stats.gaji_min, stats.gaji_max) == (expected.gaji_min, expected.gaji_max)
@@ -0,0 +1,90 @@
+import pandas as pd
+
+import alumni_db
+import alumni_store
+import alumni_sync
+
+
+def write_sheet(path, raw):
+    with pd.ExcelWriter(path) as writer:
+        raw.to_excel(writer, sheet_name=alumni_db.EXCEL_SHEET, index=False)
+
+
+def npm_of(raw, row):
+    return alumni_db.normalize_npm(raw.loc[row, 'NPM'])
+
+
+def test_an_unchanged_workbook_is_not_read_again(conn, workbook):
+    first = alumni_sync.sync(conn, workbook)
+    assert first is not None and len(first) == 0
+    assert alumni_sync.sync(conn, workbook) is None
+    assert len(alumni_sync.sync(conn, workbook, force=True)) == 0
+
+
+def test_sync_writes_only_what_changed(conn, workbook, raw, db_path, new_record):
+    alumni_sync.sync(conn, workbook)
+    app_npm = '1234567890'
+    alumni_store.AlumniStore(db_path).add(new_record(app_npm))
+
+    removed, edited = npm_of(raw, 2), npm_of(raw, 3)
+    raw.loc[3, 'Judul Skripsi'] = 'Judul Skripsi yang Diperbaiki'
+    added = raw.iloc[[0]].assign(NPM='1234567891', Nama='Alumni Baru')
+    write_sheet(workbook, pd.concat([raw.drop(index=2), added], ignore_index=True))
+    delta = alumni_sync.sync(conn, workbook)
+    assert delta.counts() == {'tambah': 1, 'ubah': 1, 'hapus': 1}
+    assert delta.inserted == ['1234567891']
+    assert delta.updated == {edited: ['Judul Skripsi']}
+    assert delta.deleted == [removed]
+    # The alumnus added through the app is not in the workbook, and stays
+    assert alumni_db.existing_npms(conn, [removed, edited, app_npm, '1234567891']) == {
+        edited, app_npm, '1234567891'}
+    assert alumni_db.fetch_alumni_by_npm(conn, edited)['Judul Skripsi'].iloc[0] == 'Judul Skripsi yang Diperbaiki'
+
+    log = alumni_sync.changes(conn)
+    assert sorted(zip(log['npm'], log['aksi'])) == sorted(
+        [('1234567891', 'tambah'), (edited, 'ubah'), (removed, 'hapus')])
+    assert set(log['versi']) == {delta.version} == {alumni_db.data_version(conn)}
+    assert alumni_sync.changes(conn, after=log['id'].max()).empty
+
+
+def test_a_row_edited_into_an_invalid_one_is_held(conn, workbook, raw):
+    alumni_sync.sync(conn, workbook)
+    invalid = npm_of(raw, 3)
+    angkatan = raw.loc[3, 'Angkatan']
+    raw.loc[3, 'Angkatan'] = 1800
+    write_sheet(workbook, raw)
+    delta = alumni_sync.sync(conn, workbook)
+    assert len(delta) == 0
+    assert list(delta.workbook.held) == [invalid]
+    # The invalid edit keeps its last good row
+    assert alumni_db.fetch_alumni_by_npm(conn, invalid)['Angkatan'].iloc[0] == angkatan
+    assert [alumni_db.normalize_npm(npm) for npm, in conn.execute('SELECT npm FROM karantina')] == [invalid]
+    # Syncing again reports the row once, not once per sync
+    assert len(alumni_sync.sync(conn, workbook, force=True)) == 0
+    assert conn.execute('SELECT COUNT(*) FROM karantina').fetchone()[0] == 1
+
+    # Once fixed, the row leaves the quarantine and is synced like any other
+    raw.loc[3, 'Angkatan'] = angkatan
+    raw.loc[3, 'Judul Skripsi'] = 'Judul Skripsi yang Diperbaiki'
+    write_sheet(workbook, raw)
+    delta = alumni_sync.sync(conn, workbook)
+    assert delta.updated == {invalid: ['Judul Skripsi']} and not delta.deleted
+    assert conn.execute('SELECT COUNT(*) FROM karantina').fetchone()[0] == 0
+
+
+def test_workbook_rows_are_checked_against_alumni_added_elsewhere(conn, workbook, raw, db_path, new_record):
+    alumni_sync.sync(conn, workbook)
+    alumni_store.AlumniStore(db_path).add(new_record('1234567890', Nama='Siti Rahmawati'))
+    # The same alumnus typed into the workbook under an NPM one digit off
+    copy = raw.iloc[[0]].assign(NPM='1234567891', Nama='SITI RAHMAWATI', **{'Judul Skripsi': None,
+                                                                          'Id Karyawan': None})
+    # A corrected NPM is not flagged against its own old version
+    npm = npm_of(raw, 5)
+    corrected = npm[:-1] + ('0' if npm[-1] != '0' else '1')
+    raw = raw.astype({'NPM': object})
+    raw.loc[5, 'NPM'] = corrected
+    write_sheet(workbook, pd.concat([raw, copy], ignore_index=True))
+    delta = alumni_sync.sync(conn, workbook)
+    assert delta.inserted == [corrected] and delta.deleted == [npm]
+    assert delta.workbook.quality.counts() == {'mirip': 1}
+    assert not alumni_db.existing_npms(conn, ['1234567891'])
@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+
+import alumni_query
+import alumni_store
+import alumni_warmup
+
+
+def counter(release=None):
+    """An artifact 'jumlah' (the row count), optionally held back until ``release`` is set"""
+    def build(snapshot):
+        def count(data):
+            if release is not None:
+                release.wait(5)
+            return len(data)
+        return snapshot.derived('jumlah', count)
+    return build
+
+
+def test_the_rows_are_not_loaded_just_to_warm_them(db_path):
+    store = alumni_store.AlumniStore(db_path)
+    warmer = alumni_warmup.Warmer(common_searches=0)
+    store.subscribe(warmer.publish)
+    assert warmer.wait(5)
+    snapshot = store.snapshot()
+    assert not snapshot.loaded and snapshot.peek('search_index') is None
+
+    # A page loading the rows starts the warm-up of the version
+    len(snapshot)
+    assert warmer.wait(5)
+    assert snapshot.peek('search_index') is not None and snapshot.peek('figures') is not None
+
+
+def test_ready_falls_back_to_the_previous_version_while_warming(data):
+    release = threading.Event()
+    build = counter(release)
+    warmer = alumni_warmup.Warmer([('jumlah', build)], common_searches=0)
+    first = alumni_store.Snapshot(1, data=data)
+    release.set()
+    warmer.publish(first)
+    assert warmer.wait(5)
+    assert warmer.ready(first, 'jumlah', build) == (len(data), True)
+
+    release.clear()
+    second = alumni_store.Snapshot(2, data=data.iloc[:10])
+    warmer.publish(second)
+    assert warmer.ready(second, 'jumlah', build) == (len(data), False)
+    release.set()
+    assert warmer.wait(5)
+    assert warmer.ready(second, 'jumlah', build) == (10, True)
+
+
+def test_the_first_version_is_built_in_the_rerun(data):
+    warmer = alumni_warmup.Warmer([('jumlah', counter())], common_searches=0)
+    assert warmer.ready(alumni_store.Snapshot(1, data=data), 'jumlah', counter()) == (len(data), True)
+
+
+def test_common_searches_are_warmed(data):
+    warmer = alumni_warmup.Warmer([], common_searches=1)
+    frequent = alumni_query.parse_filters({'nama': 'an'})
+    rare = alumni_query.parse_filters({'nama': 'sa'})
+    for filters in [frequent, rare, frequent]:
+        warmer.record_search(filters)
+    assert warmer.common_filters() == [alumni_query.parse_filters({}), frequent]
+
+    snapshot = alumni_store.Snapshot(1, data=data)
+    warmer.publish(snapshot)
+    assert warmer.wait(5)
+    recent = snapshot.peek('search_results')
+    assert recent.get(tuple(sorted(frequent.items()))) is not None
+    assert recent.get(tuple(sorted(rare.items()))) is None
+
+
+def test_a_failed_build_is_reported_by_the_page(data):
+    def build(snapshot):
+        def count(data):
+            if len(data) < 20:
+                raise ValueError("data rusak")
+            return len(data)
+        return snapshot.derived('jumlah', count)
+
+    warmer = alumni_warmup.Warmer([('jumlah', build)], common_searches=0)
+    warmer.publish(alumni_store.Snapshot(1, data=data))
+    assert warmer.wait(5)
+    broken = alumni_store.Snapshot(2, data=data.iloc[:10])
+    warmer.publish(broken)
+    assert warmer.wait(5)
+    # Not the version 1 artifact: the failure shows instead of stale figures
+    with pytest.raises(ValueError, match="data rusak"):
+        warmer.ready(broken, 'jumlah', build)
+
+
+def test_the_thread_survives_an_error_outside_the_builds(data, monkeypatch):
+    warmer = alumni_warmup.Warmer([('jumlah', counter())], common_searches=0)
+    monkeypatch.setattr(warmer, 'common_filters', lambda: 1 / 0)
+    first = alumni_store.Snapshot(1, data=data)
+    warmer.publish(first)
+    assert warmer.wait(5)
+    assert warmer.ready(first, 'jumlah', counter()) == (len(data), True)
+
+    monkeypatch.undo()
+    second = alumni_store.Snapshot(2, data=data.iloc[:10])
+    warmer.publish(second)
+    assert warmer.wait(5)
+    assert second.peek('jumlah') == 10